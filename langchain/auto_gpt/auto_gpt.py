@@ -1,5 +1,3 @@
-import os
-
 import faiss
 import gradio as gr
 from langchain import SerpAPIWrapper
@@ -10,8 +8,11 @@ from langchain.tools import Tool
 from langchain.vectorstores import FAISS
 from langchain_experimental.autonomous_agents import AutoGPT
 
+# 记忆从空开始逐条写入，只能用无需训练的索引：flat 为精确检索，hnsw 为 HNSW 图索引
+INDEX_SPECS = {"flat": "Flat", "hnsw": "HNSW32"}
+
 
-def initialize_chat_bot(vector_store_dir: str = "chat_bot"):
+def initialize_chat_bot(vector_store_dir: str = "chat_bot", index_spec: str = "flat"):
     search = SerpAPIWrapper()
     tools = [
         Tool(
@@ -22,8 +23,10 @@ def initialize_chat_bot(vector_store_dir: str = "chat_bot"):
     ]
     # OpenAI Embedding 向量维数
     embedding_size = 1536
-    # 使用 Faiss 的 IndexFlatL2 索引
-    index = faiss.IndexFlatL2(embedding_size)
+    # 默认使用 Faiss 的 IndexFlatL2 索引，与 langchain FAISS 默认的 L2 距离一致
+    if index_spec not in INDEX_SPECS:
+        raise ValueError(f"Unknown index spec {index_spec!r}; use one of {', '.join(INDEX_SPECS)} for the agent memory")
+    index = faiss.index_factory(embedding_size, INDEX_SPECS[index_spec], faiss.METRIC_L2)
     # 实例化 Faiss 向量数据库
     embeddings_model = OpenAIEmbeddings()
     vectorstore = FAISS(embeddings_model.embed_query, index, InMemoryDocstore({}), {})
@@ -1,9 +1,5 @@
-import pandas as pd
-
 from enum import Enum, auto
-from PIL import Image as PILImage
 from utils import LOG
-from io import StringIO
 
 class ContentType(Enum):
     TEXT = auto()
@@ -28,8 +24,10 @@ class Content:
             return True
         elif self.content_type == ContentType.TABLE and isinstance(translation, list):
             return True
-        elif self.content_type == ContentType.IMAGE and isinstance(translation, PILImage.Image):
-            return True
+        elif self.content_type == ContentType.IMAGE:
+            # 只有图片内容才需要 PIL
+            from PIL import Image as PILImage
+            return isinstance(translation, PILImage.Image)
         return False
 
     def __str__(self):
@@ -38,6 +36,8 @@ class Content:
 
 class TableContent(Content):
     def __init__(self, data, translation=None):
+        import pandas as pd
+
         df = pd.DataFrame(data)
 
         # Verify if the number of rows and columns in the data and DataFrame object match
@@ -47,6 +47,8 @@ class TableContent(Content):
         super().__init__(ContentType.TABLE, df)
 
     def set_translation(self, translation, status):
+        import pandas as pd
+
         try:
             if not isinstance(translation, str):
                 raise ValueError(f"Invalid translation type. Expected str, but got {type(translation)}")
@@ -1,48 +1,66 @@
 import sys
 import os
+import json
+import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from flask import Flask, request, send_file, jsonify
-from translator import PDFTranslator, TranslationConfig
-from utils import ArgumentParser, LOG
+from flask import Flask, Response, request, send_file, jsonify, stream_with_context, url_for
+from werkzeug.utils import secure_filename
+from translator import PDFTranslator, TranslationConfig, TranslationJobQueue
+from translator.exceptions import JobQueueFullException
+from utils import ArgumentParser, JobStore, RateLimiter, TranslationCache, LOG
+from utils.job_store import JOB_FAILED, JOB_SUCCEEDED
 
 app = Flask(__name__)
 
 TEMP_FILE_DIR = "flask_temps/"
+# SSE 接口查询任务进度的间隔（秒）
+JOB_EVENTS_POLL_SECONDS = 0.5
+
+
+def save_upload(input_file):
+    # 上传文件保存到独立的任务目录，返回 (任务 id, 文件路径)
+    job_id, job_path = Jobs.new_job_dir()
+    filename = secure_filename(input_file.filename) or "input.pdf"
+    input_file_path = os.path.join(job_path, filename)
+    LOG.debug(f"[input_file_path]\n{input_file_path}")
+    input_file.save(input_file_path)
+    return job_id, input_file_path
+
+
+def job_response(job: dict) -> dict:
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'pages_done': job['pages_done'],
+        'pages_total': job['pages_total'],
+        'error': job['error'],
+        'status_url': url_for('job_status', job_id=job['id']),
+    }
+    if job['status'] == JOB_SUCCEEDED:
+        response['result_url'] = url_for('job_result', job_id=job['id'])
+    return response
+
 
 @app.route('/translation', methods=['POST'])
 def translation():
+    """提交翻译任务，立即返回任务 id；通过 GET /jobs/<id> 查询进度并下载译文。"""
+    input_file = request.files.get('input_file')
+    source_language = request.form.get('source_language', 'English')
+    target_language = request.form.get('target_language', 'Chinese')
+    output_file_format = request.form.get('output_file_format', 'markdown')
+
+    LOG.debug(f"[input_file]\n{input_file}")
+
+    if not input_file or not input_file.filename:
+        return jsonify({'status': 'error', 'message': 'input_file is required'}), 400
+
     try:
-        input_file = request.files['input_file']
-        source_language = request.form.get('source_language', 'English')
-        target_language = request.form.get('target_language', 'Chinese')
-
-        LOG.debug(f"[input_file]\n{input_file}")
-        LOG.debug(f"[input_file.filename]\n{input_file.filename}")
-
-        if input_file and input_file.filename:
-            # # 创建临时文件
-            input_file_path = TEMP_FILE_DIR+input_file.filename
-            LOG.debug(f"[input_file_path]\n{input_file_path}")
-
-            input_file.save(input_file_path)
-
-            # 调用翻译函数
-            output_file_path = Translator.translate_pdf(
-                input_file=input_file_path,
-                source_language=source_language,
-                target_language=target_language)
-            
-            # 移除临时文件
-            # os.remove(input_file_path)
-
-            # 构造完整的文件路径
-            output_file_path = os.getcwd() + "/" + output_file_path
-            LOG.debug(output_file_path)
-
-            # 返回翻译后的文件
-            return send_file(output_file_path, as_attachment=True)
+        job_id, input_file_path = save_upload(input_file)
+        job = Jobs.submit(job_id, input_file_path, output_file_format, source_language, target_language)
+    except JobQueueFullException as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
     except Exception as e:
         response = {
             'status': 'error',
@@ -50,6 +68,86 @@ def translation():
         }
         return jsonify(response), 400
 
+    return jsonify(job_response(job)), 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = Jobs.store.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'job {job_id} not found'}), 404
+    return jsonify(job_response(job))
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = Jobs.store.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'job {job_id} not found'}), 404
+    if job['status'] != JOB_SUCCEEDED:
+        return jsonify(job_response(job)), 409
+    # 返回翻译后的文件
+    return send_file(os.path.abspath(job['output_file']), as_attachment=True)
+
+
+@app.route('/translation/stream', methods=['POST'])
+def translation_stream():
+    """与 POST /translation 一样提交翻译任务，再以 server-sent events 推送该任务的进度，最后给出译文的下载地址。"""
+    input_file = request.files.get('input_file')
+    source_language = request.form.get('source_language', 'English')
+    target_language = request.form.get('target_language', 'Chinese')
+    output_file_format = request.form.get('output_file_format', 'markdown')
+
+    if not input_file or not input_file.filename:
+        return jsonify({'status': 'error', 'message': 'input_file is required'}), 400
+
+    try:
+        job_id, input_file_path = save_upload(input_file)
+        Jobs.submit(job_id, input_file_path, output_file_format, source_language, target_language)
+    except JobQueueFullException as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    return job_event_stream(job_id)
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """推送已有任务的进度，客户端断开或服务重启后可以用任务 id 重新订阅。"""
+    if Jobs.store.get(job_id) is None:
+        return jsonify({'status': 'error', 'message': f'job {job_id} not found'}), 404
+    return job_event_stream(job_id)
+
+
+def job_event_stream(job_id: str) -> Response:
+    def event(name: str, data: dict) -> str:
+        return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def generate():
+        # 只跟随 JobStore 中的任务状态，翻译本身由任务队列执行，客户端断开不影响任务
+        last_progress = None
+        while True:
+            job = Jobs.store.get(job_id)
+            if job is None:
+                yield event('error', {'status': 'error', 'message': f'job {job_id} not found'})
+                return
+            if job['status'] == JOB_SUCCEEDED:
+                yield event('done', job_response(job))
+                return
+            if job['status'] == JOB_FAILED:
+                yield event('error', job_response(job))
+                return
+            progress = (job['status'], job['pages_done'], job['pages_total'])
+            if progress != last_progress:
+                last_progress = progress
+                yield event('progress', job_response(job))
+            time.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    # 关闭反向代理的缓冲，保证事件及时送达客户端
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 
 def initialize_translator():
     # 解析命令行
@@ -59,13 +157,23 @@ def initialize_translator():
     # 初始化配置单例
     config = TranslationConfig()
     config.initialize(args)    
+    # 翻译缓存，--no_cache 时直接请求模型
+    cache = None if config.no_cache else TranslationCache(config.cache_file, config.cache_max_entries)
+    # 客户端限流器，按 RPM/TPM 配额调度所有模型请求
+    rate_limiter = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
     # 实例化 PDFTranslator 类，并调用 translate_pdf() 方法
-    global Translator
-    Translator = PDFTranslator(config.model_name)
+    global Translator, Jobs
+    Translator = PDFTranslator(config.model_name, cache=cache, rate_limiter=rate_limiter,
+                               streaming=config.streaming)
+    # 翻译任务在固定大小的线程池中执行，任务状态持久化到 SQLite，重启后继续处理未完成的任务
+    Jobs = TranslationJobQueue(Translator, JobStore(config.job_db_file), TEMP_FILE_DIR,
+                               max_workers=config.job_workers, max_pending=config.job_max_pending)
+    Jobs.recover()
 
 
 if __name__ == "__main__":
     # 初始化 translator
     initialize_translator()
     # 启动 Flask Web Server
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    # 任务队列运行在当前进程内，关闭 debug 模式的自动重载，避免启动两份工作线程重复执行任务
+    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
@@ -1,20 +1,39 @@
 import sys
 import os
+import time
 import gradio as gr
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from utils import ArgumentParser, LOG
+from utils import ArgumentParser, RateLimiter, TranslationCache, LOG
 from translator import PDFTranslator, TranslationConfig
 
 
+# 预览刷新的最小间隔（秒），避免每个 token 都推送一次页面更新
+PREVIEW_INTERVAL = 0.2
+
 def translation(input_file, source_language, target_language):
     LOG.debug(f"[翻译任务]\n源文件: {input_file.name}\n源语言: {source_language}\n目标语言: {target_language}")
 
-    output_file_path = Translator.translate_pdf(
-        input_file.name, source_language=source_language, target_language=target_language)
-
-    return output_file_path
+    # 已完成页的 markdown，以及当前页正在生成的文本
+    finished_pages = []
+    current_page = ""
+    last_update = 0.0
+    for event in Translator.translate_pdf_stream(
+            input_file.name, source_language=source_language, target_language=target_language):
+        if event["event"] == "token":
+            current_page += event["token"]
+            if time.monotonic() - last_update < PREVIEW_INTERVAL:
+                continue
+        elif event["event"] == "page":
+            finished_pages.append(event["markdown"])
+            current_page = ""
+            LOG.info(f"第 {event['page'] + 1}/{event['total']} 页翻译完成")
+        elif event["event"] == "done":
+            yield "---\n\n".join(finished_pages), event["output_file"]
+            return
+        last_update = time.monotonic()
+        yield "---\n\n".join(finished_pages + [current_page]), None
 
 def launch_gradio():
 
@@ -27,11 +46,14 @@ def launch_gradio():
             gr.Textbox(label="目标语言（默认：中文）", placeholder="Chinese", value="Chinese")
         ],
         outputs=[
+            gr.Markdown(label="翻译预览"),
             gr.File(label="下载翻译文件")
         ],
         allow_flagging="never"
     )
 
+    # 生成器函数需要开启队列，才能把每页的翻译结果逐步推送到页面
+    iface.queue()
     iface.launch(share=True, server_name="0.0.0.0")
 
 def initialize_translator():
@@ -42,9 +64,14 @@ def initialize_translator():
     # 初始化配置单例
     config = TranslationConfig()
     config.initialize(args)    
+    # 翻译缓存，--no_cache 时直接请求模型
+    cache = None if config.no_cache else TranslationCache(config.cache_file, config.cache_max_entries)
+    # 客户端限流器，按 RPM/TPM 配额调度所有模型请求
+    rate_limiter = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
     # 实例化 PDFTranslator 类，并调用 translate_pdf() 方法
     global Translator
-    Translator = PDFTranslator(config.model_name)
+    Translator = PDFTranslator(config.model_name, cache=cache, rate_limiter=rate_limiter,
+                               streaming=config.streaming)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@ import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from utils import ArgumentParser, LOG
+from utils import ArgumentParser, RateLimiter, TranslationCache, LOG
 from translator import PDFTranslator, TranslationConfig
 
 if __name__ == "__main__":
@@ -15,6 +15,15 @@ if __name__ == "__main__":
     config = TranslationConfig()
     config.initialize(args)    
 
+    # 翻译缓存，--no_cache 时直接请求模型
+    cache = None if config.no_cache else TranslationCache(config.cache_file, config.cache_max_entries)
+    # 客户端限流器，按 RPM/TPM 配额调度所有模型请求
+    rate_limiter = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
+
     # 实例化 PDFTranslator 类，并调用 translate_pdf() 方法
-    translator = PDFTranslator(config.model_name)
+    translator = PDFTranslator(config.model_name, cache=cache, rate_limiter=rate_limiter)
     translator.translate_pdf(config.input_file, config.output_file_format, pages=None)
+
+    LOG.info(f"限流统计: {rate_limiter.stats()}")
+    if cache is not None:
+        LOG.info(f"翻译缓存统计: {cache.stats()}")
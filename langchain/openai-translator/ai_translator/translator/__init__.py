@@ -1,2 +1,18 @@
-from .pdf_translator import PDFTranslator
-from .translation_config import TranslationConfig
\ No newline at end of file
+import importlib
+
+# 按需导入子模块：只读取配置时不必加载 langchain、pdfplumber、reportlab
+_EXPORTS = {
+    "PDFTranslator": ".pdf_translator",
+    "TranslationConfig": ".translation_config",
+    "TranslationJobQueue": ".job_queue",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
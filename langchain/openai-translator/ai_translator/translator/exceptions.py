@@ -3,3 +3,9 @@ class PageOutOfRangeException(Exception):
         self.book_pages = book_pages
         self.requested_pages = requested_pages
         super().__init__(f"Page out of range: Book has {book_pages} pages, but {requested_pages} pages were requested.")
+
+
+class JobQueueFullException(Exception):
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        super().__init__(f"Job queue is full: {max_pending} jobs are already waiting.")
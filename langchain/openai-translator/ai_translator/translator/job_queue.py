@@ -0,0 +1,92 @@
+import os
+import threading
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+
+from translator.exceptions import JobQueueFullException
+from translator.pdf_translator import PDFTranslator
+from utils import LOG, JobStore
+from utils.job_store import JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED
+
+
+class TranslationJobQueue:
+    """翻译任务队列：提交后立即返回任务 id，由固定大小的线程池在后台翻译，状态记录在 JobStore 中。"""
+
+    def __init__(self, translator: PDFTranslator, store: JobStore, job_dir: str,
+                 max_workers: int = 2, max_pending: int = 100):
+        self.translator = translator
+        self.store = store
+        self.job_dir = job_dir
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="translation-job")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def new_job_dir(self) -> (str, str):
+        # 每个任务使用独立的目录，同名文件的上传与译文互不覆盖
+        job_id = uuid.uuid4().hex
+        job_path = os.path.join(self.job_dir, job_id)
+        os.makedirs(job_path)
+        return job_id, job_path
+
+    def submit(self, job_id: str, input_file: str, output_file_format: str = 'markdown',
+               source_language: str = 'English', target_language: str = 'Chinese') -> dict:
+        self._reserve()
+        try:
+            job = self.store.create(job_id, input_file, output_file_format, source_language, target_language)
+            self.executor.submit(self._run, job_id)
+        except Exception:
+            self._release()
+            raise
+        return job
+
+    def recover(self) -> int:
+        """服务重启后把未完成的任务重新入队，执行到一半的任务从头翻译（已翻译的内容会命中翻译缓存）。"""
+        recovered = 0
+        for job in self.store.unfinished():
+            if not os.path.exists(job["input_file"]):
+                self.store.update(job["id"], status=JOB_FAILED, error="input file is missing after restart")
+                continue
+            self.store.update(job["id"], status=JOB_QUEUED, pages_done=0)
+            with self._lock:
+                self._pending += 1
+            self.executor.submit(self._run, job["id"])
+            recovered += 1
+        if recovered:
+            LOG.info(f"重新入队 {recovered} 个未完成的翻译任务")
+        return recovered
+
+    def _reserve(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFullException(self.max_pending)
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, job_id: str):
+        job = self.store.get(job_id)
+        try:
+            self.store.update(job_id, status=JOB_RUNNING)
+            LOG.info(f"[任务 {job_id}] 开始翻译: {job['input_file']}")
+            output_file_path = self.translator.translate_pdf(
+                job["input_file"],
+                output_file_format=job["output_file_format"],
+                source_language=job["source_language"],
+                target_language=job["target_language"],
+                progress=lambda done, total: self.store.update(job_id, pages_done=done, pages_total=total))
+            if not output_file_path:
+                raise Exception(f"不支持文件类型: {job['output_file_format']}")
+            self.store.update(job_id, status=JOB_SUCCEEDED, output_file=output_file_path)
+            LOG.info(f"[任务 {job_id}] 翻译完成: {output_file_path}")
+        except Exception as e:
+            LOG.error(f"[任务 {job_id}] 翻译失败: {e}")
+            self.store.update(job_id, status=JOB_FAILED, error=str(e))
+        finally:
+            self._release()
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
@@ -1,4 +1,5 @@
-import pdfplumber
+import bisect
+
 from typing import Optional
 from book import Book, Page, Content, ContentType, TableContent
 from translator.exceptions import PageOutOfRangeException
@@ -10,6 +11,8 @@ class PDFParser:
         pass
 
     def parse_pdf(self, pdf_file_path: str, pages: Optional[int] = None) -> Book:
+        import pdfplumber
+
         book = Book(pdf_file_path)
 
         with pdfplumber.open(pdf_file_path) as pdf:
@@ -23,36 +26,104 @@ class PDFParser:
 
             for pdf_page in pages_to_parse:
                 page = Page()
+                PDFParser.parse_page(page, pdf_page)
+                book.add_page(page)
 
-                # Store the original text content
-                raw_text = pdf_page.extract_text()
-                tables = pdf_page.extract_tables()
-
-                # Remove each cell's content from the original text
-                for table_data in tables:
-                    for row in table_data:
-                        for cell in row:
-                            raw_text = raw_text.replace(cell, "", 1)
-
-                # Handling text
-                if raw_text:
-                    # Remove empty lines and leading/trailing whitespaces
-                    raw_text_lines = raw_text.splitlines()
-                    cleaned_raw_text_lines = [line.strip() for line in raw_text_lines if line.strip()]
-                    cleaned_raw_text = "\n".join(cleaned_raw_text_lines)
+        return book
 
-                    text_content = Content(content_type=ContentType.TEXT, original=cleaned_raw_text)
-                    page.add_content(text_content)
-                    LOG.debug(f"[raw_text]\n {cleaned_raw_text}")
+    @staticmethod
+    def parse_page(page, pdf_page):
+        from pdfplumber.utils import extract_text
 
+        # 一次遍历页面上的所有字符：落在表格单元格内的字符归入该单元格，其余字符按纵向位置分到各表格之间的文本段，
+        # 文本段与表格按阅读顺序（自上而下）交替加入 page
+        tables = sorted(pdf_page.find_tables(), key=lambda table: (table.bbox[1], table.bbox[0]))
+        if not tables:
+            PDFParser._add_text(page, pdf_page.extract_text())
+            return
 
+        grids = [TableGrid(table) for table in tables]
+        tops = [grid.bbox[1] for grid in grids]
+        segments = [[] for _ in range(len(grids) + 1)]
+        for char in pdf_page.chars:
+            x = (char["x0"] + char["x1"]) / 2
+            y = (char["top"] + char["bottom"]) / 2
+            for grid in grids:
+                if grid.add_char(char, x, y):
+                    break
+            else:
+                # 第 i 段是第 i 个表格上方（第 i-1 个表格之后）的文本
+                segments[bisect.bisect_right(tops, y)].append(char)
 
-                # Handling tables
-                if tables:
-                    table = TableContent(tables)
+        for table_idx, chars in enumerate(segments):
+            if chars:
+                PDFParser._add_text(page, extract_text(chars))
+            if table_idx < len(grids):
+                table_data = grids[table_idx].extract()
+                if table_data:
+                    # TableContent 接收表格列表，每个表格单独作为一个 content
+                    table = TableContent([table_data])
                     page.add_content(table)
                     LOG.debug(f"[table]\n{table}")
 
-                book.add_page(page)
+    @staticmethod
+    def _add_text(page, raw_text: Optional[str]):
+        if not raw_text:
+            return
+        # Remove empty lines and leading/trailing whitespaces
+        raw_text_lines = raw_text.splitlines()
+        cleaned_raw_text_lines = [line.strip() for line in raw_text_lines if line.strip()]
+        if not cleaned_raw_text_lines:
+            return
+        cleaned_raw_text = "\n".join(cleaned_raw_text_lines)
 
-        return book
+        text_content = Content(content_type=ContentType.TEXT, original=cleaned_raw_text)
+        page.add_content(text_content)
+        LOG.debug(f"[raw_text]\n {cleaned_raw_text}")
+
+
+class TableGrid:
+    """pdfplumber 表格的单元格索引：按单元格边界切成网格，用二分查找把字符定位到单元格。
+
+    与 Table.extract() 的结果一致（字符中点落在单元格内即属于该单元格），
+    但只需对每个字符做两次二分查找，而不是对每一行、每个单元格都重新过滤一遍字符。
+    """
+
+    def __init__(self, table):
+        self.bbox = table.bbox
+        rows = [row.cells for row in table.rows]
+        cells = [cell for row in rows for cell in row if cell is not None]
+        self.xs = sorted({cell[0] for cell in cells} | {cell[2] for cell in cells})
+        self.ys = sorted({cell[1] for cell in cells} | {cell[3] for cell in cells})
+        # 网格 (y 序号, x 序号) -> (行号, 列号)；合并单元格会覆盖多个网格
+        self.slots = {}
+        for row_idx, row in enumerate(rows):
+            for col_idx, cell in enumerate(row):
+                if cell is None:
+                    continue
+                x0, top, x1, bottom = cell
+                for yi in range(bisect.bisect_left(self.ys, top), bisect.bisect_left(self.ys, bottom)):
+                    for xi in range(bisect.bisect_left(self.xs, x0), bisect.bisect_left(self.xs, x1)):
+                        self.slots[(yi, xi)] = (row_idx, col_idx)
+        self.layout = [[cell is not None for cell in row] for row in rows]
+        self.cell_chars = {}
+
+    def add_char(self, char, x: float, y: float) -> bool:
+        """字符位于表格范围内时返回 True（并归入所在单元格），否则返回 False。"""
+        x0, top, x1, bottom = self.bbox
+        if not (x0 <= x < x1 and top <= y < bottom):
+            return False
+        slot = self.slots.get((bisect.bisect_right(self.ys, y) - 1, bisect.bisect_right(self.xs, x) - 1))
+        if slot is not None:
+            self.cell_chars.setdefault(slot, []).append(char)
+        return True
+
+    def extract(self) -> list:
+        from pdfplumber.utils import extract_text
+
+        # 合并单元格等空单元格 pdfplumber 返回 None，这里统一为空字符串
+        return [
+            [extract_text(self.cell_chars.get((row_idx, col_idx), [])) if present else ""
+             for col_idx, present in enumerate(row)]
+            for row_idx, row in enumerate(self.layout)
+        ]
@@ -1,12 +1,20 @@
-from typing import Optional
+import queue
+import threading
+
+from typing import Callable, Optional
+from book import ContentType
 from translator.pdf_parser import PDFParser
 from translator.writer import Writer
-from translator.translation_chain import TranslationChain
-from utils import LOG
+from utils import LOG, RateLimiter, TranslationCache
 
 class PDFTranslator:
-    def __init__(self, model_name: str):
-        self.translate_chain = TranslationChain(model_name)
+    def __init__(self, model_name: str, cache: Optional[TranslationCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None, streaming: bool = False):
+        # langchain 只在真正创建翻译链时加载
+        from translator.translation_chain import TranslationChain
+
+        self.translate_chain = TranslationChain(model_name, cache=cache, rate_limiter=rate_limiter,
+                                                streaming=streaming)
         self.pdf_parser = PDFParser()
         self.writer = Writer()
 
@@ -15,15 +23,78 @@ class PDFTranslator:
                     output_file_format: str = 'markdown',
                     source_language: str = "English",
                     target_language: str = 'Chinese',
-                    pages: Optional[int] = None):
-        
-        self.book = self.pdf_parser.parse_pdf(input_file, pages)
+                    pages: Optional[int] = None,
+                    progress: Optional[Callable[[int, int], None]] = None):
+        # book 是本次调用的局部变量，同一个 PDFTranslator 可以被多个任务并发使用
+        book = self.pdf_parser.parse_pdf(input_file, pages)
 
-        for page_idx, page in enumerate(self.book.pages):
-            for content_idx, content in enumerate(page.contents):
+        for page_idx, page in enumerate(book.pages):
+            for content in page.contents:
                 # Translate content.original
                 translation, status = self.translate_chain.run(content, source_language, target_language)
-                # Update the content in self.book.pages directly
-                self.book.pages[page_idx].contents[content_idx].set_translation(translation, status)
-        
-        return self.writer.save_translated_book(self.book, output_file_format)
+                # Update the content in book.pages directly
+                content.set_translation(translation, status)
+            # 每翻译完一页回报一次进度：(已完成页数, 总页数)
+            if progress is not None:
+                progress(page_idx + 1, len(book.pages))
+
+        return self.writer.save_translated_book(book, output_file_format)
+
+    def translate_pdf_stream(self,
+                    input_file: str,
+                    output_file_format: str = 'markdown',
+                    source_language: str = "English",
+                    target_language: str = 'Chinese',
+                    pages: Optional[int] = None):
+        """流式翻译，依次产出以下事件（dict）：
+
+        - {"event": "token", "page": 页码, "token": 文本}：模型刚生成的 token（仅 streaming 模式的文本内容）
+        - {"event": "page", "page": 页码, "total": 总页数, "markdown": 该页译文}：一页翻译完成
+        - {"event": "done", "output_file": 译文路径}：全部完成并写出文件
+        """
+        book = self.pdf_parser.parse_pdf(input_file, pages)
+
+        # 翻译在后台线程中进行，token 和整页结果通过队列交给调用方
+        events = queue.Queue()
+        cancelled = threading.Event()
+        worker = threading.Thread(target=self._translate_pages,
+                                  args=(book, source_language, target_language, events, cancelled),
+                                  daemon=True)
+        worker.start()
+        try:
+            while True:
+                event = events.get()
+                if event["event"] == "error":
+                    raise Exception(event["message"])
+                if event["event"] == "end":
+                    break
+                yield event
+        finally:
+            # 调用方提前退出（如客户端断开连接）时，后台线程翻译完当前内容后停止
+            cancelled.set()
+
+        output_file_path = self.writer.save_translated_book(book, output_file_format)
+        yield {"event": "done", "output_file": output_file_path}
+
+    def _translate_pages(self, book, source_language: str, target_language: str,
+                         events: queue.Queue, cancelled: threading.Event):
+        try:
+            for page_idx, page in enumerate(book.pages):
+                for content in page.contents:
+                    if cancelled.is_set():
+                        LOG.info("流式翻译已取消")
+                        return
+                    # 表格的译文是结构化文本，逐 token 推送没有意义，只推送整页结果
+                    on_token = None
+                    if content.content_type == ContentType.TEXT:
+                        on_token = lambda token, page_idx=page_idx: events.put(
+                            {"event": "token", "page": page_idx, "token": token})
+                    translation, status = self.translate_chain.run(content, source_language, target_language,
+                                                                   on_token=on_token)
+                    content.set_translation(translation, status)
+                events.put({"event": "page", "page": page_idx, "total": len(book.pages),
+                            "markdown": Writer.page_to_markdown(page)})
+            events.put({"event": "end"})
+        except Exception as e:
+            LOG.error(f"流式翻译失败: {e}")
+            events.put({"event": "error", "message": str(e)})
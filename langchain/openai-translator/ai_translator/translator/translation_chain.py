@@ -1,3 +1,7 @@
+from typing import Callable, Optional
+
+from langchain.callbacks import get_openai_callback
+from langchain.callbacks.base import BaseCallbackHandler
 from langchain.chat_models import ChatOpenAI
 from langchain.chains import LLMChain
 
@@ -7,11 +11,33 @@ from langchain.prompts.chat import (
     HumanMessagePromptTemplate,
 )
 
-from utils import LOG
+from utils import LOG, RateLimiter, TranslationCache, count_tokens
+
+# 提示词模板版本号，修改提示词后需递增，使旧的翻译缓存失效
+PROMPT_VERSION = 1
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """把模型逐个返回的 token 转交给 on_token 回调。"""
+
+    def __init__(self, on_token: Callable[[str], None]):
+        self.on_token = on_token
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.on_token(token)
+
 
 class TranslationChain:
-    def __init__(self, model_name: str = "gpt-3.5-turbo", verbose: bool = True):
-        
+    def __init__(self, model_name: str = "gpt-3.5-turbo", verbose: bool = True,
+                 cache: Optional[TranslationCache] = None, rate_limiter: Optional[RateLimiter] = None,
+                 max_attempts: int = 5, streaming: bool = False):
+        self.model_name = model_name
+        self.streaming = streaming
+        self.cache = cache
+        # 未指定限流器时仍使用一个不限 RPM/TPM 的实例，用于处理 429 的退避
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.max_attempts = max_attempts
+
         # 翻译任务指令始终由 System 角色承担
         template = (
             """You are a translation expert, proficient in various languages. \n
@@ -29,20 +55,56 @@ class TranslationChain:
         )
 
         # 为了翻译结果的稳定性，将 temperature 设置为 0
-        chat = ChatOpenAI(model_name=model_name, temperature=0, verbose=verbose)
+        # 429 的重试由 rate_limiter 统一调度，关闭 ChatOpenAI 自带的重试
+        # streaming 时模型逐个 token 返回，可以通过 run(on_token=...) 边生成边推送
+        chat = ChatOpenAI(model_name=model_name, temperature=0, verbose=verbose, max_retries=1,
+                          streaming=streaming)
 
         self.chain = LLMChain(llm=chat, prompt=chat_prompt_template, verbose=verbose)
 
-    def run(self, text: str, source_language: str, target_language: str) -> (str, bool):
+    def run(self, text: str, source_language: str, target_language: str,
+            on_token: Optional[Callable[[str], None]] = None) -> (str, bool):
+        cache_key = None
+        if self.cache is not None:
+            cache_key = TranslationCache.make_key(
+                self.model_name, source_language, target_language, PROMPT_VERSION, str(text))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached, True
+
+        # 翻译任务的输出长度与输入相当，按输入的两倍预估本次请求消耗的 token
+        estimated_tokens = count_tokens(str(text), self.model_name) * 2
+        callbacks = [TokenStreamHandler(on_token)] if on_token is not None and self.streaming else None
         result = ""
-        try:
-            result = self.chain.run({
-                "text": text,
-                "source_language": source_language,
-                "target_language": target_language,
-            })
-        except Exception as e:
-            LOG.error(f"An error occurred during translation: {e}")
-            return result, False
-
-        return result, True
\ No newline at end of file
+        attempts = 0
+        while True:
+            attempts += 1
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                with get_openai_callback() as callback:
+                    result = self.chain.run({
+                        "text": text,
+                        "source_language": source_language,
+                        "target_language": target_language,
+                    }, callbacks=callbacks)
+            except Exception as e:
+                if type(e).__name__ == "RateLimitError" and attempts < self.max_attempts:
+                    self.rate_limiter.on_rate_limited(RateLimiter.parse_retry_after(TranslationChain._error_headers(e)))
+                    continue
+                LOG.error(f"An error occurred during translation: {e}")
+                return result, False
+            break
+        # streaming 模式下接口不返回用量，按估算值记账
+        self.rate_limiter.record_usage(estimated_tokens, callback.total_tokens or estimated_tokens)
+
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        return result, True
+
+    @staticmethod
+    def _error_headers(error):
+        # openai<1.0 的异常直接带 headers，openai>=1.0 的放在 response 上
+        headers = getattr(error, "headers", None)
+        if headers is None and getattr(error, "response", None) is not None:
+            headers = error.response.headers
+        return headers
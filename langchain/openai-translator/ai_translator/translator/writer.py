@@ -1,15 +1,75 @@
 import os
-from reportlab.lib import colors, pagesizes, units
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-)
+from functools import lru_cache
+from typing import Iterator
 
 from book import Book, ContentType
 from utils import LOG
 
+# 默认的中文字体
+FONT_NAME = "SimSun"
+FONT_PATH = "../fonts/simsun.ttc"  # 请将此路径替换为您的字体文件路径
+
+
+@lru_cache(maxsize=None)
+def register_font(font_path: str = FONT_PATH, font_name: str = FONT_NAME) -> str:
+    # 解析 ttc 字体文件很慢，每个进程只注册一次，之后导出 pdf 直接复用
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(TTFont(font_name, font_path))
+    LOG.debug(f"注册字体 {font_name}: {font_path}")
+    return font_name
+
+
+@lru_cache(maxsize=None)
+def pdf_paragraph_style(font_name: str = FONT_NAME):
+    from reportlab.lib.styles import ParagraphStyle
+
+    return ParagraphStyle(font_name, fontName=font_name, fontSize=12, leading=14)
+
+
+@lru_cache(maxsize=None)
+def pdf_table_style(font_name: str = FONT_NAME):
+    # 所有表格共用同一个 TableStyle
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), font_name),  # 更改表头字体为 "SimSun"
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTNAME', (0, 1), (-1, -1), font_name),  # 更改表格中的字体为 "SimSun"
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+
+class LazyStory(list):
+    """按需生成的 story。
+
+    reportlab 的 doc.build 只从列表头部逐个取出 flowables 排版，这里在剩余不足 low_water 个时
+    才继续生成后续页面的 flowables，内存中只保留少量页面，而不是整本书的 Paragraph/Table 对象。
+    """
+
+    def __init__(self, flowables: Iterator, low_water: int = 64):
+        super().__init__()
+        self._flowables = flowables
+        self.low_water = low_water
+
+    def __len__(self) -> int:
+        if self._flowables is not None and super().__len__() < self.low_water:
+            for flowable in self._flowables:
+                self.append(flowable)
+                if super().__len__() >= self.low_water:
+                    break
+            else:
+                self._flowables = None
+        return super().__len__()
+
+
 class Writer:
     def __init__(self):
         pass
@@ -30,58 +90,49 @@ class Writer:
         return output_file_path
 
 
-    def _save_translated_book_pdf(self, book: Book, output_file_path: str = None):
+    def _save_translated_book_pdf(self, book: Book, output_file_path: str = None, font_path: str = FONT_PATH):
+        # 只有导出 pdf 时才加载 reportlab
+        from reportlab.lib import pagesizes
+        from reportlab.platypus import SimpleDocTemplate
 
         output_file_path = book.pdf_file_path.replace('.pdf', f'_translated.pdf')
 
         LOG.info(f"开始导出: {output_file_path}")
 
         # Register Chinese font
-        font_path = "../fonts/simsun.ttc"  # 请将此路径替换为您的字体文件路径
-        pdfmetrics.registerFont(TTFont("SimSun", font_path))
-
-        # Create a new ParagraphStyle with the SimSun font
-        simsun_style = ParagraphStyle('SimSun', fontName='SimSun', fontSize=12, leading=14)
+        font_name = register_font(font_path)
 
         # Create a PDF document
         doc = SimpleDocTemplate(output_file_path, pagesize=pagesizes.letter)
-        styles = getSampleStyleSheet()
-        story = []
 
+        # 边排版边生成后续页面的 flowables
+        doc.build(LazyStory(Writer.iter_pdf_flowables(book, font_name)))
+        return output_file_path
+
+    @staticmethod
+    def iter_pdf_flowables(book: Book, font_name: str = FONT_NAME) -> Iterator:
+        from reportlab.platypus import Paragraph, Table, PageBreak
+
+        # 样式对象在所有段落和表格之间共用
+        paragraph_style = pdf_paragraph_style(font_name)
+        table_style = pdf_table_style(font_name)
+        page_count = len(book.pages)
         # Iterate over the pages and contents
-        for page in book.pages:
+        for page_idx, page in enumerate(book.pages):
             for content in page.contents:
                 if content.status:
                     if content.content_type == ContentType.TEXT:
                         # Add translated text to the PDF
-                        text = content.translation
-                        para = Paragraph(text, simsun_style)
-                        story.append(para)
+                        yield Paragraph(content.translation, paragraph_style)
 
                     elif content.content_type == ContentType.TABLE:
                         # Add table to the PDF
-                        table = content.translation
-                        table_style = TableStyle([
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                            ('FONTNAME', (0, 0), (-1, 0), 'SimSun'),  # 更改表头字体为 "SimSun"
-                            ('FONTSIZE', (0, 0), (-1, 0), 14),
-                            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                            ('FONTNAME', (0, 1), (-1, -1), 'SimSun'),  # 更改表格中的字体为 "SimSun"
-                            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                        ])
-                        pdf_table = Table(table.values.tolist())
+                        pdf_table = Table(content.translation.values.tolist())
                         pdf_table.setStyle(table_style)
-                        story.append(pdf_table)
+                        yield pdf_table
             # Add a page break after each page except the last one
-            if page != book.pages[-1]:
-                story.append(PageBreak())
-
-        # Save the translated book as a new PDF file
-        doc.build(story)
-        return output_file_path
+            if page_idx < page_count - 1:
+                yield PageBreak()
 
 
     def _save_translated_book_markdown(self, book: Book, output_file_path: str = None):
@@ -91,24 +142,30 @@ class Writer:
         with open(output_file_path, 'w', encoding='utf-8') as output_file:
             # Iterate over the pages and contents
             for page in book.pages:
-                for content in page.contents:
-                    if content.status:
-                        if content.content_type == ContentType.TEXT:
-                            # Add translated text to the Markdown file
-                            text = content.translation
-                            output_file.write(text + '\n\n')
-
-                        elif content.content_type == ContentType.TABLE:
-                            # Add table to the Markdown file
-                            table = content.translation
-                            header = '| ' + ' | '.join(str(column) for column in table.columns) + ' |' + '\n'
-                            separator = '| ' + ' | '.join(['---'] * len(table.columns)) + ' |' + '\n'
-                            # body = '\n'.join(['| ' + ' | '.join(row) + ' |' for row in table.values.tolist()]) + '\n\n'
-                            body = '\n'.join(['| ' + ' | '.join(str(cell) for cell in row) + ' |' for row in table.values.tolist()]) + '\n\n'
-                            output_file.write(header + separator + body)
+                output_file.write(Writer.page_to_markdown(page))
 
                 # Add a page break (horizontal rule) after each page except the last one
                 if page != book.pages[-1]:
                     output_file.write('---\n\n')
 
-        return output_file_path
\ No newline at end of file
+        return output_file_path
+
+    @staticmethod
+    def page_to_markdown(page) -> str:
+        # 单页的 markdown，流式翻译时每翻译完一页就推送给客户端
+        parts = []
+        for content in page.contents:
+            if content.status:
+                if content.content_type == ContentType.TEXT:
+                    # Add translated text to the Markdown file
+                    text = content.translation
+                    parts.append(text + '\n\n')
+
+                elif content.content_type == ContentType.TABLE:
+                    # Add table to the Markdown file
+                    table = content.translation
+                    header = '| ' + ' | '.join(str(column) for column in table.columns) + ' |' + '\n'
+                    separator = '| ' + ' | '.join(['---'] * len(table.columns)) + ' |' + '\n'
+                    body = '\n'.join(['| ' + ' | '.join(str(cell) for cell in row) + ' |' for row in table.values.tolist()]) + '\n\n'
+                    parts.append(header + separator + body)
+        return ''.join(parts)
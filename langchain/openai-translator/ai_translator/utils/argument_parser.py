@@ -9,6 +9,10 @@ class ArgumentParser:
         self.parser.add_argument('--output_file_format', type=str, help='The file format of translated book. Now supporting PDF and Markdown')
         self.parser.add_argument('--source_language', type=str, help='The language of the original book to be translated.')
         self.parser.add_argument('--target_language', type=str, help='The target language for translating the original book.')
+        self.parser.add_argument('--requests_per_minute', type=int, help='Client-side limit of model requests per minute.')
+        self.parser.add_argument('--tokens_per_minute', type=int, help='Client-side limit of model tokens per minute.')
+        self.parser.add_argument('--job_workers', type=int, help='Number of translation jobs the Flask server runs at once.')
+        self.parser.add_argument('--no_cache', '--no-cache', action='store_true', default=None, help='Bypass the persistent translation cache.')
 
     def parse_arguments(self):
         args = self.parser.parse_args()
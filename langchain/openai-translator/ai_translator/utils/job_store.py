@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import threading
+import time
+
+from typing import Optional
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+JOB_FIELDS = ("id", "status", "input_file", "output_file", "output_file_format", "source_language",
+              "target_language", "pages_done", "pages_total", "error", "created_at", "updated_at")
+
+
+class JobStore:
+    """基于 SQLite 的翻译任务状态表，服务重启后仍可查询和恢复任务。"""
+
+    def __init__(self, db_file: str):
+        db_dir = os.path.dirname(db_file)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        # 多个请求线程与任务线程共用同一个连接，由 _lock 串行化访问
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, input_file TEXT NOT NULL, output_file TEXT, "
+            "output_file_format TEXT NOT NULL, source_language TEXT NOT NULL, target_language TEXT NOT NULL, "
+            "pages_done INTEGER NOT NULL DEFAULT 0, pages_total INTEGER, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        self._conn.commit()
+
+    def create(self, job_id: str, input_file: str, output_file_format: str,
+               source_language: str, target_language: str) -> dict:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, input_file, output_file_format, source_language, target_language, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, input_file, output_file_format, source_language, target_language, now, now))
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def update(self, job_id: str, **fields):
+        unknown = set(fields) - set(JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def unfinished(self) -> list:
+        """排队中或执行中的任务，按提交顺序返回，用于服务重启后重新入队。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING)).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,115 @@
+"""对比 index_factory 各种索引的 recall@k、单次检索延迟、索引大小和构建耗时。
+
+使用聚类分布的合成向量（真实 Embedding 同样聚成许多簇），查询为库中向量加噪声，精确的 Flat 检索结果作为基准。
+聊天场景每次只检索一个问题，因此延迟按逐条查询统计（单线程）。
+用法（在 sales_chatbot 目录下执行）:
+    python benchmarks/bench_ann_index.py --vectors 1000000 --dim 256
+    python benchmarks/bench_ann_index.py --vectors 200000 --dim 1536 --specs ivf_pq hnsw "IVF1024,PQ64"
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from index_factory import INDEX_PRESETS, build_index, factory_string, tune_index
+
+# 各类索引要扫描的检索参数
+NPROBES = (1, 4, 16, 64)
+EF_SEARCHES = (16, 64, 256)
+
+
+def make_vectors(n_vectors: int, dimension: int, n_clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dimension)).astype(np.float32)
+    vectors = np.empty((n_vectors, dimension), dtype=np.float32)
+    # 分块生成，避免临时数组占用双倍内存
+    for start in range(0, n_vectors, 100000):
+        end = min(start + 100000, n_vectors)
+        labels = rng.integers(n_clusters, size=end - start)
+        vectors[start:end] = centers[labels] + 0.5 * rng.normal(size=(end - start, dimension)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, n_queries: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), n_queries, replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def search_one_by_one(index, queries: np.ndarray, k: int):
+    labels = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries))
+    for query_idx in range(len(queries)):
+        start = time.perf_counter()
+        _, labels[query_idx:query_idx + 1] = index.search(queries[query_idx:query_idx + 1], k)
+        latencies[query_idx] = time.perf_counter() - start
+    return labels, latencies
+
+
+def recall_at_k(labels: np.ndarray, ground_truth: np.ndarray) -> float:
+    k = ground_truth.shape[1]
+    return float(np.mean([len(set(row) & set(truth)) / k for row, truth in zip(labels, ground_truth)]))
+
+
+def search_params(factory: str):
+    if "IVF" in factory:
+        return [("nprobe", nprobe) for nprobe in NPROBES]
+    if "HNSW" in factory:
+        return [("efSearch", ef_search) for ef_search in EF_SEARCHES]
+    return [(None, None)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ANN index recall/latency benchmark.")
+    parser.add_argument("--vectors", type=int, default=200000, help="库中的向量数")
+    parser.add_argument("--dim", type=int, default=256, help="向量维数（OpenAI Embedding 为 1536）")
+    parser.add_argument("--clusters", type=int, default=1000, help="合成数据的簇数")
+    parser.add_argument("--queries", type=int, default=500, help="查询数")
+    parser.add_argument("--k", type=int, default=4, help="recall@k 的 k（langchain 检索默认返回 4 条）")
+    parser.add_argument("--specs", type=str, nargs="+", default=list(INDEX_PRESETS),
+                        help="要对比的索引，可以是预设名或 faiss 的 factory 字符串")
+    args = parser.parse_args()
+
+    # 逐条查询的延迟只看单线程
+    faiss.omp_set_num_threads(1)
+    vectors = make_vectors(args.vectors, args.dim, args.clusters)
+    queries = make_queries(vectors, args.queries)
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(vectors)
+    _, ground_truth = exact.search(queries, args.k)
+    flat_bytes = len(faiss.serialize_index(exact))
+    del exact
+
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k}")
+    print(f"{'index':<22} {'param':<14} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8} {'size MiB':>9} "
+          f"{'vs flat':>8} {'build s':>8}")
+    for spec in args.specs:
+        factory = factory_string(spec, args.dim, args.vectors)
+        # 构建（训练）时使用全部线程
+        faiss.omp_set_num_threads(os.cpu_count() or 1)
+        start = time.perf_counter()
+        index = build_index(vectors, spec)
+        build_seconds = time.perf_counter() - start
+        faiss.omp_set_num_threads(1)
+        size = len(faiss.serialize_index(index))
+
+        for name, value in search_params(factory):
+            if name == "nprobe":
+                tune_index(index, nprobe=value)
+            elif name == "efSearch":
+                tune_index(index, ef_search=value)
+            labels, latencies = search_one_by_one(index, queries, args.k)
+            param = f"{name}={value}" if name else "-"
+            print(f"{factory:<22} {param:<14} "
+                  f"{recall_at_k(labels, ground_truth):7.3f} {np.percentile(latencies, 50) * 1000:8.3f} "
+                  f"{np.percentile(latencies, 99) * 1000:8.3f} {size / 1024 / 1024:9.1f} "
+                  f"{size / flat_bytes:8.1%} {build_seconds:8.1f}")
+        del index
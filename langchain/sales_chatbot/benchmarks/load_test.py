@@ -0,0 +1,207 @@
+"""模拟 N 个客户同时与销售机器人对话，统计每轮对话的延迟分布和吞吐量。
+
+大模型与 Embedding 都换成本地的桩实现（固定延迟，不请求任何接口），向量库用 hash Embedding 从销售话术数据临时构建。
+async 模式直接 await sales_chat（含按相关度分路），与 gradio 队列的并发处理方式相同；sync 模式在同样大小的线程池中运行改造前的
+同步调用，--concurrency 1 即 gradio 默认队列下的排队情况。
+用法（在 sales_chatbot 目录下执行）:
+    python benchmarks/load_test.py --customers 50 --turns 5 --llm_latency 1.0
+    python benchmarks/load_test.py --customers 50 --mode sync --concurrency 1
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+from langchain.chat_models.base import BaseChatModel
+from langchain.schema import AIMessage, ChatGeneration, ChatResult
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import sales_chatbot
+from build_vector_store import build, parse_sales_data
+from hash_embeddings import HashEmbeddings
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', "real_estate_sales_data.txt")
+# 同一问题的不同问法，用于命中语义缓存或检索到同一条话术
+_PREFIXES = ("", "请问", "你好，", "我想问一下，")
+_SUFFIXES = ("", "？", "?", "呢？")
+# 向量库中没有的问题，检索不到文档
+_OFF_TOPIC = ("今天天气怎么样", "你们公司有多少员工", "推荐一部电影", "附近有好吃的火锅吗")
+
+
+class StubEmbeddings(HashEmbeddings):
+    """带固定延迟的 hash Embedding，模拟 Embedding 接口的网络往返。"""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+
+class StubChatModel(BaseChatModel):
+    """固定延迟的大模型桩：回答检索到的第一条销售回答，并统计同时进行中的调用数。"""
+
+    latency: float = 1.0
+    calls: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _reply(self, messages) -> ChatResult:
+        prompt = messages[-1].content if messages else ""
+        _, _, answer = prompt.partition("[销售回答]")
+        text = answer.strip().split("\n")[0] or "这个问题我帮您确认一下。"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _enter(self):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            return self._reply(messages)
+        finally:
+            self.in_flight -= 1
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None,
+                         **kwargs: Any) -> ChatResult:
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+            return self._reply(messages)
+        finally:
+            self.in_flight -= 1
+
+
+def make_questions(off_topic_ratio: float) -> Callable[[random.Random], str]:
+    with open(DATA_PATH, "r", encoding="utf-8") as data_file:
+        questions = [question for question, _ in parse_sales_data(data_file.read())]
+
+    def ask(rng: random.Random) -> str:
+        if rng.random() < off_topic_ratio:
+            return rng.choice(_OFF_TOPIC) + rng.choice(_SUFFIXES)
+        question = rng.choice(questions).rstrip("？?")
+        return rng.choice(_PREFIXES) + question + rng.choice(_SUFFIXES)
+    return ask
+
+
+def blocking_chat(message: str) -> str:
+    # 改造前 sales_chat 的同步调用
+    ans = sales_chatbot.SALES_CACHE.lookup(message)
+    if ans is None:
+        ans = sales_chatbot.SALES_BOT({"query": message})
+        sales_chatbot.SALES_CACHE.add(message, ans)
+    return ans["result"]
+
+
+async def customer(customer_id: int, args, ask, handle, latencies: list, errors: list):
+    rng = random.Random(customer_id)
+    history = []
+    for _ in range(args.turns):
+        message = ask(rng)
+        start = time.perf_counter()
+        try:
+            answer = await handle(message, history)
+        except Exception as e:
+            errors.append(repr(e))
+            continue
+        latencies.append(time.perf_counter() - start)
+        history.append([message, answer])
+        if args.think_time:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+
+
+async def run(args, vector_store_dir: str) -> dict:
+    llm = StubChatModel(latency=args.llm_latency)
+    build(DATA_PATH, vector_store_dir, embedding="hash")
+    sales_chatbot.initialize_sales_bot(vector_store_dir, StubEmbeddings(args.embed_latency), llm,
+                                       answer_threshold=args.answer_threshold, score_threshold=args.score_threshold,
+                                       enable_chat=args.enable_chat)
+
+    # 与 gradio 队列一样，最多同时处理 concurrency 个请求，其余排队
+    semaphore = asyncio.Semaphore(args.concurrency)
+    if args.mode == "async":
+        async def handle(message, history):
+            async with semaphore:
+                return await sales_chatbot.sales_chat(message, history)
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.concurrency)
+
+        async def handle(message, history):
+            return await asyncio.get_running_loop().run_in_executor(executor, blocking_chat, message)
+
+    ask = make_questions(args.off_topic)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(customer(customer_id, args, ask, handle, latencies, errors)
+                           for customer_id in range(args.customers)))
+    seconds = time.perf_counter() - start
+    if args.mode == "sync":
+        executor.shutdown()
+
+    latencies = np.array(latencies or [0.0]) * 1000
+    return {
+        "mode": args.mode, "customers": args.customers, "concurrency": args.concurrency,
+        "chats": len(latencies), "errors": len(errors), "seconds": round(seconds, 2),
+        "chats_per_second": round(len(latencies) / seconds, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+        "max_ms": round(float(latencies.max()), 1),
+        "llm_calls": llm.calls, "max_llm_in_flight": llm.max_in_flight,
+        "cache": sales_chatbot.SALES_CACHE.stats(),
+        "routes": sales_chatbot.ROUTE_STATS.stats(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent customer load test for the sales chatbot.")
+    parser.add_argument("--customers", type=int, default=50, help="同时对话的客户数")
+    parser.add_argument("--turns", type=int, default=5, help="每个客户的对话轮数")
+    parser.add_argument("--concurrency", type=int, default=sales_chatbot.DEFAULT_CONCURRENCY,
+                        help="同时处理的对话数（对应 sales_chatbot.py --concurrency）")
+    parser.add_argument("--mode", type=str, default="async", choices=["async", "sync"],
+                        help="async 为 await sales_chat，sync 为改造前的同步调用")
+    parser.add_argument("--llm_latency", type=float, default=1.0, help="桩大模型每次调用的延迟（秒）")
+    parser.add_argument("--embed_latency", type=float, default=0.05, help="桩 Embedding 每次调用的延迟（秒）")
+    parser.add_argument("--think_time", type=float, default=0.5, help="客户两轮对话之间的平均间隔（秒）")
+    parser.add_argument("--off_topic", type=float, default=0.1, help="与房产无关的问题所占比例")
+    parser.add_argument("--answer_threshold", type=float, default=sales_chatbot.DEFAULT_ANSWER_THRESHOLD,
+                        help="问题相似度不低于该值时直接返回销售回答（对应 sales_chatbot.py --answer_threshold）")
+    # hash Embedding 下问题与整条问答对的相关度普遍在 0.3 以下，默认阈值远低于 OpenAI Embedding 的 0.8
+    parser.add_argument("--score_threshold", type=float, default=0.1,
+                        help="相关度低于该值的话术视为没有检索到（对应 sales_chatbot.py --score_threshold）")
+    parser.add_argument("--enable_chat", action=argparse.BooleanOptionalAction, default=True,
+                        help="检索不到话术时由大模型回答，--no-enable_chat 时使用兜底回复")
+    parser.add_argument("--log_level", type=str, default="WARNING", help="sales_chatbot 的日志级别")
+    args = parser.parse_args()
+    if args.customers < 1 or args.turns < 1 or args.concurrency < 1:
+        raise ValueError("--customers, --turns and --concurrency must be positive")
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    # hash Embedding 换算出的相关度可能为负、无关问题检索不到文档，langchain 会逐次警告
+    warnings.filterwarnings("ignore", category=UserWarning, module="langchain.vectorstores.base")
+    # 向量库以内存映射方式加载，压测结束前保留临时目录
+    with tempfile.TemporaryDirectory() as vector_store_dir:
+        print(f"[load_test]{asyncio.run(run(args, vector_store_dir))}")
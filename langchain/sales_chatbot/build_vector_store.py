@@ -0,0 +1,205 @@
+"""从销售话术数据构建 FAISS 向量数据库，供 sales_chatbot.py 的 initialize_sales_bot 加载。
+
+数据格式与 real_estate_sales_data.txt 相同：
+    1.
+    [客户问题] 这个小区交通便利吗？
+    [销售回答] 当然了，……
+
+每条问答对以内容哈希作为文档 id。已有向量库时只向量化新增或修改过的问答对并追加到索引中，
+数据中已删除（或被修改）的旧问答对从索引和 docstore 中移除，不必整体重建。
+指定 --index_spec 时另外训练一份近似最近邻索引（见 index_factory.py），sales_chatbot.py 加载时优先使用。
+用法（在 sales_chatbot 目录下执行）:
+    python build_vector_store.py --data real_estate_sales_data.txt --vector_store_dir real_estates_sale
+    python build_vector_store.py --embedding hash --vector_store_dir /tmp/real_estates_sale   # 离线测试
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from typing import List, Tuple
+
+import numpy as np
+from langchain.vectorstores import FAISS
+
+from index_factory import ANN_INDEX_FILE, BUILD_INFO_FILE, DEFAULT_EF_SEARCH, DEFAULT_NPROBE, save_ann_index
+
+DEFAULT_BATCH_SIZE = 1000
+
+_NUMBER_LINE = re.compile(r"^\d+\.\s*$")
+_QUESTION = "[客户问题]"
+_ANSWER = "[销售回答]"
+
+
+def parse_sales_data(text: str) -> List[Tuple[str, str]]:
+    """解析编号的 [客户问题]/[销售回答] 问答对，回答可以跨多行，缺少问题或回答的条目会被跳过。"""
+    pairs = []
+    question, answer, field = None, None, None
+
+    def flush():
+        if question and answer:
+            pairs.append((question.strip(), answer.strip()))
+        elif question or answer:
+            print(f"[skip]缺少问题或回答: {question or answer}")
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if _NUMBER_LINE.match(stripped):
+            flush()
+            question, answer, field = None, None, None
+        elif stripped.startswith(_QUESTION):
+            if question is not None:
+                # 没有编号的相邻问答对
+                flush()
+                answer = None
+            question, field = stripped[len(_QUESTION):].strip(), "question"
+        elif stripped.startswith(_ANSWER):
+            answer, field = stripped[len(_ANSWER):].strip(), "answer"
+        elif stripped and field == "question":
+            question += "\n" + stripped
+        elif stripped and field == "answer":
+            answer += "\n" + stripped
+    flush()
+    return pairs
+
+
+def make_page_content(question: str, answer: str) -> str:
+    # 与 sales.ipynb 中切分出的文档格式一致，检索结果可以按 "[销售回答] " 取出回答
+    return f"{_QUESTION} {question}\n{_ANSWER} {answer}"
+
+
+def content_hash(page_content: str) -> str:
+    return hashlib.sha256(page_content.encode("utf-8")).hexdigest()
+
+
+def make_embeddings(name: str, batch_size: int):
+    if name == "hash":
+        from hash_embeddings import HashEmbeddings
+        return HashEmbeddings()
+    from langchain.embeddings.openai import OpenAIEmbeddings
+    # chunk_size 为每次 Embedding 请求的文本条数
+    return OpenAIEmbeddings(chunk_size=batch_size)
+
+
+def embedding_signature(name: str, embeddings) -> str:
+    if name == "hash":
+        return f"hash:{embeddings.dimension}"
+    return f"openai:{embeddings.model}"
+
+
+def load_build_info(vector_store_dir: str) -> dict:
+    # 记录构建向量库所用的 Embedding 与近似索引的参数
+    info_path = os.path.join(vector_store_dir, BUILD_INFO_FILE)
+    if not os.path.exists(info_path):
+        return {}
+    with open(info_path, "r", encoding="utf-8") as info_file:
+        return json.load(info_file)
+
+
+def load_vector_store(vector_store_dir: str, embeddings, signature: str, info: dict):
+    if not os.path.exists(os.path.join(vector_store_dir, "index.faiss")):
+        return None
+    if not info:
+        print(f"[rebuild]未找到 {BUILD_INFO_FILE}，无法确认已有向量所用的 Embedding，整体重建")
+        return None
+    # 换了 Embedding 时旧向量不可复用
+    if info.get("embedding") != signature:
+        print(f"[rebuild]Embedding 从 {info.get('embedding')} 变为 {signature}，整体重建")
+        return None
+    return FAISS.load_local(vector_store_dir, embeddings)
+
+
+def delete_documents(db, ids: List[str]):
+    """从索引和 docstore 中删除文档（旧版本 langchain 的 FAISS 没有 delete 方法）。"""
+    ids = set(ids)
+    positions = [position for position, doc_id in db.index_to_docstore_id.items() if doc_id in ids]
+    db.index.remove_ids(np.array(positions, dtype=np.int64))
+    # remove_ids 之后其余向量依次前移，重新编排位置到文档 id 的映射
+    remaining = [doc_id for _, doc_id in sorted(db.index_to_docstore_id.items()) if doc_id not in ids]
+    db.index_to_docstore_id = dict(enumerate(remaining))
+    for doc_id in ids:
+        db.docstore._dict.pop(doc_id, None)
+
+
+def build(data_path: str, vector_store_dir: str, embedding: str = "openai", batch_size: int = DEFAULT_BATCH_SIZE,
+          rebuild: bool = False, index_spec: str = "flat", nprobe: int = DEFAULT_NPROBE,
+          ef_search: int = DEFAULT_EF_SEARCH) -> dict:
+    with open(data_path, "r", encoding="utf-8") as data_file:
+        pairs = parse_sales_data(data_file.read())
+    # 按内容哈希去重，重复的问答对只保留一条
+    documents = {}
+    for question, answer in pairs:
+        page_content = make_page_content(question, answer)
+        documents.setdefault(content_hash(page_content), (page_content, question))
+
+    embeddings = make_embeddings(embedding, batch_size)
+    signature = embedding_signature(embedding, embeddings)
+    info = load_build_info(vector_store_dir)
+    db = None if rebuild else load_vector_store(vector_store_dir, embeddings, signature, info)
+    existing = set(db.index_to_docstore_id.values()) if db is not None else set()
+
+    new_ids = [doc_id for doc_id in documents if doc_id not in existing]
+    stale_ids = [doc_id for doc_id in existing if doc_id not in documents]
+    stats = {"entries": len(pairs), "unique": len(documents), "unchanged": len(existing) - len(stale_ids),
+             "added": len(new_ids), "removed": len(stale_ids), "embed_seconds": 0.0}
+
+    if stale_ids:
+        delete_documents(db, stale_ids)
+    if new_ids:
+        texts = [documents[doc_id][0] for doc_id in new_ids]
+        metadatas = [{"question": documents[doc_id][1], "content_hash": doc_id} for doc_id in new_ids]
+        start = time.perf_counter()
+        vectors = embeddings.embed_documents(texts)
+        stats["embed_seconds"] = round(time.perf_counter() - start, 3)
+        if db is None:
+            db = FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, metadatas=metadatas, ids=new_ids)
+        else:
+            db.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=new_ids)
+
+    if db is None:
+        raise ValueError(f"No sales Q&A pairs found in {data_path}")
+    changed = bool(new_ids or stale_ids or rebuild) or info.get("embedding") != signature
+    if changed:
+        db.save_local(vector_store_dir)
+
+    # index.faiss 始终是精确的 Flat 索引，用于增量更新；检索用的近似索引每次从中重新训练
+    ann_path = os.path.join(vector_store_dir, ANN_INDEX_FILE)
+    factory = "Flat"
+    if index_spec == "flat":
+        if os.path.exists(ann_path):
+            os.remove(ann_path)
+    elif changed or info.get("index_spec") != index_spec or not os.path.exists(ann_path):
+        start = time.perf_counter()
+        factory = save_ann_index(db, vector_store_dir, index_spec)
+        stats["index_seconds"] = round(time.perf_counter() - start, 3)
+    else:
+        factory = info.get("index_factory", factory)
+    stats["index_factory"] = factory
+
+    new_info = {"embedding": signature, "documents": len(documents), "index_spec": index_spec,
+                "index_factory": factory, "nprobe": nprobe, "ef_search": ef_search}
+    if new_info != info:
+        with open(os.path.join(vector_store_dir, BUILD_INFO_FILE), "w", encoding="utf-8") as info_file:
+            json.dump(new_info, info_file)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the sales Q&A FAISS vector store.")
+    parser.add_argument("--data", type=str, default="real_estate_sales_data.txt", help="销售话术数据文件")
+    parser.add_argument("--vector_store_dir", type=str, default="real_estates_sale", help="向量数据库目录")
+    parser.add_argument("--embedding", type=str, default="openai", choices=["openai", "hash"],
+                        help="openai 为 OpenAIEmbeddings，hash 为本地确定性 Embedding（测试用）")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE, help="每次 Embedding 请求的文本条数")
+    parser.add_argument("--rebuild", action="store_true", help="忽略已有的向量库，整体重建")
+    parser.add_argument("--index_spec", type=str, default="flat",
+                        help="检索用的索引：flat、ivf_flat、ivf_sq8、ivf_pq、hnsw、hnsw_sq8 或 faiss 的 factory 字符串")
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE, help="IVF 索引每次检索的簇数")
+    parser.add_argument("--ef_search", type=int, default=DEFAULT_EF_SEARCH, help="HNSW 索引检索时的候选队列长度")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = build(args.data, args.vector_store_dir, args.embedding, args.batch_size, args.rebuild,
+                   args.index_spec, args.nprobe, args.ef_search)
+    print(f"[build]{result}，耗时 {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,33 @@
+import hashlib
+from typing import List
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+DEFAULT_DIMENSION = 256
+
+
+class HashEmbeddings(Embeddings):
+    """本地的确定性 Embedding，用于测试和离线构建：把文本的字符 1-gram、2-gram 哈希到固定维数后归一化。
+
+    不请求任何接口，同一文本总是得到同一个向量；字面上相近的问题向量也相近，足以验证检索流程，但没有语义理解能力。
+    """
+
+    def __init__(self, dimension: int = DEFAULT_DIMENSION):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        grams = list(text) + [text[i:i + 2] for i in range(len(text) - 1)]
+        for gram in grams:
+            digest = hashlib.md5(gram.encode("utf-8")).digest()
+            # 前 4 字节决定维度，第 5 字节决定符号，减少哈希冲突带来的偏差
+            vector[int.from_bytes(digest[:4], "little") % self.dimension] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,159 @@
+"""FAISS 近似最近邻索引的工厂：按预设或 faiss 的 factory 字符串创建索引，在已有向量上训练，调整 nprobe/efSearch，
+并以内存映射方式加载，替代默认的暴力检索 IndexFlatL2。
+
+预设（n 为向量数，d 为向量维数）：
+    flat      精确检索，d * 4 字节/向量
+    ivf_flat  IVF 倒排，每次只搜索 nprobe 个簇，向量不压缩
+    ivf_sq8   IVF + 8 bit 标量量化，d 字节/向量
+    ivf_pq    IVF + 乘积量化，d / 16 字节/向量（1536 维为 96 字节，是 Flat 的 1/64）
+    hnsw      HNSW 图索引，无需训练，可以从空索引开始逐条添加
+    hnsw_sq8  HNSW + 8 bit 标量量化
+其他字符串原样交给 faiss.index_factory，如 "OPQ64,IVF4096,PQ64"。
+"""
+import json
+import logging
+import math
+import os
+import pickle
+from typing import Optional
+
+import faiss
+import numpy as np
+from langchain.vectorstores import FAISS
+
+logger = logging.getLogger(__name__)
+
+INDEX_PRESETS = ("flat", "ivf_flat", "ivf_sq8", "ivf_pq", "hnsw", "hnsw_sq8")
+# k-means 每个簇至少需要的训练向量数，低于该值 faiss 会给出警告，聚类质量也明显下降
+MIN_POINTS_PER_CENTROID = 39
+# PQ 每个子空间 256 个码字（8 bit）
+PQ_CENTROIDS = 256
+# 训练最多使用的向量数，faiss 内部也只会用每个簇 256 个点
+MAX_TRAINING_POINTS_PER_CENTROID = 256
+HNSW_M = 32
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+
+# 与 langchain 的 index.faiss 放在同一目录，向量顺序相同，共用 index.pkl 中的 docstore
+ANN_INDEX_FILE = "ann.faiss"
+BUILD_INFO_FILE = "build_info.json"
+
+
+def factory_string(spec: str, dimension: int, n_vectors: int = 0) -> str:
+    """把预设名换算为 faiss 的 factory 字符串；向量数不足以训练时退回 Flat。"""
+    if spec not in INDEX_PRESETS:
+        return spec
+    if spec == "flat":
+        return "Flat"
+    if spec == "hnsw":
+        return f"HNSW{HNSW_M}"
+    if spec == "hnsw_sq8":
+        return f"HNSW{HNSW_M},SQ8"
+
+    # 簇数取 4 * sqrt(n)，同时保证每个簇有足够的训练向量
+    nlist = min(int(4 * math.sqrt(n_vectors)), n_vectors // MIN_POINTS_PER_CENTROID)
+    if spec == "ivf_pq" and n_vectors < PQ_CENTROIDS * MIN_POINTS_PER_CENTROID:
+        nlist = 0
+    if nlist < 1:
+        logger.warning(f"{n_vectors} 个向量不足以训练 {spec}，改用 Flat")
+        return "Flat"
+    if spec == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    if spec == "ivf_sq8":
+        return f"IVF{nlist},SQ8"
+    # 每个子空间 16 维；维数不能整除时取最接近的约数
+    m = max((divisor for divisor in range(1, dimension // 16 + 1) if dimension % divisor == 0), default=1)
+    return f"IVF{nlist},PQ{m}"
+
+
+def make_index(spec: str, dimension: int, n_vectors: int = 0):
+    # 与 langchain FAISS 默认的 IndexFlatL2 一致使用 L2 距离，score_threshold 的含义不变
+    return faiss.index_factory(dimension, factory_string(spec, dimension, n_vectors), faiss.METRIC_L2)
+
+
+def build_index(vectors: np.ndarray, spec: str):
+    """在 vectors 上训练并添加全部向量，向量在索引中的位置与 vectors 的行号一致。"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dimension = vectors.shape
+    index = make_index(spec, dimension, n_vectors)
+    if not index.is_trained:
+        ivf = _find_ivf(index)
+        max_points = max(ivf.nlist if ivf is not None else 1, PQ_CENTROIDS) * MAX_TRAINING_POINTS_PER_CENTROID
+        training = vectors
+        if n_vectors > max_points:
+            rng = np.random.default_rng(0)
+            training = vectors[np.sort(rng.choice(n_vectors, max_points, replace=False))]
+        index.train(training)
+    index.add(vectors)
+    return index
+
+
+def tune_index(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """设置检索参数：IVF 的 nprobe（搜索的簇数）、HNSW 的 efSearch（候选队列长度），越大召回越高、越慢。"""
+    params = faiss.ParameterSpace()
+    if nprobe and _find_ivf(index) is not None:
+        params.set_index_parameter(index, "nprobe", nprobe)
+    if ef_search and _find_hnsw(index) is not None:
+        params.set_index_parameter(index, "efSearch", ef_search)
+    return index
+
+
+def _find_ivf(index):
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
+
+
+def _find_hnsw(index):
+    index = faiss.downcast_index(index)
+    return index if isinstance(index, faiss.IndexHNSW) else None
+
+
+def reconstruct_vectors(index) -> np.ndarray:
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def read_index(path: str, mmap: bool = True):
+    if mmap:
+        try:
+            # 以内存映射方式打开，向量数据按需从磁盘换入，多个进程共享同一份页缓存
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            logger.warning(f"{path} 不支持内存映射加载，改为读入内存: {e}")
+    return faiss.read_index(path)
+
+
+def save_ann_index(db: FAISS, folder_path: str, spec: str) -> str:
+    """按 spec 用向量库中已有的向量训练并写出近似索引，返回实际使用的 factory 字符串。"""
+    index = build_index(reconstruct_vectors(db.index), spec)
+    faiss.write_index(index, os.path.join(folder_path, ANN_INDEX_FILE))
+    return factory_string(spec, db.index.d, db.index.ntotal)
+
+
+def load_vector_store(folder_path: str, embeddings, mmap: bool = True, nprobe: Optional[int] = None,
+                      ef_search: Optional[int] = None, use_ann: bool = True) -> FAISS:
+    """加载向量库：目录中有与 docstore 一致的近似索引时优先使用，否则使用精确的 index.faiss。
+
+    未指定 nprobe/efSearch 时使用构建时记录在 build_info.json 中的值。
+    """
+    with open(os.path.join(folder_path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    info = {}
+    info_path = os.path.join(folder_path, BUILD_INFO_FILE)
+    if os.path.exists(info_path):
+        with open(info_path, "r", encoding="utf-8") as info_file:
+            info = json.load(info_file)
+
+    index = None
+    ann_path = os.path.join(folder_path, ANN_INDEX_FILE)
+    if use_ann and os.path.exists(ann_path):
+        index = read_index(ann_path, mmap)
+        if index.ntotal != len(index_to_docstore_id):
+            logger.warning(f"{ann_path} 与 docstore 不一致（{index.ntotal} != {len(index_to_docstore_id)}），改用精确检索")
+            index = None
+    if index is None:
+        index = read_index(os.path.join(folder_path, "index.faiss"), mmap)
+    tune_index(index, nprobe or info.get("nprobe", DEFAULT_NPROBE),
+               ef_search or info.get("ef_search", DEFAULT_EF_SEARCH))
+    return FAISS(embeddings.embed_query, index, docstore, index_to_docstore_id)
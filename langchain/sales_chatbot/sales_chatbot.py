@@ -1,47 +1,100 @@
-import gradio as gr
-import random
+import argparse
+import json
+import logging
 import time
-
-from typing import List
+import uuid
 
 from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.vectorstores import FAISS
 from langchain.chains import RetrievalQA
 from langchain.chat_models import ChatOpenAI
 
+from index_factory import load_vector_store
+from sales_router import (DEFAULT_ANSWER_THRESHOLD, DEFAULT_FALLBACK_REPLY, DEFAULT_SCORE_THRESHOLD,
+                          GENERATED_ROUTES, ROUTE_CACHE, RouteStats, SalesRouter)
+from semantic_cache import MemoizedEmbeddings, SemanticCache
+
+LOG = logging.getLogger("sales_chatbot")
+
+# gradio 队列中同时处理的对话数；sales_chat 是协程，等待 Embedding/大模型接口时不占用事件循环
+DEFAULT_CONCURRENCY = 32
+# 排队等待的请求上限，超过后新请求直接被拒绝，而不是无限排队
+DEFAULT_MAX_QUEUE_SIZE = 256
+# 每处理这么多轮对话输出一次各路径的轮数与延迟
+ROUTE_STATS_EVERY = 100
+
+ROUTE_STATS = RouteStats()
+
+
+def log_event(event: str, level: int = logging.INFO, **fields):
+    # 每条日志是一行 JSON，便于按字段检索和统计
+    if LOG.isEnabledFor(level):
+        LOG.log(level, json.dumps({"event": event, **fields}, ensure_ascii=False))
+
+
+def initialize_sales_bot(vector_store_dir: str="real_estates_sale", embeddings=None, llm=None,
+                         answer_threshold: float = DEFAULT_ANSWER_THRESHOLD,
+                         score_threshold: float = DEFAULT_SCORE_THRESHOLD, enable_chat: bool = True,
+                         fallback_reply: str = DEFAULT_FALLBACK_REPLY):
+    # 语义缓存与向量库共用同一个 Embedding，缓存未命中时检索器直接复用问题的向量
+    embeddings = MemoizedEmbeddings(embeddings or OpenAIEmbeddings())
+    # build_vector_store.py --index_spec 生成了近似索引时优先使用，以内存映射方式加载
+    db = load_vector_store(vector_store_dir, embeddings)
+    llm = llm or ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0)
 
-def initialize_sales_bot(vector_store_dir: str="real_estates_sale"):
-    db = FAISS.load_local(vector_store_dir, OpenAIEmbeddings())
-    llm = ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0)
-    
-    global SALES_BOT    
+    # RetrievalQA 不保存对话状态，所有会话共用同一个实例
+    global SALES_BOT
     SALES_BOT = RetrievalQA.from_chain_type(llm,
                                            retriever=db.as_retriever(search_type="similarity_score_threshold",
-                                                                     search_kwargs={"score_threshold": 0.8}))
+                                                                     search_kwargs={"score_threshold": score_threshold}))
     # 返回向量数据库的检索结果
     SALES_BOT.return_source_documents = True
 
+    # sales_chat 先检索，再按相关度决定直接回答、交给大模型整合还是使用兜底话术
+    global SALES_ROUTER
+    SALES_ROUTER = SalesRouter(db, embeddings, SALES_BOT.combine_documents_chain, answer_threshold,
+                               score_threshold, enable_chat, fallback_reply)
+
+    # 客户反复问的相同或相近问题直接返回缓存的回答
+    global SALES_CACHE
+    SALES_CACHE = SemanticCache(embeddings)
+
     return SALES_BOT
 
-def sales_chat(message, history):
-    print(f"[message]{message}")
-    print(f"[history]{history}")
-    # TODO: 从命令行参数中获取
-    enable_chat = True
-
-    ans = SALES_BOT({"query": message})
-    # 如果检索出结果，或者开了大模型聊天模式
-    # 返回 RetrievalQA combine_documents_chain 整合的结果
-    if ans["source_documents"] or enable_chat:
-        print(f"[result]{ans['result']}")
-        print(f"[source_documents]{ans['source_documents']}")
-        return ans["result"]
-    # 否则输出套路话术
-    else:
-        return "这个问题我要问问领导"
-    
-
-def launch_gradio():
+async def sales_chat(message, history):
+    turn_id = uuid.uuid4().hex[:12]
+    start = time.perf_counter()
+    ans = await SALES_CACHE.alookup(message)
+    route = ROUTE_CACHE
+    if ans is None:
+        try:
+            # 异步检索与异步调用大模型，等待期间事件循环继续处理其他客户的对话
+            ans = await SALES_ROUTER.aroute(message)
+        except Exception as e:
+            log_event("chat_error", logging.ERROR, turn_id=turn_id, error=repr(e),
+                      latency_ms=round((time.perf_counter() - start) * 1000, 1))
+            raise
+        route = ans["route"]
+        # 直接回答和兜底话术本身就很快，只缓存大模型生成的回答
+        if route in GENERATED_ROUTES:
+            await SALES_CACHE.aadd(message, ans)
+
+    seconds = time.perf_counter() - start
+    turns = ROUTE_STATS.record(route, seconds)
+    # 只记录长度、条数等元数据，不再输出完整的对话历史和检索到的文档
+    log_event("chat", turn_id=turn_id, route=route, top_score=ans["top_score"],
+              question_similarity=ans["question_similarity"], history_turns=len(history), message_chars=len(message),
+              source_documents=len(ans["source_documents"]), answer_chars=len(ans["result"]),
+              latency_ms=round(seconds * 1000, 1))
+    log_event("chat_sources", logging.DEBUG, turn_id=turn_id,
+              sources=[doc.metadata.get("question", doc.page_content[:40]) for doc in ans["source_documents"]])
+    if turns % ROUTE_STATS_EVERY == 0:
+        log_event("route_stats", **ROUTE_STATS.stats())
+    return ans["result"]
+
+
+def launch_gradio(concurrency: int = DEFAULT_CONCURRENCY, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE):
+    import gradio as gr
+
     demo = gr.ChatInterface(
         fn=sales_chat,
         title="房产销售",
@@ -50,10 +103,33 @@ def launch_gradio():
         chatbot=gr.Chatbot(height=600),
     )
 
+    # 默认队列一次只处理一个请求，所有客户排在前一个客户的大模型调用之后
+    demo.queue(concurrency_count=concurrency, max_size=max_queue_size)
+    log_event("launch", concurrency=concurrency, max_queue_size=max_queue_size)
     demo.launch(share=True, server_name="0.0.0.0")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Real estate sales chatbot.")
+    parser.add_argument("--vector_store_dir", type=str, default="real_estates_sale", help="向量数据库目录")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="同时处理的对话数")
+    parser.add_argument("--max_queue_size", type=int, default=DEFAULT_MAX_QUEUE_SIZE, help="排队等待的请求上限")
+    # 默认与改造前一样开启大模型聊天，--no-enable_chat 时检索不到话术返回兜底回复
+    parser.add_argument("--enable_chat", action=argparse.BooleanOptionalAction, default=True,
+                        help="检索不到相关话术时由大模型直接回答，关闭时使用 --fallback_reply")
+    parser.add_argument("--fallback_reply", type=str, default=DEFAULT_FALLBACK_REPLY, help="检索不到相关话术时的兜底回复")
+    parser.add_argument("--answer_threshold", type=float, default=DEFAULT_ANSWER_THRESHOLD,
+                        help="问题与话术中的客户问题相似度不低于该值时直接返回销售回答，不调用大模型")
+    parser.add_argument("--score_threshold", type=float, default=DEFAULT_SCORE_THRESHOLD,
+                        help="相关度低于该值的话术视为没有检索到")
+    parser.add_argument("--log_level", type=str, default="INFO", help="日志级别，DEBUG 时记录检索到的文档")
+    args = parser.parse_args()
+    if args.concurrency < 1 or args.max_queue_size < 1:
+        raise ValueError("--concurrency and --max_queue_size must be positive")
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s %(message)s")
     # 初始化房产销售机器人
-    initialize_sales_bot()
+    initialize_sales_bot(args.vector_store_dir, answer_threshold=args.answer_threshold,
+                         score_threshold=args.score_threshold, enable_chat=args.enable_chat,
+                         fallback_reply=args.fallback_reply)
     # 启动 Gradio 服务
-    launch_gradio()
+    launch_gradio(args.concurrency, args.max_queue_size)
@@ -0,0 +1,139 @@
+import threading
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+
+from semantic_cache import aembed_query
+
+# 客户的问题与检索到的第一条话术中的 [客户问题] 余弦相似度不低于该值时，直接返回其中的销售回答，不调用大模型。
+# 文档向量包含问题和回答，与单独一个问题的相关度偏低，不适合用来判断是否为同一个问题
+DEFAULT_ANSWER_THRESHOLD = 0.95
+# 相关度低于该值的文档视为没有检索到（与原先 RetrievalQA 检索器的 score_threshold 相同）
+DEFAULT_SCORE_THRESHOLD = 0.8
+DEFAULT_FALLBACK_REPLY = "这个问题我要问问领导"
+DEFAULT_TOP_K = 4
+
+ROUTE_CACHE = "cache"
+ROUTE_ANSWER = "answer"
+ROUTE_LLM = "llm"
+ROUTE_CHAT = "chat"
+ROUTE_FALLBACK = "fallback"
+# 调用了大模型的路径，结果值得写入语义缓存
+GENERATED_ROUTES = (ROUTE_LLM, ROUTE_CHAT)
+
+_QUESTION = "[客户问题]"
+_ANSWER = "[销售回答]"
+
+
+def extract_answer(page_content: str) -> Optional[str]:
+    """取出话术文档中 [销售回答] 之后的内容，文档不是问答对格式时返回 None。"""
+    _, found, answer = page_content.partition(_ANSWER)
+    answer = answer.strip()
+    return answer if found and answer else None
+
+
+def extract_question(doc: Document) -> Optional[str]:
+    # build_vector_store.py 构建的文档在 metadata 中记录了问题，sales.ipynb 切分的文档只能从正文中取
+    question = doc.metadata.get("question")
+    if question:
+        return question
+    before, found, _ = doc.page_content.partition(_ANSWER)
+    _, found_question, question = before.partition(_QUESTION)
+    question = question.strip()
+    return question if found and found_question and question else None
+
+
+class SalesRouter:
+    """按检索结果分三路回答：
+
+    - 客户的问题与第一条话术的问题相似度不低于 answer_threshold：直接返回话术中的销售回答；
+    - 有相关度不低于 score_threshold 的话术：大模型根据检索到的话术组织回答；
+    - 没有相关的话术：开启 enable_chat 时由大模型直接回答，否则返回 fallback_reply。
+    """
+
+    def __init__(self, db, embeddings: Embeddings, combine_documents_chain,
+                 answer_threshold: float = DEFAULT_ANSWER_THRESHOLD, score_threshold: float = DEFAULT_SCORE_THRESHOLD,
+                 enable_chat: bool = True, fallback_reply: str = DEFAULT_FALLBACK_REPLY, k: int = DEFAULT_TOP_K):
+        if not 0 < answer_threshold <= 1:
+            raise ValueError(f"answer_threshold must be in (0, 1], got {answer_threshold}")
+        self.db = db
+        # 与向量库相同的 Embedding；使用 MemoizedEmbeddings 时客户的问题和常被命中的话术问题都不会重复请求接口
+        self.embeddings = embeddings
+        self.combine_documents_chain = combine_documents_chain
+        self.answer_threshold = answer_threshold
+        self.score_threshold = score_threshold
+        self.enable_chat = enable_chat
+        self.fallback_reply = fallback_reply
+        self.k = k
+
+    async def aroute(self, query: str) -> dict:
+        """返回 {"result", "source_documents", "route", "top_score", "question_similarity"}，
+        result 与 source_documents 同 RetrievalQA 的输出，top_score 为第一条话术的相关度。"""
+        docs_and_scores = await self.db.asimilarity_search_with_relevance_scores(query, k=self.k)
+        docs = [doc for doc, score in docs_and_scores if score >= self.score_threshold]
+        scores = {"top_score": None, "question_similarity": None}
+
+        if docs_and_scores:
+            top_doc, top_score = docs_and_scores[0]
+            scores["top_score"] = round(float(top_score), 4)
+            answer, question = extract_answer(top_doc.page_content), extract_question(top_doc)
+            if answer is not None and question is not None:
+                similarity = await self._similarity(query, question)
+                scores["question_similarity"] = round(similarity, 4)
+                if similarity >= self.answer_threshold:
+                    return self._result(answer, [top_doc], ROUTE_ANSWER, scores)
+        if docs:
+            return self._result(await self._synthesize(query, docs), docs, ROUTE_LLM, scores)
+        if self.enable_chat:
+            # 与原先 RetrievalQA 检索不到文档时一样，以空的上下文交给大模型
+            return self._result(await self._synthesize(query, []), [], ROUTE_CHAT, scores)
+        return self._result(self.fallback_reply, [], ROUTE_FALLBACK, scores)
+
+    async def _similarity(self, query: str, question: str) -> float:
+        vectors = [np.asarray(await aembed_query(self.embeddings, text), dtype=np.float32) for text in (query, question)]
+        norms = np.linalg.norm(vectors[0]) * np.linalg.norm(vectors[1])
+        return float(vectors[0] @ vectors[1] / norms) if norms else 0.0
+
+    async def _synthesize(self, query: str, docs: List[Document]) -> str:
+        return await self.combine_documents_chain.arun(input_documents=docs, question=query)
+
+    @staticmethod
+    def _result(result: str, docs: List[Document], route: str, scores: dict) -> dict:
+        return {"result": result, "source_documents": docs, "route": route, **scores}
+
+
+class RouteStats:
+    """按路径统计对话轮数与最近 window 轮的延迟分位数。"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.total = 0
+        self._counts = {}
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, seconds: float) -> int:
+        """记录一轮对话，返回累计轮数。"""
+        with self._lock:
+            self.total += 1
+            self._counts[route] = self._counts.get(route, 0) + 1
+            self._latencies.setdefault(route, deque(maxlen=self.window)).append(seconds * 1000)
+            return self.total
+
+    def stats(self) -> dict:
+        with self._lock:
+            routes = {}
+            for route, count in self._counts.items():
+                latencies = np.array(self._latencies[route])
+                routes[route] = {
+                    "count": count,
+                    "share": round(count / self.total, 3),
+                    "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+                    "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+                }
+            generated = sum(self._counts.get(route, 0) for route in GENERATED_ROUTES)
+            return {"turns": self.total, "generation_free": round(1 - generated / self.total, 3) if self.total else 0.0,
+                    "routes": routes}
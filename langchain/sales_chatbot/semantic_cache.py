@@ -0,0 +1,218 @@
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+# 两个问题向量的余弦相似度不低于该值时视为同一个问题（OpenAI Embedding 中无关问题的相似度也常在 0.8 左右）
+DEFAULT_SCORE_THRESHOLD = 0.95
+DEFAULT_MAX_ENTRIES = 1000
+# 缓存的回答在 1 天后过期，房源信息更新后不会一直答旧内容
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+# 比较问题文本时忽略空白和结尾的标点，"交通便利吗？" 与 "交通便利吗" 直接命中
+_SPACES = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[?？!！。.,，~～]+$")
+
+
+async def aembed_query(embeddings: Embeddings, text: str) -> List[float]:
+    """异步向量化问题；Embedding 没有实现异步接口时放到线程池中执行，不阻塞事件循环。"""
+    try:
+        return await embeddings.aembed_query(text)
+    except NotImplementedError:
+        return await asyncio.get_running_loop().run_in_executor(None, embeddings.embed_query, text)
+
+
+class MemoizedEmbeddings(Embeddings):
+    """记住最近查询的向量：语义缓存未命中时，检索器对同一个问题不再重复请求 Embedding 接口。
+
+    同步与异步接口共用同一份记录，aembed_query 算过的向量，检索器在线程池中调用 embed_query 时直接命中。
+    """
+
+    def __init__(self, embeddings: Embeddings, max_queries: int = 256):
+        self.embeddings = embeddings
+        self.max_queries = max_queries
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, text: str) -> Optional[tuple]:
+        with self._lock:
+            vector = self._vectors.get(text)
+            if vector is not None:
+                self._vectors.move_to_end(text)
+            return vector
+
+    def _put(self, text: str, vector: tuple):
+        with self._lock:
+            self._vectors[text] = vector
+            self._vectors.move_to_end(text)
+            while len(self._vectors) > self.max_queries:
+                self._vectors.popitem(last=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self._get(text)
+        if vector is None:
+            vector = tuple(self.embeddings.embed_query(text))
+            self._put(text, vector)
+        return list(vector)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        try:
+            return await self.embeddings.aembed_documents(texts)
+        except NotImplementedError:
+            return await asyncio.get_running_loop().run_in_executor(None, self.embeddings.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = self._get(text)
+        if vector is None:
+            vector = tuple(await aembed_query(self.embeddings, text))
+            self._put(text, vector)
+        return list(vector)
+
+
+class CachedAnswer:
+    __slots__ = ("query", "answer", "created", "slot")
+
+    def __init__(self, query: str, answer: dict, slot: int):
+        self.query = query
+        self.answer = answer
+        self.created = time.monotonic()
+        self.slot = slot
+
+
+class SemanticCache:
+    """RetrievalQA 之前的语义缓存：把客户的问题向量化，在缓存自己的小向量索引中查找相近的历史问题，
+    相似度超过阈值时直接返回当时的回答和检索到的文档，不再检索向量库、也不调用大模型。
+
+    文本完全相同（忽略空白与结尾标点）的问题连 Embedding 都不请求。按 TTL 过期，满了按 LRU 淘汰。
+    """
+
+    def __init__(self, embeddings: Embeddings, score_threshold: float = DEFAULT_SCORE_THRESHOLD,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS):
+        self.embeddings = embeddings
+        self.score_threshold = score_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        # 每个槽位一行归一化后的问题向量，点积即余弦相似度；首次写入时按向量维数分配
+        self._vectors = None
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        # 槽位 -> CachedAnswer，按最近访问排序，队首最久未用
+        self._entries = OrderedDict()
+        # 规范化后的问题文本 -> 槽位
+        self._slots_by_text = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return _TRAILING_PUNCTUATION.sub("", _SPACES.sub(" ", query).strip())
+
+    def lookup(self, query: str) -> Optional[dict]:
+        """命中时返回缓存的回答（与 RetrievalQA 的输出格式相同），否则返回 None。"""
+        text = self.normalize(query)
+        answer = self._lookup_text(text)
+        if answer is not None:
+            return answer
+        return self._lookup_vector(self._normalize_vector(self.embeddings.embed_query(query)))
+
+    async def alookup(self, query: str) -> Optional[dict]:
+        """lookup 的异步版本，等待 Embedding 接口时不占用事件循环。"""
+        answer = self._lookup_text(self.normalize(query))
+        if answer is not None:
+            return answer
+        return self._lookup_vector(self._normalize_vector(await aembed_query(self.embeddings, query)))
+
+    def add(self, query: str, answer: dict):
+        self._add(self.normalize(query), self._normalize_vector(self.embeddings.embed_query(query)), answer)
+
+    async def aadd(self, query: str, answer: dict):
+        # lookup 时已经请求过同一个问题的向量，MemoizedEmbeddings 下这里不会再请求接口
+        self._add(self.normalize(query), self._normalize_vector(await aembed_query(self.embeddings, query)), answer)
+
+    def _lookup_text(self, text: str) -> Optional[dict]:
+        with self._lock:
+            slot = self._slots_by_text.get(text)
+            if slot is not None:
+                return self._hit(slot)
+        return None
+
+    def _lookup_vector(self, vector: np.ndarray) -> Optional[dict]:
+        with self._lock:
+            if self._vectors is not None and self._entries:
+                scores = self._vectors @ vector
+                scores[~self._valid] = -1.0
+                slot = int(np.argmax(scores))
+                if scores[slot] >= self.score_threshold:
+                    answer = self._hit(slot)
+                    if answer is not None:
+                        self.semantic_hits += 1
+                        return answer
+            self.misses += 1
+        return None
+
+    def _add(self, text: str, vector: np.ndarray, answer: dict):
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+            # 同一个问题重复写入时覆盖旧的回答
+            if text in self._slots_by_text:
+                self._remove(self._slots_by_text[text])
+            if not self._free_slots:
+                _, entry = self._entries.popitem(last=False)
+                self._release(entry)
+                self.evictions += 1
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._entries[slot] = CachedAnswer(text, answer, slot)
+            self._slots_by_text[text] = slot
+
+    @staticmethod
+    def _normalize_vector(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _hit(self, slot: int) -> Optional[dict]:
+        # 调用方已持有锁
+        entry = self._entries[slot]
+        if self.ttl_seconds is not None and time.monotonic() - entry.created > self.ttl_seconds:
+            self._remove(slot)
+            self.expired += 1
+            return None
+        self._entries.move_to_end(slot)
+        self.hits += 1
+        return entry.answer
+
+    def _remove(self, slot: int):
+        self._release(self._entries.pop(slot))
+
+    def _release(self, entry: CachedAnswer):
+        self._valid[entry.slot] = False
+        self._slots_by_text.pop(entry.query, None)
+        self._free_slots.append(entry.slot)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -1,3 +1,4 @@
 from .book import Book
 from .page import Page
-from .content import ContentType, Content, TableContent
\ No newline at end of file
+from .content import ContentType, Content, TableContent
+from .table import Table
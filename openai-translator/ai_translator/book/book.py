@@ -2,6 +2,8 @@ from .page import Page
 
 
 class Book:
+    __slots__ = ("pdf_file_path", "pages")
+
     def __init__(self, pdf_file_path):
         self.pdf_file_path = pdf_file_path
         self.pages = []
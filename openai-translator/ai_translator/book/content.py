@@ -1,6 +1,5 @@
-import pandas as pd
 from enum import Enum, auto
-from PIL import Image as PILImage
+from book.table import Table
 from utils import LOG
 
 
@@ -12,6 +11,9 @@ class ContentType(Enum):
 
 
 class Content:
+    # 大书会创建数以万计的 content，用 __slots__ 省去每个实例的 __dict__
+    __slots__ = ("content_type", "original", "translation", "status")
+
     def __init__(self, content_type, original, translation=None):
         self.content_type = content_type
         self.original = original
@@ -27,25 +29,20 @@ class Content:
     def check_translation_type(self, translation):
         if self.content_type == ContentType.TEXT and isinstance(translation, str):
             return True
-        elif self.content_type == ContentType.MIXED and isinstance(translation, str):
-            return True
         elif self.content_type == ContentType.TABLE and isinstance(translation, list):
             return True
-        elif self.content_type == ContentType.IMAGE and isinstance(translation, PILImage.Image):
-            return True
+        elif self.content_type == ContentType.IMAGE:
+            # 只有图片内容才需要 PIL
+            from PIL import Image as PILImage
+            return isinstance(translation, PILImage.Image)
         return False
 
 
 class TableContent(Content):
-    def __init__(self, data, translation=None):
-        df = pd.DataFrame(data)
-
-        # Verify if the number of rows and columns in the data and DataFrame object match
-        if len(data) != len(df) or len(data[0]) != len(df.columns):
-            raise ValueError(
-                "The number of rows and columns in the extracted table data and DataFrame object do not match.")
+    __slots__ = ()
 
-        super().__init__(ContentType.TABLE, df)
+    def __init__(self, data, translation=None):
+        super().__init__(ContentType.TABLE, Table.from_rows(data))
 
     def set_translation(self, translation, status):
         try:
@@ -56,10 +53,10 @@ class TableContent(Content):
             # Convert the string to a list of lists
             table_data = [row.strip().split() for row in translation.strip().split('\n')]
             LOG.debug(table_data)
-            # Create a DataFrame from the table_data
-            translated_df = pd.DataFrame(table_data[1:], columns=table_data[0])
-            LOG.debug(translated_df)
-            self.translation = translated_df
+            # Create a Table from the table_data, the first row is the header
+            translated_table = Table.from_rows(table_data[1:], columns=table_data[0])
+            LOG.debug(translated_table)
+            self.translation = translated_table
             self.status = status
         except Exception as e:
             LOG.error(f"An error occurred during table translation: {e}")
@@ -67,24 +64,47 @@ class TableContent(Content):
             self.status = False
 
     def __str__(self):
-        return self.original.to_string(header=False, index=False)
+        return self.original.to_string()
 
     def iter_items(self, translated=False):
-        target_df = self.translation if translated else self.original
-        for row_idx, row in target_df.iterrows():
-            for col_idx, item in enumerate(row):
-                yield (row_idx, col_idx, item)
+        target_table = self.translation if translated else self.original
+        yield from target_table.iter_items()
 
     def update_item(self, row_idx, col_idx, new_value, translated=False):
-        target_df = self.translation if translated else self.original
-        target_df.at[row_idx, col_idx] = new_value
+        target_table = self.translation if translated else self.original
+        target_table.set(row_idx, col_idx, new_value)
 
     def get_original_as_str(self):
-        return self.original.to_string(header=False, index=False)
+        return self.original.to_string()
 
 
 class MixedContent(Content):
+    """BEHIND 模式的内容：原文为整页文本，译文为按顺序排列的文本块和表格块。
+
+    translation 保存解析后的 [(ContentType.TEXT, str) | (ContentType.TABLE, Table), ...]，各输出格式直接使用。
+    翻译时请求方已解析好译文，通过 set_blocks 直接写入；set_translation 只用于从翻译日志回放 JSON 文本。
+    """
+
+    __slots__ = ()
+
     def __init__(self, content_type, original, translation=None):
-        super().__init__(content_type, original, translation)
+        super().__init__(content_type, original)
         if translation is not None:
-            self.status = True
+            self.set_translation(translation, True)
+
+    def set_translation(self, translation, status):
+        from book.mixed_blocks import parse_mixed_blocks
+
+        try:
+            if not isinstance(translation, str):
+                raise ValueError(f"Invalid translation type. Expected str, but got {type(translation)}")
+            self.translation = parse_mixed_blocks(translation)
+            self.status = status
+        except ValueError as e:
+            LOG.error(f"An error occurred during mixed content translation: {e}")
+            self.translation = None
+            self.status = False
+
+    def set_blocks(self, blocks, status):
+        self.translation = blocks
+        self.status = status
@@ -0,0 +1,99 @@
+import ast
+import json
+import re
+from typing import List, Tuple
+
+from book.content import ContentType
+from book.table import Table
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时使用标准库 json
+    orjson = None
+
+# BEHIND 模式译文解析后的结构：[(ContentType.TEXT, str) | (ContentType.TABLE, Table), ...]
+MixedBlocks = List[Tuple[ContentType, object]]
+
+_CODE_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_TRAILING_COMMA = re.compile(r",\s*([\]}])")
+
+
+def _loads(text: str):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _repair_candidates(text: str):
+    # 依次尝试的修复方式，前一种失败才尝试后一种
+    text = _CODE_FENCE.sub("", text.strip())
+    start, end = text.find("["), text.rfind("]")
+    if start != -1 and end > start:
+        # 去掉数组前后的说明文字
+        text = text[start:end + 1]
+    yield lambda: json.loads(text, strict=False)  # 字符串中未转义的换行、制表符
+    yield lambda: json.loads(_TRAILING_COMMA.sub(r"\1", text), strict=False)  # 多余的逗号
+    yield lambda: ast.literal_eval(text)  # 单引号等 python 字面量写法（旧版本日志中的译文）
+
+
+def _load_raw(text: str):
+    try:
+        return _loads(text)
+    except ValueError:
+        pass
+    error = None
+    for candidate in _repair_candidates(text):
+        try:
+            return candidate()
+        except (ValueError, SyntaxError, MemoryError, RecursionError) as e:
+            error = e
+    raise ValueError(f"Invalid mixed content response: {error}")
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    # 数字、true/false 等保持 JSON 中的写法
+    return json.dumps(value, ensure_ascii=False)
+
+
+def parse_mixed_blocks(text: str) -> MixedBlocks:
+    """解析并校验 BEHIND 模式的模型输出，格式见 prompt.constants.system_prompt。
+
+    支持 true/null、\\u 转义等 JSON 写法，无法修复或结构不符时抛出 ValueError。
+    """
+    raw = _load_raw(text)
+    if isinstance(raw, dict):
+        raw = [raw]
+    if not isinstance(raw, list):
+        raise ValueError(f"Expected a list of blocks, but got {type(raw).__name__}")
+
+    blocks = []
+    for idx, block in enumerate(raw):
+        if not isinstance(block, dict):
+            raise ValueError(f"Block {idx} is not an object")
+        block_type, value = block.get("type"), block.get("content")
+        if not value:
+            continue
+        if block_type == "text":
+            blocks.append((ContentType.TEXT, _cell_text(value)))
+        elif block_type == "table":
+            records = value if isinstance(value, list) else [value]
+            if not all(isinstance(record, dict) for record in records):
+                raise ValueError(f"Block {idx} is a table but its rows are not objects")
+            table = Table.from_records(records)
+            table.cells = [_cell_text(cell) for cell in table.cells]
+            blocks.append((ContentType.TABLE, table))
+        else:
+            raise ValueError(f"Block {idx} has an unknown type: {block_type!r}")
+    return blocks
+
+
+def dump_mixed_blocks(blocks: MixedBlocks) -> str:
+    # 规范化的 JSON 文本，写入翻译日志，回放时可直接用快速解析
+    raw = [{"type": "text", "content": value} if block_type == ContentType.TEXT else
+           {"type": "table", "content": [dict(zip(value.column_names, row)) for row in value.iter_rows()]}
+           for block_type, value in blocks]
+    return json.dumps(raw, ensure_ascii=False, separators=(",", ":"))
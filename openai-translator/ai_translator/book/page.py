@@ -2,6 +2,8 @@ from .content import Content
 
 
 class Page:
+    __slots__ = ("contents",)
+
     def __init__(self):
         self.contents = []
 
@@ -0,0 +1,98 @@
+from typing import Iterator, List, Optional
+
+
+class Table:
+    """紧凑的二维表格：单元格按行优先存放在一个扁平 list 中，另记行数和列数。
+
+    书中的表格通常只有几行几列，用 pandas.DataFrame 存放开销过大；需要时可以用 to_pandas() 转换。
+    """
+
+    __slots__ = ("cells", "n_rows", "n_cols", "columns")
+
+    def __init__(self, cells: list, n_rows: int, n_cols: int, columns: Optional[list] = None):
+        if len(cells) != n_rows * n_cols:
+            raise ValueError(f"Expected {n_rows * n_cols} cells for a {n_rows}x{n_cols} table, but got {len(cells)}.")
+        if columns is not None and len(columns) != n_cols:
+            raise ValueError(f"Expected {n_cols} column names, but got {len(columns)}.")
+        self.cells = cells
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        # 表头，None 时与 DataFrame 一致，使用 0..n_cols-1 作为列名
+        self.columns = columns
+
+    @classmethod
+    def from_rows(cls, rows: List[list], columns: Optional[list] = None) -> "Table":
+        n_cols = len(columns) if columns is not None else max((len(row) for row in rows), default=0)
+        cells = []
+        for row in rows:
+            if len(row) > n_cols:
+                raise ValueError(f"{n_cols} columns passed, passed data had {len(row)} columns")
+            cells.extend(row)
+            # 较短的行用 None 补齐
+            cells.extend([None] * (n_cols - len(row)))
+        return cls(cells, len(rows), n_cols, list(columns) if columns is not None else None)
+
+    @classmethod
+    def from_records(cls, records: List[dict]) -> "Table":
+        # 字典列表按键名合并为列，缺失的单元格为空字符串
+        columns = list(dict.fromkeys(key for record in records for key in record))
+        return cls.from_rows([[record.get(column, "") for column in columns] for record in records], columns)
+
+    @property
+    def shape(self) -> tuple:
+        return self.n_rows, self.n_cols
+
+    @property
+    def column_names(self) -> list:
+        return self.columns if self.columns is not None else list(range(self.n_cols))
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Table):
+            return NotImplemented
+        return (self.shape == other.shape and self.cells == other.cells
+                and self.column_names == other.column_names)
+
+    def get(self, row_idx: int, col_idx: int):
+        return self.cells[row_idx * self.n_cols + col_idx]
+
+    def set(self, row_idx: int, col_idx: int, value):
+        self.cells[row_idx * self.n_cols + col_idx] = value
+
+    def row(self, row_idx: int) -> list:
+        start = row_idx * self.n_cols
+        return self.cells[start:start + self.n_cols]
+
+    def column(self, col_idx: int) -> list:
+        return self.cells[col_idx::self.n_cols] if self.n_cols else []
+
+    def iter_rows(self) -> Iterator[list]:
+        for row_idx in range(self.n_rows):
+            yield self.row(row_idx)
+
+    def iter_items(self) -> Iterator[tuple]:
+        for idx, item in enumerate(self.cells):
+            yield divmod(idx, self.n_cols) + (item,)
+
+    def tolist(self) -> List[list]:
+        return list(self.iter_rows())
+
+    def to_string(self) -> str:
+        # 与 DataFrame.to_string(header=False, index=False) 的排版一致：每列按最宽的单元格右对齐，列间以空格分隔
+        texts = ["" if cell is None else str(cell) for cell in self.cells]
+        widths = [max((len(text) for text in texts[col_idx::self.n_cols]), default=0)
+                  for col_idx in range(self.n_cols)]
+        return "\n".join(
+            " ".join(text.rjust(width) for text, width in zip(texts[start:start + self.n_cols], widths))
+            for start in range(0, len(texts), self.n_cols or 1)
+        )
+
+    def to_pandas(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.tolist(), columns=self.columns)
+
+    def __repr__(self) -> str:
+        return f"Table({self.n_rows}x{self.n_cols})"
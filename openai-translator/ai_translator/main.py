@@ -1,35 +1,100 @@
 import sys
 import os
 
-from translator.pdf_parser import ParserType
-
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from utils import ArgumentParser, ConfigLoader
-from model import GLMModel, OpenAIModel
-from translator import PDFTranslator
+from utils import ArgumentParser
 
 if __name__ == "__main__":
-    # 参数解析
+    # 参数解析；先解析参数再导入其余模块，--help 和参数错误时无需加载 pdf、模型等重量级依赖
     argument_parser = ArgumentParser()
     args = argument_parser.parse_arguments()
+
+    import time
+
+    from utils import ConfigLoader, RateLimiter, TranslationCache, LOG
+    from model import CachedModel
+    from translator import PDFTranslator, BatchTranslator, BookCache
+    from translator.pdf_parser import ParserType
+
     # yml中的配置信息解析
     config_loader = ConfigLoader(args.config)
     config = config_loader.load_config()
 
-    # 参数or配置文件中获取本次翻译采用的LLM信息
-    model_name = args.openai_model if args.openai_model else config['OpenAIModel']['model']
-    api_key = args.openai_api_key if args.openai_api_key else config['OpenAIModel']['api_key']
+    # 客户端限流器，按 RPM/TPM 配额调度所有模型请求
+    requests_per_minute = args.requests_per_minute if args.requests_per_minute else config['common'].get('requests_per_minute')
+    tokens_per_minute = args.tokens_per_minute if args.tokens_per_minute else config['common'].get('tokens_per_minute')
+    rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
 
-    # 构建LLM基类
-    model = OpenAIModel(model=model_name, api_key=api_key)
+    # 参数or配置文件中获取本次翻译采用的LLM信息，构建LLM基类
+    if args.model_type == 'GLMModel':
+        from model import GLMModel
+        model_url = args.glm_model_url if args.glm_model_url else config['GLMModel']['model_url']
+        timeout = args.timeout if args.timeout else config['GLMModel']['timeout']
+        model_name = model_url
+        model = GLMModel(model_url=model_url, timeout=timeout, rate_limiter=rate_limiter,
+                         pool_size=config['GLMModel'].get('pool_size', 10))
+    else:
+        from model import OpenAIModel
+        model_name = args.openai_model if args.openai_model else config['OpenAIModel']['model']
+        api_key = args.openai_api_key if args.openai_api_key else config['OpenAIModel']['api_key']
+        model = OpenAIModel(model=model_name, api_key=api_key, rate_limiter=rate_limiter)
 
-    # 获取要解析文件的地址
-    pdf_file_path = args.book if args.book else config['common']['book']
+    # 翻译缓存，--no_cache 时直接请求模型
+    cache = None
+    if not args.no_cache:
+        cache = TranslationCache(config['common'].get('cache_file', '../.cache/translation_cache.db'),
+                                 max_entries=config['common'].get('cache_max_entries', 100000))
     # 翻译后文件的格式，如：pdf、md
     file_format = args.file_format if args.file_format else config['common']['file_format']
 
-    # 实例化 PDFTranslator 类，并调用 translate_pdf() 方法
-    translator = PDFTranslator(model)
-    # 解析并翻译pdf
-    translator.translate_pdf(pdf_file_path, file_format, parse_type=ParserType(args.parser_type))
+    # 并发翻译的请求数
+    max_workers = args.max_workers if args.max_workers else config['common'].get('max_workers', 1)
+    # 批量翻译的 token 预算
+    batch_tokens = args.batch_tokens if args.batch_tokens is not None else config['common'].get('batch_tokens', 0)
+    # BEHIND 模式每次请求的原文 token 预算，0 表示翻译时按模型的上下文窗口计算
+    chunk_tokens = args.chunk_tokens if args.chunk_tokens else config['common'].get('chunk_tokens', 0)
+    # 解析 pdf 的进程数
+    parse_workers = args.parse_workers if args.parse_workers else config['common'].get('parse_workers', 1)
+
+    # 流式翻译：逐页解析、翻译并追加写出
+    stream = args.stream if args.stream is not None else config['common'].get('stream', False)
+
+    # 解析结果缓存，--no_cache 时每次重新解析
+    book_cache_dir = config['common'].get('book_cache_dir')
+    book_cache = BookCache(book_cache_dir) if book_cache_dir and not args.no_cache else None
+
+    translate_options = {"parse_type": ParserType(args.parser_type), "resume": args.resume, "stream": stream,
+                         "incremental": args.incremental, "base_journal_path": args.base_journal}
+    failed = False
+    if args.batch:
+        # 批量翻译：所有书共用模型客户端、限流器、缓存和请求线程池
+        file_workers = args.file_workers if args.file_workers else config['common'].get('file_workers', 2)
+        batch_translator = BatchTranslator(model, model_name, cache, max_workers=max_workers,
+                                           file_workers=file_workers, parse_workers=parse_workers,
+                                           batch_tokens=batch_tokens, book_cache=book_cache,
+                                           chunk_tokens=chunk_tokens)
+        start = time.perf_counter()
+        jobs = batch_translator.translate_all(BatchTranslator.collect_jobs(args.batch, args.pages), file_format,
+                                              **translate_options)
+        LOG.info(f"批量翻译统计:\n{BatchTranslator.summary(jobs, time.perf_counter() - start)}")
+        failed = not all(job.succeeded for job in jobs)
+    else:
+        # 获取要解析文件的地址
+        pdf_file_path = args.book if args.book else config['common']['book']
+        # 在模型前挂上翻译缓存
+        if cache is not None:
+            model = CachedModel(model, cache, model_name)
+        # 实例化 PDFTranslator 类，并调用 translate_pdf() 方法
+        translator = PDFTranslator(model, max_workers=max_workers, parse_workers=parse_workers,
+                                   batch_tokens=batch_tokens, book_cache=book_cache, chunk_tokens=chunk_tokens,
+                                   model_name=model_name)
+        # 解析并翻译pdf
+        translator.translate_pdf(pdf_file_path, file_format, pages=args.pages, **translate_options)
+
+    LOG.info(f"限流统计: {rate_limiter.stats()}")
+    if cache is not None:
+        LOG.info(f"翻译缓存统计: {cache.stats()}")
+        cache.close()
+    if failed:
+        sys.exit(1)
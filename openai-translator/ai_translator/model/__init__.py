@@ -1,3 +1,21 @@
+import importlib
+
 from .model import Model
-from .glm_model import GLMModel
-from .openai_model import OpenAIModel
+
+# 各模型的依赖（openai、requests 等）较重，在实际用到该模型时才导入
+_EXPORTS = {
+    "GLMModel": ".glm_model",
+    "OpenAIModel": ".openai_model",
+    "CachedModel": ".cached_model",
+    "MeteredModel": ".metered_model",
+}
+
+__all__ = ["Model", *_EXPORTS]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,49 @@
+from model import Model
+from prompt.constants import PROMPT_VERSION
+from utils import TranslationCache
+
+
+class CachedModel(Model):
+    """在真实模型前加一层翻译缓存，命中时直接返回，不再请求 LLM。"""
+
+    def __init__(self, model: Model, cache: TranslationCache, model_name: str):
+        self.model = model
+        self.cache = cache
+        self.model_name = model_name
+
+    def make_request(self, prompt):
+        # prompt 中已包含目标语言与模板内容，因此直接参与缓存 key 的计算
+        key = TranslationCache.make_key(self.model_name, None, None, PROMPT_VERSION, prompt)
+        return self._cached_request(key, self.model.make_request, prompt)
+
+    def make_request_by_message(self, messages: list):
+        key = TranslationCache.make_key(self.model_name, None, None, PROMPT_VERSION, messages)
+        return self._cached_request(key, self.model.make_request_by_message, messages)
+
+    def make_checked_request_by_message(self, messages: list, check, cache_as: list = None):
+        key = TranslationCache.make_key(self.model_name, None, None, PROMPT_VERSION,
+                                        messages if cache_as is None else cache_as)
+        if cache_as is None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                result = Model.check_response(cached, True, check)
+                if result[2]:
+                    return result
+                # 旧版本缓存了无法解析的回复，丢弃后重新请求
+                self.cache.delete(key)
+        translation, status = self.model.make_request_by_message(messages)
+        translation, parsed, status, error = Model.check_response(translation, status, check)
+        # 校验通过后才写入缓存，格式错误的回复不会在续跑时被原样回放
+        if status:
+            self.cache.set(key, translation)
+        return translation, parsed, status, error
+
+    def _cached_request(self, key, request, payload):
+        translation = self.cache.get(key)
+        if translation is not None:
+            return translation, True
+        translation, status = request(payload)
+        # 只缓存成功的翻译结果
+        if status:
+            self.cache.set(key, translation)
+        return translation, status
@@ -1,12 +1,32 @@
+import asyncio
+import threading
 import requests
 import simplejson
 
+from requests.adapters import HTTPAdapter
+from typing import Optional
+
 from model import Model
+from utils import RateLimiter, count_tokens
 
 class GLMModel(Model):
-    def __init__(self, model_url: str, timeout: int):
+    def __init__(self, model_url: str, timeout: int, rate_limiter: Optional[RateLimiter] = None,
+                 max_attempts: int = 5, pool_size: int = 10):
         self.model_url = model_url
         self.timeout = timeout
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.max_attempts = max_attempts
+        self.pool_size = pool_size
+
+        # 复用 keep-alive 连接，避免每段文本都重新建立 TCP/TLS 连接；连接池满时阻塞等待空闲连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # aiohttp 的会话与事件循环绑定：每个事件循环首次调用 make_request_async 时创建一个，{loop: session}
+        self._async_sessions = {}
+        self._async_lock = threading.Lock()
 
     def make_request(self, prompt):
         try:
@@ -14,10 +34,21 @@ class GLMModel(Model):
                 "prompt": prompt,
                 "history": []
             }
-            response = requests.post(self.model_url, json=payload, timeout=self.timeout)
+            estimated_tokens = count_tokens(prompt) * 2
+            attempts = 0
+            while True:
+                attempts += 1
+                self.rate_limiter.acquire(estimated_tokens)
+                response = self.session.post(self.model_url, json=payload, timeout=self.timeout)
+                # 自建服务过载时同样可能返回 429，交给限流器退避后重试
+                if response.status_code == 429 and attempts < self.max_attempts:
+                    self.rate_limiter.on_rate_limited(RateLimiter.parse_retry_after(response.headers))
+                    continue
+                break
             response.raise_for_status()
             response_dict = response.json()
             translation = response_dict["response"]
+            self.rate_limiter.record_usage(estimated_tokens, estimated_tokens)
             return translation, True
         except requests.exceptions.RequestException as e:
             raise Exception(f"请求异常：{e}")
@@ -28,3 +59,71 @@ class GLMModel(Model):
         except Exception as e:
             raise Exception(f"发生了未知错误：{e}")
         return "", False
+
+    async def make_request_async(self, prompt):
+        import aiohttp
+
+        try:
+            session = self._get_async_session(aiohttp)
+            payload = {
+                "prompt": prompt,
+                "history": []
+            }
+            estimated_tokens = count_tokens(prompt) * 2
+            attempts = 0
+            while True:
+                attempts += 1
+                # 限流器的等待是阻塞的，放到线程中执行，避免卡住事件循环
+                await asyncio.to_thread(self.rate_limiter.acquire, estimated_tokens)
+                async with session.post(self.model_url, json=payload) as response:
+                    if response.status == 429 and attempts < self.max_attempts:
+                        self.rate_limiter.on_rate_limited(RateLimiter.parse_retry_after(response.headers))
+                        continue
+                    response.raise_for_status()
+                    response_dict = await response.json(content_type=None)
+                    break
+            translation = response_dict["response"]
+            self.rate_limiter.record_usage(estimated_tokens, estimated_tokens)
+            return translation, True
+        except aiohttp.ClientError as e:
+            raise Exception(f"请求异常：{e}")
+        except asyncio.TimeoutError as e:
+            raise Exception(f"请求超时：{e}")
+        except ValueError as e:
+            raise Exception("Error: response is not valid JSON format.")
+        except Exception as e:
+            raise Exception(f"发生了未知错误：{e}")
+
+    def _get_async_session(self, aiohttp):
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            session = self._async_sessions.get(loop)
+            if session is None or session.closed:
+                # 顺带丢弃已关闭的会话和已结束的事件循环的会话（后者无法再 await close，需调用方在循环结束前 aclose）
+                self._async_sessions = {other_loop: other for other_loop, other in self._async_sessions.items()
+                                        if not other.closed and not other_loop.is_closed()}
+                connector = aiohttp.TCPConnector(limit=self.pool_size)
+                session = aiohttp.ClientSession(
+                    connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+                self._async_sessions[loop] = session
+        return session
+
+    async def aclose(self):
+        """关闭当前事件循环的 aiohttp 会话及其连接。
+
+        调用过 make_request_async 的事件循环在结束前（如 asyncio.run 返回前）都要 await model.aclose()，
+        否则会话的连接会随已关闭的事件循环泄漏。
+        """
+        with self._async_lock:
+            session = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    def close(self):
+        self.session.close()
+        # 仍在其他线程中运行的事件循环，把会话的关闭交给该循环执行
+        with self._async_lock:
+            sessions, self._async_sessions = self._async_sessions, {}
+        for loop, session in sessions.items():
+            if not session.closed and loop.is_running():
+                asyncio.run_coroutine_threadsafe(session.close(), loop)
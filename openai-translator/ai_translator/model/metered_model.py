@@ -0,0 +1,46 @@
+import threading
+
+from model import Model
+from utils import count_tokens, count_message_tokens
+
+
+class MeteredModel(Model):
+    """统计经过该模型的请求数与 token 用量（按 tiktoken 计数），批量翻译时每本书各用一个，按文件汇总用量。
+
+    放在翻译缓存之下，只统计真正发给 LLM 的请求。
+    """
+
+    def __init__(self, model: Model, model_name: str = None):
+        self.model = model
+        self.model_name = model_name
+        self.requests = 0
+        self.failed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def make_request(self, prompt):
+        translation, status = self.model.make_request(prompt)
+        self._record(count_tokens(prompt, self.model_name), translation, status)
+        return translation, status
+
+    def make_request_by_message(self, messages: list):
+        translation, status = self.model.make_request_by_message(messages)
+        self._record(count_message_tokens(messages, self.model_name), translation, status)
+        return translation, status
+
+    def _record(self, prompt_tokens: int, translation, status: bool):
+        completion_tokens = count_tokens(translation, self.model_name) if isinstance(translation, str) else 0
+        with self._lock:
+            self.requests += 1
+            self.failed += 0 if status else 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "failed": self.failed,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
@@ -8,3 +8,24 @@ class Model:
 
     def make_request(self, prompt):
         raise NotImplementedError("子类必须实现 make_request 方法")
+
+    def make_checked_request_by_message(self, messages: list, check, cache_as: list = None):
+        """请求后用 check 解析并规范化回复：check 返回 (规范化的文本, 解析结果)，抛出 ValueError 表示回复不可用。
+
+        返回 (translation, parsed, status, error)：translation 为规范化的文本，parsed 为 check 的解析结果，
+        调用方不必再解析一次；回复不可用时 translation 为原始回复、parsed 为 None、status 为 False、error 为错误原因。
+        带缓存的模型只缓存通过 check 的回复。cache_as 用于重新请求：不读缓存，通过 check 的回复
+        缓存在 cache_as 这组原始 messages 名下，续跑时原始请求直接命中。
+        """
+        translation, status = self.make_request_by_message(messages)
+        return Model.check_response(translation, status, check)
+
+    @staticmethod
+    def check_response(translation, status: bool, check):
+        if not status:
+            return translation, None, status, None
+        try:
+            normalized, parsed = check(translation)
+            return normalized, parsed, True, None
+        except ValueError as e:
+            return translation, None, False, str(e)
@@ -3,65 +3,81 @@ import requests
 import simplejson
 import time
 
-from tenacity import retry, wait_random_exponential, stop_after_attempt
+from typing import Optional
 
-from utils import LOG
+from utils import LOG, RateLimiter, count_tokens, count_message_tokens
 from model import Model
 
+# 可以重试的临时性错误
+RETRYABLE_ERRORS = (openai.error.APIError, openai.error.Timeout,
+                    openai.error.APIConnectionError, openai.error.ServiceUnavailableError)
+
 
 class OpenAIModel(Model):
-    def __init__(self, model: str, api_key: str):
+    def __init__(self, model: str, api_key: str, rate_limiter: Optional[RateLimiter] = None, max_attempts: int = 5):
         self.model = model
         openai.api_key = api_key
+        # 未指定限流器时仍使用一个不限 RPM/TPM 的实例，用于处理 429 的退避
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.max_attempts = max_attempts
 
-    @retry(wait=wait_random_exponential(multiplier=60, max=60), stop=stop_after_attempt(3))
     def make_request_by_message(self, messages: list):
         if not messages:
             raise Exception("the messages parameter must be specified")
         if not self.model.startswith("gpt-3.5-turbo") and not self.model.startswith("gpt-4"):
             raise Exception("GPT model doesn't support calling this method.")
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=messages,
-
-        )
+        # 翻译任务的输出长度与输入相当，按输入的两倍预估本次请求消耗的 token
+        prompt_tokens = count_message_tokens(messages, self.model)
+        response = self._create(openai.ChatCompletion, prompt_tokens * 2,
+                                model=self.model,
+                                messages=messages)
         return response.choices[0].message['content'].strip(), True
 
     def make_request(self, prompt):
+        try:
+            if self.model == "gpt-3.5-turbo":
+                messages = [{"role": "user", "content": prompt}]
+                response = self._create(openai.ChatCompletion, count_message_tokens(messages, self.model) * 2,
+                                        model=self.model,
+                                        messages=messages)
+                translation = response.choices[0].message['content'].strip()
+            else:
+                response = self._create(openai.Completion, count_tokens(prompt, self.model) + 150,
+                                        model=self.model,
+                                        prompt=prompt,
+                                        max_tokens=150,
+                                        temperature=0)
+                translation = response.choices[0].text.strip()
+
+            return translation, True
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"请求异常：{e}")
+        except requests.exceptions.Timeout as e:
+            raise Exception(f"请求超时：{e}")
+        except simplejson.errors.JSONDecodeError as e:
+            raise Exception("Error: response is not valid JSON format.")
+        except Exception as e:
+            raise Exception(f"发生了未知错误：{e}")
+
+    def _create(self, api, estimated_tokens: int, **kwargs):
         attempts = 0
-        while attempts < 3:
+        while True:
+            attempts += 1
+            self.rate_limiter.acquire(estimated_tokens)
             try:
-                if self.model == "gpt-3.5-turbo":
-                    response = openai.ChatCompletion.create(
-                        model=self.model,
-                        messages=[
-                            {"role": "user", "content": prompt}
-                        ]
-                    )
-                    translation = response.choices[0].message['content'].strip()
-                else:
-                    response = openai.Completion.create(
-                        model=self.model,
-                        prompt=prompt,
-                        max_tokens=150,
-                        temperature=0
-                    )
-                    translation = response.choices[0].text.strip()
-
-                return translation, True
-            except openai.error.RateLimitError:
-                attempts += 1
-                if attempts < 3:
-                    LOG.warning("Rate limit reached. Waiting for 60 seconds before retrying.")
-                    time.sleep(60)
-                else:
+                response = api.create(**kwargs)
+            except openai.error.RateLimitError as e:
+                if attempts >= self.max_attempts:
                     raise Exception("Rate limit reached. Maximum attempts exceeded.")
-            except requests.exceptions.RequestException as e:
-                raise Exception(f"请求异常：{e}")
-            except requests.exceptions.Timeout as e:
-                raise Exception(f"请求超时：{e}")
-            except simplejson.errors.JSONDecodeError as e:
-                raise Exception("Error: response is not valid JSON format.")
-            except Exception as e:
-                raise Exception(f"发生了未知错误：{e}")
-        return "", False
+                self.rate_limiter.on_rate_limited(RateLimiter.parse_retry_after(e.headers))
+                continue
+            except RETRYABLE_ERRORS as e:
+                if attempts >= self.max_attempts:
+                    raise
+                LOG.warning(f"请求失败，稍后重试（第 {attempts} 次）：{e}")
+                time.sleep(min(60, 2 ** attempts))
+                continue
+
+            usage = response.get("usage")
+            self.rate_limiter.record_usage(estimated_tokens, usage["total_tokens"] if usage else estimated_tokens)
+            return response
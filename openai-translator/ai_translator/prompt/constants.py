@@ -1,3 +1,9 @@
+# 提示词模板版本号，修改提示词后需递增，使旧的翻译缓存失效
+PROMPT_VERSION = 1
+
+# 批量翻译时每段内容的分隔标记
+BATCH_SEGMENT_MARK = "<<<SEG {}>>>"
+
 system_prompt = lambda language: \
     f"You are a translator translating English into {language}.\nThe input text will contain table elements.\nParsing steps:\n1.Differentiate between regular text and tables.\n2. Merge consecutive texts of the same type and retain the layout format.\n3. Translate the English in regular text and tables.\n4. Convert the translations of regular text and table text into different formats in order.\n\nRegular text format: {{\"type\":\"text\",\"content\":\" regular text translation\"}}\n\nTable text format：{{\"type\":\"table\",\"content\":[{{\"cell name translation\":\"cell 2 text translation\"}},{{\"cellNameTranslation\":\"cell 2 text translation\"}}]}}\n\nExample content:\n\"\"\"\nhello world!\nNice to meet u!\n\nTable  Testing\n\nColumn 1 Column 2\n123 345\n33 44\n\nso beautiful!\n\"\"\"\nFormal content:\n[{{\"type\":\"text\",\"content\":\"你好 世界！\\n很高兴见到你！\\n\"}},{{\"type\":\"text\",\"content\":\"表格测试\\n\"}},{{\"type\":\"table\",\"content\":[{{\"列 1\":\"123\",\"列 2\":\"345\"}},{{\"列 1\":\"33\",\"列 2\":\"44\"}}]}},{{\"type\":\"text\",\"content\":\"很漂亮！\"}}]\n"
 
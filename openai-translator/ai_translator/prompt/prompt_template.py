@@ -1,7 +1,7 @@
 import re
 
 from book import ContentType
-from prompt.constants import system_prompt
+from prompt.constants import system_prompt, BATCH_SEGMENT_MARK
 
 
 class PromptTemplate:
@@ -13,6 +13,22 @@ class PromptTemplate:
     def make_table_prompt(table: str, target_language: str) -> str:
         return f"翻译为{target_language}，保持间距（空格，分隔符），以表格形式返回：\n{table}"
 
+    @staticmethod
+    def make_batch_prompt(contents: list, target_language: str) -> str:
+        # 多段内容合并为一次请求，每段以分隔标记开头，便于把译文按段拆回
+        segments = []
+        for idx, content in enumerate(contents):
+            if content.content_type == ContentType.TABLE:
+                segments.append(f"{BATCH_SEGMENT_MARK.format(idx)} TABLE\n{content.get_original_as_str()}")
+            else:
+                segments.append(f"{BATCH_SEGMENT_MARK.format(idx)}\n{content.original}")
+        instruction = (
+            f"翻译为{target_language}。下面共有{len(contents)}段内容，每段以形如 {BATCH_SEGMENT_MARK.format(0)} 的标记开头。"
+            f"请逐段翻译，每段译文前原样保留该段的标记（不含 TABLE 字样），按原顺序输出，不要合并或遗漏任何一段。"
+            f"标有 TABLE 的段落是表格，保持间距（空格，分隔符），以表格形式返回。"
+        )
+        return instruction + "\n\n" + "\n\n".join(segments)
+
     @staticmethod
     def make_text_messages(content: str, target_language: str) -> list:
         content = re.sub(r' +\n', "\n", content)
@@ -21,6 +37,16 @@ class PromptTemplate:
             {"role": "user", "content": content},
         ]
 
+    @staticmethod
+    def make_repair_messages(messages: list, response: str, error: str) -> list:
+        # 结构化译文无法解析时，带上上次的输出和错误原因重新请求，只要求修正格式
+        return messages + [
+            {"role": "assistant", "content": response},
+            {"role": "user", "content": f"The output above is not a valid JSON array ({error}). "
+                                        f"Return the same translation again as a single valid JSON array in the "
+                                        f"format described above, with no other text."},
+        ]
+
     @staticmethod
     def translate_prompt(content, target_language: str) -> str:
         if content.content_type == ContentType.TEXT:
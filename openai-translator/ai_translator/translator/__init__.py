@@ -1 +1,3 @@
 from .pdf_translator import PDFTranslator
+from .book_cache import BookCache
+from .batch_translator import BatchTranslator
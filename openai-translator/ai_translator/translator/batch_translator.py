@@ -0,0 +1,140 @@
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Union
+
+from model import Model, CachedModel, MeteredModel
+from translator.pdf_translator import PDFTranslator
+from utils import LOG, TranslationCache, parse_page_ranges
+
+# 输出目录与原书在同一目录，批量翻译目录时跳过已翻译的 pdf
+TRANSLATED_SUFFIX = '_translated.pdf'
+
+
+class BatchJob:
+    """批量翻译中的一本书及其翻译结果。"""
+
+    def __init__(self, pdf_file_path: str, pages: Optional[Union[int, str]] = None):
+        self.pdf_file_path = pdf_file_path
+        self.pages = pages
+        self.error = None
+        self.seconds = 0.0
+        self.usage = {}
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+class BatchTranslator:
+    """在一个进程内翻译多本书：所有书共用同一个模型客户端、限流器、翻译缓存和请求线程池。
+
+    同时有 file_workers 本书在解析或翻译，请求统一排入 max_workers 个线程，
+    一本书的尾部请求与下一本书的解析重叠，配额在书与书之间不会空闲。
+    """
+
+    def __init__(self, model: Model, model_name: str, cache: Optional[TranslationCache] = None,
+                 max_workers: int = 1, file_workers: int = 1, **translator_options):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
+        self.file_workers = max(1, file_workers)
+        # 其余参数（parse_workers、batch_tokens 等）原样传给每本书的 PDFTranslator
+        self.translator_options = translator_options
+
+    @staticmethod
+    def collect_jobs(source: str, pages: Optional[Union[int, str]] = None) -> List[BatchJob]:
+        """source 可以是 pdf 文件、目录（递归查找 pdf）、glob 模式或清单文件。
+
+        清单文件每行一本书，可在路径后跟该书的页码范围，如 "books/a.pdf 10-40,55"；# 开头的行为注释，
+        相对路径相对于清单文件所在目录。未单独指定页码的书使用 pages。
+        """
+        if os.path.isdir(source):
+            paths = glob.glob(os.path.join(source, '**', '*.pdf'), recursive=True)
+            paths = [path for path in paths if not path.endswith(TRANSLATED_SUFFIX)]
+        elif glob.has_magic(source):
+            paths = glob.glob(source, recursive=True)
+        elif source.lower().endswith('.pdf'):
+            paths = [source]
+        else:
+            return BatchTranslator._read_manifest(source, pages)
+        if not paths:
+            raise ValueError(f"No PDF files found: {source}")
+        return [BatchJob(path, pages) for path in sorted(paths)]
+
+    @staticmethod
+    def _read_manifest(manifest_path: str, pages: Optional[Union[int, str]] = None) -> List[BatchJob]:
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        jobs = []
+        with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+            for line in manifest_file:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                pdf_file_path, job_pages = line, pages
+                parts = line.rsplit(None, 1)
+                if len(parts) == 2:
+                    # 最后一列能解析为页码范围时才视为页码，路径中可以有空格
+                    try:
+                        parse_page_ranges(parts[1])
+                        pdf_file_path, job_pages = parts[0], parts[1]
+                    except ValueError:
+                        pass
+                jobs.append(BatchJob(os.path.join(base_dir, pdf_file_path), job_pages))
+        if not jobs:
+            raise ValueError(f"No PDF files found: {manifest_path}")
+        return jobs
+
+    def translate_all(self, jobs: List[BatchJob], file_format: str, target_language: str = '中文',
+                      **translate_options) -> List[BatchJob]:
+        """依次提交所有书，单本失败只记录错误，不影响其他书。"""
+        LOG.info(f"批量翻译 {len(jobs)} 本书, file_workers={self.file_workers}, max_workers={self.max_workers}")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as request_executor, \
+                ThreadPoolExecutor(max_workers=self.file_workers) as file_executor:
+            futures = [file_executor.submit(self._translate_job, job, request_executor, file_format,
+                                            target_language, translate_options) for job in jobs]
+            for future in as_completed(futures):
+                future.result()
+        return jobs
+
+    def _translate_job(self, job: BatchJob, request_executor: ThreadPoolExecutor, file_format: str,
+                       target_language: str, translate_options: dict):
+        # 每本书单独计量，缓存命中的内容不计入 token 用量
+        metered = MeteredModel(self.model, self.model_name)
+        model = CachedModel(metered, self.cache, self.model_name) if self.cache is not None else metered
+        translator = PDFTranslator(model, max_workers=self.max_workers, executor=request_executor,
+                                   model_name=self.model_name, **self.translator_options)
+        start = time.perf_counter()
+        try:
+            translator.translate_pdf(job.pdf_file_path, file_format, target_language, pages=job.pages,
+                                     **translate_options)
+            LOG.info(f"翻译完成: {job.pdf_file_path}")
+        except Exception as e:
+            job.error = e
+            LOG.error(f"翻译失败: {job.pdf_file_path}: {e}")
+        job.seconds = time.perf_counter() - start
+        job.usage = metered.stats()
+
+    @staticmethod
+    def summary(jobs: List[BatchJob], seconds: float) -> str:
+        """按文件汇总耗时与 token 用量。"""
+        name_width = max([len(os.path.basename(job.pdf_file_path)) for job in jobs] + [4])
+        lines = [f"{'file':<{name_width}}  {'status':<6}  {'seconds':>8}  {'requests':>8}  "
+                 f"{'prompt':>9}  {'completion':>10}"]
+        totals = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        for job in jobs:
+            usage = job.usage
+            lines.append(f"{os.path.basename(job.pdf_file_path):<{name_width}}  "
+                         f"{'ok' if job.succeeded else 'failed':<6}  {job.seconds:8.1f}  "
+                         f"{usage.get('requests', 0):8d}  {usage.get('prompt_tokens', 0):9d}  "
+                         f"{usage.get('completion_tokens', 0):10d}")
+            for key in totals:
+                totals[key] += usage.get(key, 0)
+        failed = sum(not job.succeeded for job in jobs)
+        total_tokens = totals["prompt_tokens"] + totals["completion_tokens"]
+        lines.append(f"{len(jobs)} files ({failed} failed) in {seconds:.1f}s, {totals['requests']} requests, "
+                     f"{totals['prompt_tokens']} prompt + {totals['completion_tokens']} completion tokens "
+                     f"({total_tokens / max(seconds, 1e-9) * 60:.0f} tokens/min)")
+        return "\n".join(lines)
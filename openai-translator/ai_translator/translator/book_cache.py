@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Sequence
+from typing import Iterator, Optional, Union
+
+from book import Book, Page, Content, ContentType, TableContent
+from book.content import MixedContent
+from utils import LOG
+
+# 文件格式：MAGIC | 索引偏移量(uint64, 小端) | 各页数据块(zlib 压缩的 JSON) | 索引(JSON)
+MAGIC = b"BOOKC1"
+HEADER = struct.Struct("<6sQ")
+FORMAT_VERSION = 2
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class BookCache:
+    """解析结果缓存：按 pdf 内容哈希、页数范围和解析方式保存解析后的 Book，换目标语言或输出格式时无需重新解析。
+
+    每页单独压缩并在索引中记录偏移量，加载时只读索引，页面在首次访问时才读取和反序列化。
+    """
+
+    def __init__(self, cache_dir: str):
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        # 同一进程内重复计算同一文件的哈希时直接复用：(路径, 修改时间, 大小) -> sha256
+        self._file_hashes = {}
+        self._lock = threading.Lock()
+
+    def key(self, pdf_file_path: str, pages: Optional[Union[int, str]], parse_type: str, parser_version: int) -> str:
+        payload = json.dumps([FORMAT_VERSION, parser_version, self._file_hash(pdf_file_path), pages, parse_type])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _file_hash(self, pdf_file_path: str) -> str:
+        stat = os.stat(pdf_file_path)
+        memo_key = (os.path.abspath(pdf_file_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if memo_key in self._file_hashes:
+                return self._file_hashes[memo_key]
+        digest = hashlib.sha256()
+        with open(pdf_file_path, "rb") as pdf_file:
+            for chunk in iter(lambda: pdf_file.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        with self._lock:
+            self._file_hashes[memo_key] = digest.hexdigest()
+        return self._file_hashes[memo_key]
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.book")
+
+    def load(self, key: str, pdf_file_path: str) -> Optional[Book]:
+        cache_path = self.path_for(key)
+        if not os.path.exists(cache_path):
+            self.misses += 1
+            return None
+        try:
+            pages = CachedPages(cache_path)
+        except (OSError, ValueError) as e:
+            LOG.warning(f"解析缓存已损坏，重新解析: {cache_path}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        LOG.info(f"使用解析缓存（{len(pages)} 页）: {cache_path}")
+        book = Book(pdf_file_path)
+        book.pages = pages
+        return book
+
+    def store(self, key: str, pages: Iterator[Page]) -> Iterator[Page]:
+        """边产出页面边写入缓存；只有全部页面都产出后才提交，中途失败或被中断不会留下不完整的缓存。"""
+        cache_path = self.path_for(key)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        offsets = []
+        committed = False
+        cache_file = open(tmp_path, "wb")
+        try:
+            cache_file.write(HEADER.pack(MAGIC, 0))
+            for page in pages:
+                blob = zlib.compress(json.dumps(encode_page(page), ensure_ascii=False,
+                                                separators=(",", ":")).encode("utf-8"))
+                offsets.append((cache_file.tell(), len(blob)))
+                cache_file.write(blob)
+                yield page
+
+            index_offset = cache_file.tell()
+            cache_file.write(json.dumps({"version": FORMAT_VERSION, "pages": offsets}).encode("utf-8"))
+            cache_file.seek(0)
+            cache_file.write(HEADER.pack(MAGIC, index_offset))
+            cache_file.close()
+            os.replace(tmp_path, cache_path)
+            committed = True
+            LOG.info(f"解析结果已缓存（{len(offsets)} 页）: {cache_path}")
+        finally:
+            if not committed:
+                cache_file.close()
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class CachedPages(Sequence):
+    """按需从缓存文件读取页面，按下标读过的页面保留在内存中（翻译结果会写回这些 Page 对象）。
+
+    流式翻译用 stream() 逐页读取，页面不保留，内存占用与页数无关。
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        with open(cache_path, "rb") as cache_file:
+            magic, index_offset = HEADER.unpack(cache_file.read(HEADER.size))
+            if magic != MAGIC or index_offset == 0:
+                raise ValueError("invalid book cache header")
+            cache_file.seek(index_offset)
+            index = json.loads(cache_file.read())
+        if index.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported book cache version {index.get('version')}")
+        self._offsets = index["pages"]
+        self._pages = [None] * len(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        page = self._pages[index]
+        if page is None:
+            with open(self.cache_path, "rb") as cache_file:
+                page = self._read_page(cache_file, index)
+            self._pages[index] = page
+        return page
+
+    def stream(self) -> Iterator[Page]:
+        # 已经按下标读过的页面直接复用，其余页面读出后不保留
+        with open(self.cache_path, "rb") as cache_file:
+            for index in range(len(self)):
+                page = self._pages[index]
+                yield page if page is not None else self._read_page(cache_file, index)
+
+    def _read_page(self, cache_file, index: int) -> Page:
+        offset, length = self._offsets[index]
+        cache_file.seek(offset)
+        return decode_page(json.loads(zlib.decompress(cache_file.read(length))))
+
+
+def encode_page(page: Page) -> list:
+    # 只保存解析得到的原文；表格按列存储，避免逐行重复结构，另存行数，没有列的表格也能还原出原来的行数
+    contents = []
+    for content in page.contents:
+        if content.content_type == ContentType.TABLE:
+            table = content.original
+            contents.append([ContentType.TABLE.name,
+                             [table.n_rows, [table.column(col_idx) for col_idx in range(table.n_cols)]]])
+        else:
+            contents.append([content.content_type.name, content.original])
+    return contents
+
+
+def decode_page(contents: list) -> Page:
+    page = Page()
+    for content_type, original in contents:
+        if content_type == ContentType.TABLE.name:
+            n_rows, columns = original
+            rows = [list(row) for row in zip(*columns)] if columns else [[] for _ in range(n_rows)]
+            page.add_content(TableContent(rows))
+        elif content_type == ContentType.MIXED.name:
+            page.add_content(MixedContent(ContentType.MIXED, original))
+        else:
+            page.add_content(Content(ContentType[content_type], original))
+    return page
@@ -0,0 +1,55 @@
+import re
+from typing import List, Optional
+
+from book import ContentType
+from utils import LOG, count_tokens
+
+# 匹配译文中的分隔标记，如 <<<SEG 3>>>，模型偶尔会保留 TABLE 字样，一并去掉
+SEGMENT_PATTERN = re.compile(r"<<<SEG (\d+)>>>(?:[ \t]*TABLE)?[ \t]*\n?")
+
+
+class ContentBatcher:
+    """把相邻的短内容按 token 预算打包成一次请求，并把模型的回复拆回各段。"""
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+
+    @staticmethod
+    def content_tokens(content) -> int:
+        if content.content_type == ContentType.TABLE:
+            return count_tokens(content.get_original_as_str())
+        return count_tokens(content.original)
+
+    def make_batches(self, tasks: list) -> List[list]:
+        """tasks 为 (page_idx, content_idx, content)，按顺序打包，单个超出预算的内容独占一批。"""
+        batches = []
+        batch, batch_tokens = [], 0
+        for task in tasks:
+            tokens = self.content_tokens(task[2])
+            if batch and batch_tokens + tokens > self.max_tokens:
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(task)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def split_response(response: str, expected: int) -> Optional[List[str]]:
+        """按分隔标记拆分回复，标记缺失、重复或乱序时返回 None。"""
+        matches = list(SEGMENT_PATTERN.finditer(response))
+        if [int(match.group(1)) for match in matches] != list(range(expected)):
+            LOG.warning(f"批量翻译的回复无法按 {expected} 段拆分，实际标记: "
+                        f"{[match.group(1) for match in matches]}")
+            return None
+
+        parts = []
+        for idx, match in enumerate(matches):
+            end = matches[idx + 1].start() if idx + 1 < len(matches) else len(response)
+            part = response[match.end():end].strip()
+            if not part:
+                LOG.warning(f"批量翻译的回复中第 {idx} 段为空")
+                return None
+            parts.append(part)
+        return parts
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+from utils import LOG
+
+JOURNAL_VERSION = 1
+
+
+class TranslationJournal:
+    """追加写入的翻译日志，每翻译完一个 content 就落盘一条记录，用于中断后续跑。"""
+
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        self._file = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path_for(pdf_file_path: str, output_file_path: str = None) -> str:
+        # 日志放在译文旁边，且与输出格式无关，换格式后同样可以续跑
+        if output_file_path is not None:
+            return os.path.splitext(output_file_path)[0] + '.journal.jsonl'
+        return pdf_file_path.replace('.pdf', '_translated.journal.jsonl')
+
+    @staticmethod
+    def fingerprint(content) -> str:
+        original = content.original if isinstance(content.original, str) else str(content)
+        payload = f"{content.content_type.name}\n{original}"
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def open(self, header: dict, resume: bool = False, incremental: bool = False,
+             base_journal_path: str = None) -> dict:
+        """打开日志文件。resume 或 incremental 时返回已完成的记录：{(page_idx, content_idx): (fingerprint, translation, status)}"""
+        header = {"type": "header", "version": JOURNAL_VERSION, **header}
+        if incremental:
+            return self._open_incremental(header, base_journal_path)
+        finished = self.load(header) if resume else {}
+
+        if finished:
+            self._file = open(self.journal_path, 'a', encoding='utf-8')
+        else:
+            # 没有可复用的记录时重新开始，写入新的文件头
+            self._file = open(self.journal_path, 'w', encoding='utf-8')
+            self._write(header)
+        return finished
+
+    def _open_incremental(self, header: dict, base_journal_path: str = None) -> dict:
+        # 原文修订后页面位置会变化，本次按新的位置重写日志；上次的日志先移到 .prev，
+        # 中途中断时 .prev 仍保留，再次运行时与未写完的日志一并读取
+        prev_path = self.journal_path + '.prev'
+        finished = {}
+        for path in (base_journal_path, prev_path, self.journal_path):
+            if path is not None and os.path.exists(path):
+                finished.update(self.load(header, path))
+        if not finished:
+            LOG.info(f"没有可复用的翻译日志，从头开始翻译: {self.journal_path}")
+
+        if os.path.exists(self.journal_path):
+            os.replace(self.journal_path, prev_path)
+        self._file = open(self.journal_path, 'w', encoding='utf-8')
+        self._write(header)
+        return finished
+
+    def drop_previous(self):
+        # 增量翻译完成后，新日志已包含全部译文，不再需要上次的日志
+        prev_path = self.journal_path + '.prev'
+        if os.path.exists(prev_path):
+            os.remove(prev_path)
+
+    def load(self, header: dict, journal_path: str = None) -> dict:
+        journal_path = journal_path or self.journal_path
+        finished = {}
+        if not os.path.exists(journal_path):
+            LOG.info(f"未找到翻译日志，从头开始翻译: {journal_path}")
+            return finished
+
+        with open(journal_path, 'r', encoding='utf-8') as journal_file:
+            for line_no, line in enumerate(journal_file):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程中断时最后一行可能只写了一半，直接跳过
+                    LOG.warning(f"跳过无法解析的翻译日志第 {line_no + 1} 行")
+                    continue
+                if line_no == 0:
+                    if not self._header_matches(record, header):
+                        LOG.warning(f"翻译日志与本次任务的参数不一致，忽略该日志: {journal_path}")
+                        return {}
+                    continue
+                key = (record["page"], record["content"])
+                finished[key] = (record["fingerprint"], record["translation"], record["status"])
+
+        LOG.info(f"从翻译日志恢复 {len(finished)} 条已完成的翻译: {journal_path}")
+        return finished
+
+    @staticmethod
+    def _header_matches(record: dict, header: dict) -> bool:
+        keys = ("type", "version", "target_language", "parse_type")
+        return all(record.get(key) == header.get(key) for key in keys)
+
+    def record(self, page_idx: int, content_idx: int, content, translation, status: bool, fingerprint: str = None):
+        self._write({
+            "page": page_idx,
+            "content": content_idx,
+            "fingerprint": fingerprint or TranslationJournal.fingerprint(content),
+            "translation": translation,
+            "status": status,
+        })
+
+    def _write(self, record: dict):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class TranslationMemory:
+    """上次翻译的译文，按原文指纹索引：原文未变的 content 无论移到了哪一页、第几块，都直接沿用旧译文。"""
+
+    def __init__(self, finished: dict):
+        # (page_idx, content_idx) -> 上次该位置的原文指纹，只用于区分 未变/移动/修改/新增
+        self.positions = {key: record[0] for key, record in finished.items()}
+        self.translations = {fingerprint: (translation, status)
+                             for fingerprint, translation, status in finished.values()}
+        self.counts = {"unchanged": 0, "moved": 0, "changed": 0, "added": 0}
+        self._used = set()
+
+    def lookup(self, page_idx: int, content_idx: int, fingerprint: str) -> Optional[tuple]:
+        previous = self.positions.get((page_idx, content_idx))
+        carried = self.translations.get(fingerprint)
+        if carried is not None:
+            self._used.add(fingerprint)
+            self.counts["unchanged" if previous == fingerprint else "moved"] += 1
+        else:
+            self.counts["added" if previous is None else "changed"] += 1
+        return carried
+
+    def stats(self) -> dict:
+        return {**self.counts, "removed": len(self.translations.keys() - self._used)}
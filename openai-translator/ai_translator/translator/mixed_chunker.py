@@ -0,0 +1,146 @@
+import re
+from typing import List, Optional
+
+from book import ContentType, Table
+from prompt.constants import system_prompt
+from utils import count_tokens
+
+# 各模型的上下文窗口（token），按前缀匹配，未知模型（如 ChatGLM 的 URL）使用默认值
+MODEL_CONTEXT_TOKENS = {
+    "gpt-3.5-turbo-16k": 16384,
+    "gpt-3.5-turbo": 4096,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+}
+DEFAULT_CONTEXT_TOKENS = 4096
+# 结构化译文（JSON + 中文）约为原文 token 数的两倍，另留出消息格式的余量
+OUTPUT_RATIO = 2
+RESERVED_TOKENS = 100
+
+# layout 模式的文本中，3 个以上的连续空格只用于对齐，压缩为 2 个，仍能区分表格的列
+_SPACE_RUN = re.compile(r" {3,}")
+# 含有列间距的行视为表格行
+_COLUMN_GAP = re.compile(r"\S {2,}\S")
+_COLUMN_SPLIT = re.compile(r" {2,}")
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+
+
+class MixedChunker:
+    """BEHIND 模式的分块：压缩 layout 文本中的对齐空白，超出 token 预算的页面在段落/表格边界处切分，
+    各块分别翻译后再按顺序拼回。"""
+
+    def __init__(self, max_tokens: int, model_name: Optional[str] = None):
+        self.max_tokens = max_tokens
+        self.model_name = model_name
+
+    @staticmethod
+    def budget_for(model_name: Optional[str] = None, target_language: str = '中文') -> int:
+        # 每块原文的 token 预算：上下文窗口扣除系统提示词后，按 原文 + 译文 分配
+        context = DEFAULT_CONTEXT_TOKENS
+        for prefix in sorted(MODEL_CONTEXT_TOKENS, key=len, reverse=True):
+            if model_name and model_name.startswith(prefix):
+                context = MODEL_CONTEXT_TOKENS[prefix]
+                break
+        available = context - count_tokens(system_prompt(target_language), model_name) - RESERVED_TOKENS
+        return max(available // (1 + OUTPUT_RATIO), 1)
+
+    @staticmethod
+    def compact(text: str) -> str:
+        lines = [_SPACE_RUN.sub("  ", line.rstrip()) for line in text.splitlines()]
+        # 去掉所有行共同的缩进
+        indents = [len(line) - len(line.lstrip(" ")) for line in lines if line]
+        indent = min(indents, default=0)
+        compacted = []
+        for line in lines:
+            line = line[indent:]
+            # 连续的空行只保留一个
+            if line or (compacted and compacted[-1]):
+                compacted.append(line)
+        return "\n".join(compacted).strip("\n")
+
+    @staticmethod
+    def split_units(text: str) -> List[str]:
+        """按空行切分为段落；相邻的表格行（layout 模式下行间有空行）合并为一个表格单元，不在表格内部切分。"""
+        units = []
+        in_table = False
+        for paragraph in text.split("\n\n"):
+            lines = paragraph.split("\n")
+            is_table = all(_COLUMN_GAP.search(line) for line in lines)
+            if is_table and in_table:
+                units[-1] += "\n" + paragraph
+            else:
+                units.append(paragraph)
+            in_table = is_table
+        return units
+
+    def tokens(self, text: str) -> int:
+        return count_tokens(text, self.model_name)
+
+    def split(self, text: str) -> List[str]:
+        """压缩后按预算切分为若干块，页面没有内容时返回空列表。"""
+        text = self.compact(text)
+        if not text:
+            return []
+        if self.tokens(text) <= self.max_tokens:
+            return [text]
+
+        chunks = []
+        chunk, chunk_tokens = [], 0
+        for unit in self.split_units(text):
+            for piece in self._fit(unit):
+                tokens = self.tokens(piece)
+                if chunk and chunk_tokens + tokens > self.max_tokens:
+                    chunks.append("\n\n".join(chunk))
+                    chunk, chunk_tokens = [], 0
+                chunk.append(piece)
+                chunk_tokens += tokens
+        if chunk:
+            chunks.append("\n\n".join(chunk))
+        return chunks
+
+    def _fit(self, unit: str) -> List[str]:
+        # 单个段落或表格超出预算时才在其内部切分：表格按行切分并在每块重复表头，段落按句子切分
+        if self.tokens(unit) <= self.max_tokens:
+            return [unit]
+        lines = unit.split("\n")
+        columns = [len(_COLUMN_SPLIT.split(line)) for line in lines]
+        if len(lines) > 1 and min(columns) > 1:
+            # 列数最多的第一行是表头，之前的行是表格标题
+            header_idx = columns.index(max(columns))
+            header = lines[header_idx]
+            pieces = self._pack(lines[header_idx + 1:], self.tokens(header))
+            pieces = [[header] + piece for piece in pieces] or [[header]]
+            pieces[0] = lines[:header_idx] + pieces[0]
+            return ["\n".join(piece) for piece in pieces]
+        # 段落的各句用空格连接，单句仍超出预算时整句独占一块
+        sentences = [sentence for line in lines for sentence in _SENTENCE_END.split(line) if sentence]
+        return [" ".join(piece) for piece in self._pack(sentences)]
+
+    def _pack(self, parts: List[str], reserved_tokens: int = 0) -> List[list]:
+        pieces = []
+        piece, piece_tokens = [], reserved_tokens
+        for part in parts:
+            tokens = self.tokens(part)
+            if piece and piece_tokens + tokens > self.max_tokens:
+                pieces.append(piece)
+                piece, piece_tokens = [], reserved_tokens
+            piece.append(part)
+            piece_tokens += tokens
+        if piece:
+            pieces.append(piece)
+        return pieces
+
+    @staticmethod
+    def stitch(chunk_blocks: List[list]) -> list:
+        """按顺序拼接各块解析后的译文；块边界两侧列名相同的表格是同一个表格被切开，合并为一个。"""
+        blocks = []
+        for chunk_idx, chunk in enumerate(chunk_blocks):
+            for block_idx, (block_type, value) in enumerate(chunk):
+                if (chunk_idx and block_idx == 0 and blocks and block_type == ContentType.TABLE
+                        and blocks[-1][0] == ContentType.TABLE and blocks[-1][1].column_names == value.column_names):
+                    previous = blocks[-1][1]
+                    blocks[-1] = (ContentType.TABLE, Table(previous.cells + value.cells, previous.n_rows + value.n_rows,
+                                                           previous.n_cols, previous.columns))
+                    continue
+                blocks.append((block_type, value))
+        return blocks
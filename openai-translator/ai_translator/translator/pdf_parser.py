@@ -1,11 +1,21 @@
+import bisect
+import itertools
+import math
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum, auto
 
-import pdfplumber
-from typing import Optional
+from typing import Iterator, List, Optional, Union
 from book import Book, Page, Content, ContentType, TableContent
 from book.content import MixedContent
+from translator.book_cache import BookCache
 from translator.exceptions import PageOutOfRangeException
-from utils import LOG
+from utils import LOG, parse_page_ranges
+
+# 多进程解析时每个进程平均分到的分片数
+PARSE_SHARDS_PER_WORKER = 4
+# 解析逻辑的版本号，修改解析结果后需递增，使旧的解析缓存失效
+PARSER_VERSION = 2
 
 
 class ParserType(Enum):
@@ -15,59 +25,170 @@ class ParserType(Enum):
 
 class PDFParser:
     @staticmethod
-    def parse_pdf(pdf_file_path: str, pages: Optional[int] = None,
-                  parse_type: Optional[ParserType] = ParserType.AHEAD) -> Book:
+    def parse_pdf(pdf_file_path: str, pages: Optional[Union[int, str]] = None,
+                  parse_type: Optional[ParserType] = ParserType.AHEAD, workers: int = 1,
+                  book_cache: Optional[BookCache] = None) -> Book:
+        parsed_pages = PDFParser._iter_parsed_pages(pdf_file_path, pages, parse_type, workers)
+        if book_cache is not None:
+            key = book_cache.key(pdf_file_path, pages, parse_type.value, PARSER_VERSION)
+            # 命中解析缓存时直接返回按需加载页面的 book
+            book = book_cache.load(key, pdf_file_path)
+            if book is not None:
+                return book
+            parsed_pages = book_cache.store(key, parsed_pages)
+
         # 构建book变量，初始化page数组
         book = Book(pdf_file_path)
 
-        with pdfplumber.open(pdf_file_path) as pdf:
+        for page in parsed_pages:
+            book.add_page(page)
+
+        return book
+
+    @staticmethod
+    def iter_pages(pdf_file_path: str, pages: Optional[Union[int, str]] = None,
+                   parse_type: Optional[ParserType] = ParserType.AHEAD, workers: int = 1,
+                   book_cache: Optional[BookCache] = None) -> Iterator[Page]:
+        if book_cache is None:
+            yield from PDFParser._iter_parsed_pages(pdf_file_path, pages, parse_type, workers)
+            return
+
+        key = book_cache.key(pdf_file_path, pages, parse_type.value, PARSER_VERSION)
+        book = book_cache.load(key, pdf_file_path)
+        if book is not None:
+            # 逐页读取缓存，翻译写出后的页面不留在内存中
+            yield from book.pages.stream()
+            return
+        # 未命中时边解析边写入缓存，下次直接读取
+        yield from book_cache.store(key, PDFParser._iter_parsed_pages(pdf_file_path, pages, parse_type, workers))
+
+    @staticmethod
+    def select_pages(pages: Optional[Union[int, str]], total_pages: int) -> List[int]:
+        """确定要解析的页（从 0 开始的页码）：None 为全部页，整数为前 N 页，字符串为页码范围，如 "10-40,55"。"""
+        if pages is None:
+            return list(range(total_pages))
+        if isinstance(pages, int):
             # 校验pages参数的合法性
-            if pages is not None and pages > len(pdf.pages):
-                raise PageOutOfRangeException(len(pdf.pages), pages)
+            if pages > total_pages or pages < 1:
+                raise PageOutOfRangeException(total_pages, pages)
+            return list(range(pages))
 
-            # 确定要解析、翻译的page数
-            if pages is None:
-                pages_to_parse = pdf.pages
-            else:
-                pages_to_parse = pdf.pages[:pages]
+        selected = set()
+        for start, end in parse_page_ranges(pages):
+            # "100-" 这样的开放区间也要校验起始页，否则 50 页的书会什么都不选，输出空文件
+            if start > total_pages:
+                raise PageOutOfRangeException(total_pages, start)
+            end = total_pages if end is None else end
+            if end > total_pages:
+                raise PageOutOfRangeException(total_pages, end)
+            selected.update(range(start - 1, end))
+        if not selected:
+            raise PageOutOfRangeException(total_pages, pages)
+        return sorted(selected)
 
-            for pdf_page in pages_to_parse:
-                page = Page()
-                match parse_type:
-                    case ParserType.AHEAD:
-                        PDFParser.parse_ahead(page, pdf_page)
-                    case ParserType.BEHIND:
-                        PDFParser.parse_behind(page, pdf_page)
+    @staticmethod
+    def _iter_parsed_pages(pdf_file_path: str, pages: Optional[Union[int, str]], parse_type: ParserType,
+                           workers: int) -> Iterator[Page]:
+        # pdfplumber 只在真正解析时导入，命中解析缓存时不必加载
+        import pdfplumber
 
-                book.add_page(page)
+        # 逐页解析并产出 Page，调用方处理完一页后即可释放该页
+        with pdfplumber.open(pdf_file_path) as pdf:
+            # 确定要解析、翻译的page
+            page_indices = PDFParser.select_pages(pages, len(pdf.pages))
 
-        return book
+            if workers <= 1 or len(page_indices) <= 1:
+                for page_idx in page_indices:
+                    yield PDFParser.parse_page(pdf.pages[page_idx], parse_type)
+                return
+
+        yield from PDFParser._iter_pages_parallel(pdf_file_path, page_indices, parse_type, workers)
+
+    @staticmethod
+    def _iter_pages_parallel(pdf_file_path: str, page_indices: List[int], parse_type: ParserType,
+                             workers: int) -> Iterator[Page]:
+        # 按页码分片，每个子进程独立打开 pdf 解析；分片切得比进程数更细，便于负载均衡
+        pages_to_parse = len(page_indices)
+        shard_size = max(1, math.ceil(pages_to_parse / (workers * PARSE_SHARDS_PER_WORKER)))
+        shards = iter([page_indices[start:start + shard_size] for start in range(0, pages_to_parse, shard_size)])
+        LOG.info(f"多进程解析 {pages_to_parse} 页, workers={workers}, 每个分片 {shard_size} 页")
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 只保持有限个分片在途，按提交顺序取回结果，保证页序不变且内存有界
+            pending = deque(
+                executor.submit(_parse_pages, pdf_file_path, shard, parse_type)
+                for shard in itertools.islice(shards, workers * 2)
+            )
+            try:
+                while pending:
+                    parsed_pages = pending.popleft().result()
+                    for shard in itertools.islice(shards, 1):
+                        pending.append(executor.submit(_parse_pages, pdf_file_path, shard, parse_type))
+                    yield from parsed_pages
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    @staticmethod
+    def parse_page(pdf_page, parse_type: ParserType) -> Page:
+        page = Page()
+        match parse_type:
+            case ParserType.AHEAD:
+                PDFParser.parse_ahead(page, pdf_page)
+            case ParserType.BEHIND:
+                PDFParser.parse_behind(page, pdf_page)
+        # 释放 pdfplumber 为该页缓存的字符、图形等对象，避免内存随页数增长
+        pdf_page.flush_cache()
+        return page
 
     @staticmethod
     def parse_ahead(page, pdf_page):
-        # Store the original text content
-        raw_text = pdf_page.extract_text()
-        tables = pdf_page.extract_tables()
-        # Remove each cell's content from the original text
-        for table_data in tables:
-            for row in table_data:
-                for cell in row:
-                    raw_text = raw_text.replace(cell, "", 1)
-        # Handling text
-        if raw_text:
-            # Remove empty lines and leading/trailing whitespaces
-            raw_text_lines = raw_text.splitlines()
-            cleaned_raw_text_lines = [line.strip() for line in raw_text_lines if line.strip()]
-            cleaned_raw_text = "\n".join(cleaned_raw_text_lines)
-
-            text_content = Content(content_type=ContentType.TEXT, original=cleaned_raw_text)
-            page.add_content(text_content)
-            LOG.debug(f"[raw_text]\n {cleaned_raw_text}")
-        # Handling tables
-        if tables:
-            table = TableContent(tables)
-            page.add_content(table)
-            LOG.debug(f"[table]\n{table}")
+        from pdfplumber.utils import extract_text
+
+        # 一次遍历页面上的所有字符：落在表格单元格内的字符归入该单元格，其余字符按纵向位置分到各表格之间的文本段，
+        # 文本段与表格按阅读顺序（自上而下）交替加入 page
+        tables = sorted(pdf_page.find_tables(), key=lambda table: (table.bbox[1], table.bbox[0]))
+        if not tables:
+            PDFParser._add_text(page, pdf_page.extract_text())
+            return
+
+        grids = [TableGrid(table) for table in tables]
+        tops = [grid.bbox[1] for grid in grids]
+        segments = [[] for _ in range(len(grids) + 1)]
+        for char in pdf_page.chars:
+            x = (char["x0"] + char["x1"]) / 2
+            y = (char["top"] + char["bottom"]) / 2
+            for grid in grids:
+                if grid.add_char(char, x, y):
+                    break
+            else:
+                # 第 i 段是第 i 个表格上方（第 i-1 个表格之后）的文本
+                segments[bisect.bisect_right(tops, y)].append(char)
+
+        for table_idx, chars in enumerate(segments):
+            if chars:
+                PDFParser._add_text(page, extract_text(chars))
+            if table_idx < len(grids):
+                table_data = grids[table_idx].extract()
+                if table_data:
+                    table = TableContent(table_data)
+                    page.add_content(table)
+                    LOG.debug(f"[table]\n{table}")
+
+    @staticmethod
+    def _add_text(page, raw_text: Optional[str]):
+        if not raw_text:
+            return
+        # Remove empty lines and leading/trailing whitespaces
+        raw_text_lines = raw_text.splitlines()
+        cleaned_raw_text_lines = [line.strip() for line in raw_text_lines if line.strip()]
+        if not cleaned_raw_text_lines:
+            return
+        cleaned_raw_text = "\n".join(cleaned_raw_text_lines)
+
+        text_content = Content(content_type=ContentType.TEXT, original=cleaned_raw_text)
+        page.add_content(text_content)
+        LOG.debug(f"[raw_text]\n {cleaned_raw_text}")
 
     @staticmethod
     def parse_behind(page, pdf_page):
@@ -75,3 +196,58 @@ class PDFParser:
         content = MixedContent(ContentType.MIXED, text)
         page.add_content(content)
         pass
+
+
+class TableGrid:
+    """pdfplumber 表格的单元格索引：按单元格边界切成网格，用二分查找把字符定位到单元格。
+
+    与 Table.extract() 的结果一致（字符中点落在单元格内即属于该单元格），
+    但只需对每个字符做两次二分查找，而不是对每一行、每个单元格都重新过滤一遍字符。
+    """
+
+    def __init__(self, table):
+        self.bbox = table.bbox
+        rows = [row.cells for row in table.rows]
+        cells = [cell for row in rows for cell in row if cell is not None]
+        self.xs = sorted({cell[0] for cell in cells} | {cell[2] for cell in cells})
+        self.ys = sorted({cell[1] for cell in cells} | {cell[3] for cell in cells})
+        # 网格 (y 序号, x 序号) -> (行号, 列号)；合并单元格会覆盖多个网格
+        self.slots = {}
+        for row_idx, row in enumerate(rows):
+            for col_idx, cell in enumerate(row):
+                if cell is None:
+                    continue
+                x0, top, x1, bottom = cell
+                for yi in range(bisect.bisect_left(self.ys, top), bisect.bisect_left(self.ys, bottom)):
+                    for xi in range(bisect.bisect_left(self.xs, x0), bisect.bisect_left(self.xs, x1)):
+                        self.slots[(yi, xi)] = (row_idx, col_idx)
+        self.layout = [[cell is not None for cell in row] for row in rows]
+        self.cell_chars = {}
+
+    def add_char(self, char, x: float, y: float) -> bool:
+        """字符位于表格范围内时返回 True（并归入所在单元格），否则返回 False。"""
+        x0, top, x1, bottom = self.bbox
+        if not (x0 <= x < x1 and top <= y < bottom):
+            return False
+        slot = self.slots.get((bisect.bisect_right(self.ys, y) - 1, bisect.bisect_right(self.xs, x) - 1))
+        if slot is not None:
+            self.cell_chars.setdefault(slot, []).append(char)
+        return True
+
+    def extract(self) -> list:
+        from pdfplumber.utils import extract_text
+
+        # 合并单元格等空单元格 pdfplumber 返回 None，这里统一为空字符串
+        return [
+            [extract_text(self.cell_chars.get((row_idx, col_idx), [])) if present else ""
+             for col_idx, present in enumerate(row)]
+            for row_idx, row in enumerate(self.layout)
+        ]
+
+
+def _parse_pages(pdf_file_path: str, page_indices: List[int], parse_type: ParserType) -> List[Page]:
+    # 子进程入口，需定义在模块顶层才能被 pickle
+    import pdfplumber
+
+    with pdfplumber.open(pdf_file_path) as pdf:
+        return [PDFParser.parse_page(pdf.pages[page_idx], parse_type) for page_idx in page_indices]
@@ -1,38 +1,308 @@
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Optional, Union
+from book.mixed_blocks import parse_mixed_blocks, dump_mixed_blocks
 from model import Model
 from prompt.prompt_template import PromptTemplate
+from translator.book_cache import BookCache
+from translator.content_batcher import ContentBatcher
+from translator.journal import TranslationJournal, TranslationMemory
+from translator.mixed_chunker import MixedChunker
 from translator.pdf_parser import PDFParser, ParserType
 from translator.writer import Writer
 from utils import LOG
 
+# BEHIND 模式的结构化译文无法解析时，带上错误原因重新请求的次数
+MAX_REASKS = 2
+
 
 class PDFTranslator:
-    def __init__(self, model: Model):
+    def __init__(self, model: Model, max_workers: int = 1, parse_workers: int = 1, batch_tokens: int = 0,
+                 book_cache: Optional[BookCache] = None, chunk_tokens: Optional[int] = None,
+                 executor: Optional[ThreadPoolExecutor] = None, model_name: Optional[str] = None):
         self.model = model
+        # 同时在途的翻译请求数，1 表示逐条串行翻译
+        self.max_workers = max(1, max_workers)
+        # 批量翻译时多本书共用的请求线程池，为 None 时每本书各自创建
+        self.executor = executor
+        # 解析 pdf 的进程数，1 表示在当前进程内逐页解析
+        self.parse_workers = max(1, parse_workers)
+        # 批量翻译的 token 预算，0 表示每个内容单独请求
+        self.batcher = ContentBatcher(batch_tokens) if batch_tokens > 0 else None
+        # 解析结果缓存，同一本书换语言或格式再次翻译时不必重新解析
+        self.book_cache = book_cache
+        # BEHIND 模式每次请求的原文 token 预算，超出时按段落/表格切分后并发翻译；
+        # 为空时在翻译 BEHIND 模式的书时按模型的上下文窗口计算，AHEAD 模式不必加载 tiktoken
+        self.chunk_tokens = chunk_tokens
+        self.model_name = model_name
+        self.chunker = None
+        # 正在使用的请求线程池，页面切分出的各块也提交到这里，在途请求数不超过线程池大小
+        self._pool = None
 
     def translate_pdf(self, pdf_file_path: str, file_format: str = 'PDF', target_language: str = '中文',
-                      output_file_path: str = None, pages: Optional[int] = None,
-                      parse_type: Optional[ParserType] = ParserType.AHEAD):
-        # 解析pdf并封装单book变量中
-        book = PDFParser.parse_pdf(pdf_file_path, pages, parse_type)
+                      output_file_path: str = None, pages: Optional[Union[int, str]] = None,
+                      parse_type: Optional[ParserType] = ParserType.AHEAD, resume: bool = False,
+                      stream: bool = False, incremental: bool = False, base_journal_path: str = None):
+        # 翻译日志：每完成一个 content 就追加一条记录，resume 时复用已完成的翻译
+        journal = TranslationJournal(TranslationJournal.path_for(pdf_file_path, output_file_path))
+        finished = journal.open({"pdf_file_path": pdf_file_path, "target_language": target_language,
+                                 "parse_type": parse_type.value}, resume=resume, incremental=incremental,
+                                base_journal_path=base_journal_path)
+        # 增量翻译：按原文指纹对比上次的翻译结果，只翻译修改和新增的内容，移动过的内容同样沿用旧译文
+        if parse_type == ParserType.BEHIND:
+            budget = self.chunk_tokens or MixedChunker.budget_for(self.model_name, target_language)
+            self.chunker = MixedChunker(budget, self.model_name)
+        memory = None
+        if incremental:
+            memory = TranslationMemory(finished)
+            finished = {}
+        try:
+            if stream:
+                self._translate_stream(pdf_file_path, file_format, target_language, output_file_path, pages,
+                                       parse_type, journal, finished, memory)
+            else:
+                # 解析pdf并封装单book变量中
+                book = PDFParser.parse_pdf(pdf_file_path, pages, parse_type, self.parse_workers, self.book_cache)
+                self._translate_book(book, target_language, parse_type, journal, finished, memory)
+        finally:
+            journal.close()
+
+        if memory is not None:
+            journal.drop_previous()
+            LOG.info(f"增量翻译统计: {memory.stats()}")
+        if stream:
+            return
+
+        Writer.save_translated_book(book, output_file_path, file_format)
 
+    def _translate_book(self, book, target_language: str, parse_type: ParserType, journal, finished: dict,
+                        memory: Optional[TranslationMemory] = None):
+        # 收集所有待翻译的 content，记录其在 book 中的位置
+        tasks = []
+        replayed = 0
         for page_idx, page in enumerate(book.pages):
-            for content_idx, content in enumerate(page.contents):
-                if content.original is None or content.original == '':
+            page_tasks, page_replayed = self._collect_tasks(page_idx, page, finished, memory, journal)
+            tasks.extend(page_tasks)
+            replayed += page_replayed
+
+        if finished or memory is not None:
+            LOG.info(f"复用 {replayed} 条已有的翻译，剩余 {len(tasks)} 个内容块待翻译")
+
+        units = self._make_units(tasks, parse_type)
+        if self.executor is None and self.max_workers == 1:
+            for unit in units:
+                results = self._translate_unit(unit, target_language, parse_type)
+                self._apply_translations(journal, unit, results)
+        else:
+            self._translate_concurrently(journal, units, target_language, parse_type)
+
+    def _translate_stream(self, pdf_file_path: str, file_format, target_language: str, output_file_path: str,
+                          pages: Optional[Union[int, str]], parse_type: ParserType, journal, finished: dict,
+                          memory: Optional[TranslationMemory] = None):
+        # 边解析、边翻译、边写出：同一时刻最多只有 max_workers 页在内存中等待翻译
+        page_writer = Writer.open(pdf_file_path, output_file_path, file_format, flush=True)
+        executor = self.executor
+        if executor is None and self.max_workers > 1:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._pool = executor
+        window = deque()
+        try:
+            for page_idx, page in enumerate(PDFParser.iter_pages(pdf_file_path, pages, parse_type,
+                                                                     self.parse_workers, self.book_cache)):
+                tasks, _ = self._collect_tasks(page_idx, page, finished, memory, journal)
+                units = self._make_units(tasks, parse_type)
+                if executor is None:
+                    for unit in units:
+                        results = self._translate_unit(unit, target_language, parse_type)
+                        self._apply_translations(journal, unit, results)
+                    page_writer.write_page(page)
                     continue
-                match parse_type:
-                    case ParserType.AHEAD:
-                        prompt = PromptTemplate.translate_prompt(content, target_language)
-                        translation, status = self.model.make_request(prompt)
-                    case ParserType.BEHIND:
-                        prompt = PromptTemplate.translate_messages(content, target_language)
-                        translation, status = self.model.make_request_by_message(prompt)
-                    case _:
-                        raise Exception("parse type error!")
-                LOG.debug(prompt)
-                LOG.info(translation)
-
-                # Update the content in self.book.pages directly
-                book.pages[page_idx].contents[content_idx].set_translation(translation, status)
 
-        Writer.save_translated_book(book, output_file_path, file_format)
+                futures = {
+                    executor.submit(self._translate_unit, unit, target_language, parse_type): unit
+                    for unit in units
+                }
+                window.append((page, futures))
+                if len(window) > self.max_workers:
+                    self._write_finished_page(window.popleft(), page_writer, journal)
+
+            while window:
+                self._write_finished_page(window.popleft(), page_writer, journal)
+        except Exception:
+            # 任一请求失败时取消尚未开始的请求，避免继续消耗 token
+            for _, futures in window:
+                for future in futures:
+                    future.cancel()
+            page_writer.close()
+            raise
+        finally:
+            self._pool = None
+            if executor is not None and executor is not self.executor:
+                executor.shutdown(wait=True)
+
+        page_writer.end()
+        LOG.info(f"翻译完成: {page_writer.output_file_path}")
+
+    def _write_finished_page(self, pending_page, page_writer, journal):
+        page, futures = pending_page
+        for future in as_completed(futures):
+            self._apply_translations(journal, futures[future], future.result())
+        page_writer.write_page(page)
+
+    def _translate_concurrently(self, journal, units, target_language: str, parse_type: ParserType):
+        LOG.info(f"并发翻译 {sum(len(unit) for unit in units)} 个内容块（{len(units)} 个请求）, "
+                 f"max_workers={self.max_workers}")
+        with self._request_executor() as executor:
+            futures = {
+                executor.submit(self._translate_unit, unit, target_language, parse_type): unit
+                for unit in units
+            }
+            try:
+                for future in as_completed(futures):
+                    self._apply_translations(journal, futures[future], future.result())
+            except Exception:
+                # 任一请求失败时取消尚未开始的请求，避免继续消耗 token
+                for future in futures:
+                    future.cancel()
+                raise
+
+    @contextmanager
+    def _request_executor(self):
+        if self.executor is not None:
+            # 共用的线程池由批量翻译统一关闭
+            self._pool = self.executor
+            try:
+                yield self.executor
+            finally:
+                self._pool = None
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._pool = executor
+            try:
+                yield executor
+            finally:
+                self._pool = None
+
+    @staticmethod
+    def _collect_tasks(page_idx: int, page, finished: dict, memory: Optional[TranslationMemory] = None,
+                       journal=None):
+        tasks = []
+        replayed = 0
+        for content_idx, content in enumerate(page.contents):
+            if content.original is None or (isinstance(content.original, str) and content.original == ''):
+                continue
+            fingerprint = TranslationJournal.fingerprint(content)
+            record = finished.get((page_idx, content_idx))
+            if record is not None and record[0] == fingerprint:
+                # 原文未变，直接回放日志中的译文
+                content.set_translation(record[1], record[2])
+                replayed += 1
+                continue
+            carried = memory.lookup(page_idx, content_idx, fingerprint) if memory is not None else None
+            if carried is not None:
+                content.set_translation(*carried)
+                # 日志按本次的位置重写，下次增量翻译以本次结果为基准
+                journal.record(page_idx, content_idx, content, *carried, fingerprint=fingerprint)
+                replayed += 1
+                continue
+            tasks.append((page_idx, content_idx, content))
+        return tasks, replayed
+
+    def _make_units(self, tasks: list, parse_type: ParserType) -> list:
+        # 一个 unit 对应一次模型请求；BEHIND 模式的结构化输出不参与批量翻译
+        if self.batcher is None or parse_type != ParserType.AHEAD:
+            return [[task] for task in tasks]
+        return self.batcher.make_batches(tasks)
+
+    @staticmethod
+    def _apply_translations(journal, unit: list, results: list):
+        for (page_idx, content_idx, content), (translation, status, blocks) in zip(unit, results):
+            # content 即 book.pages[page_idx].contents[content_idx]，直接写回译文；
+            # BEHIND 模式的译文在请求时已解析为 blocks，不必再解析一次，translation 只用于写日志
+            if blocks is not None:
+                content.set_blocks(blocks, status)
+            else:
+                content.set_translation(translation, status)
+            # 只记录成功的翻译，失败的内容在续跑时会重新请求
+            if status:
+                journal.record(page_idx, content_idx, content, translation, status)
+
+    def _translate_unit(self, unit: list, target_language: str, parse_type: ParserType) -> list:
+        if len(unit) == 1:
+            return [self._translate_content(unit[0][2], target_language, parse_type)]
+
+        contents = [content for _, _, content in unit]
+        prompt = PromptTemplate.make_batch_prompt(contents, target_language)
+        translation, status = self.model.make_request(prompt)
+        LOG.debug(prompt)
+        LOG.info(translation)
+        parts = ContentBatcher.split_response(translation, len(contents)) if status else None
+        if parts is None:
+            # 回复无法拆回各段时退回逐个请求
+            LOG.warning(f"批量翻译 {len(contents)} 个内容块失败，改为逐个翻译")
+            return [self._translate_content(content, target_language, parse_type) for content in contents]
+        return [(part, status, None) for part in parts]
+
+    def _translate_content(self, content, target_language: str, parse_type: ParserType):
+        match parse_type:
+            case ParserType.AHEAD:
+                prompt = PromptTemplate.translate_prompt(content, target_language)
+                translation, status = self.model.make_request(prompt)
+                blocks = None
+            case ParserType.BEHIND:
+                prompt = content.original
+                translation, status, blocks = self._translate_mixed(content, target_language)
+            case _:
+                raise Exception("parse type error!")
+        LOG.debug(prompt)
+        LOG.info(translation)
+        return translation, status, blocks
+
+    def _translate_mixed(self, content, target_language: str):
+        chunks = self.chunker.split(content.original)
+        if not chunks:
+            # 只有空白的页面不必请求模型
+            return dump_mixed_blocks([]), True, []
+        messages_list = [PromptTemplate.make_text_messages(chunk, target_language) for chunk in chunks]
+        if len(chunks) == 1 or self._pool is None:
+            results = [self._request_mixed(messages) for messages in messages_list]
+        else:
+            LOG.info(f"页面超出 {self.chunker.max_tokens} token 的预算，分为 {len(chunks)} 块并发翻译")
+            # 当前线程已是请求线程池中的线程：其余各块提交到同一个线程池，不另开线程池，在途请求数仍受其大小限制；
+            # 还没被空闲线程取走的块由当前线程自己翻译，不会因等待排队中的块而死锁
+            futures = [self._pool.submit(self._request_mixed, messages) for messages in messages_list[1:]]
+            results = [self._request_mixed(messages_list[0])]
+            for future, messages in zip(futures, messages_list[1:]):
+                results.append(self._request_mixed(messages) if future.cancel() else future.result())
+
+        for translation, status, _ in results:
+            if not status:
+                # 任一块失败时整个内容视为失败，续跑时重新翻译
+                return translation, status, None
+        if len(results) == 1:
+            return results[0]
+        blocks = MixedChunker.stitch([blocks for _, _, blocks in results])
+        return dump_mixed_blocks(blocks), True, blocks
+
+    def _request_mixed(self, messages: list):
+        # 翻译时就解析并校验结构化译文，返回 (规范化的 JSON, 解析后的 blocks, status)：
+        # JSON 写入缓存和翻译日志，blocks 直接用于拼接和写回 content，每个回复只解析一次
+        translation, blocks, status, error = self.model.make_checked_request_by_message(
+            messages, PDFTranslator._check_mixed)
+        for attempt in range(MAX_REASKS):
+            if status or error is None:
+                return translation, status, blocks
+            LOG.warning(f"结构化译文解析失败，重新请求（第 {attempt + 1} 次）: {error}")
+            # 重新请求不读缓存（同样的修复请求命中缓存只会拿回同一个错误的回复），修好的译文记在原始请求名下
+            translation, blocks, status, error = self.model.make_checked_request_by_message(
+                PromptTemplate.make_repair_messages(messages, translation, error), PDFTranslator._check_mixed,
+                cache_as=messages)
+        if error is not None:
+            LOG.error(f"结构化译文解析失败，已重试 {MAX_REASKS} 次: {error}")
+        return translation, status, blocks
+
+    @staticmethod
+    def _check_mixed(translation: str):
+        blocks = parse_mixed_blocks(translation)
+        return dump_mixed_blocks(blocks), blocks
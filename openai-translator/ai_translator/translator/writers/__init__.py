@@ -0,0 +1,6 @@
+from .base import PageWriter, MultiPageWriter, WRITERS, register_writer, parse_formats, open_writer
+from .markdown_writer import MarkdownWriter
+from .pdf_writer import PdfWriter
+from .html_writer import HtmlWriter
+from .epub_writer import EpubWriter
+from .jsonl_writer import JsonlWriter
@@ -0,0 +1,155 @@
+import os
+from typing import List, Optional
+
+from book import Book, Page
+from utils import LOG
+
+# 输出文件的写缓冲区大小，每页的内容拼接成一个字符串后整块写入
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# 格式名 -> PageWriter 子类
+WRITERS = {}
+
+
+def register_writer(*names: str):
+    """注册输出后端，格式名不区分大小写。"""
+    def decorator(writer_class):
+        for name in names:
+            WRITERS[name.lower()] = writer_class
+        return writer_class
+    return decorator
+
+
+def parse_formats(file_format) -> List[str]:
+    # 支持 "markdown,jsonl" 或 ["markdown", "jsonl"]，一次翻译同时写出多种格式
+    names = file_format.split(',') if isinstance(file_format, str) else file_format
+    formats = []
+    for name in names:
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in WRITERS:
+            raise ValueError(f"Unsupported file format: {name}")
+        # md 与 markdown 等别名只写出一次
+        if all(WRITERS[name] is not WRITERS[existing] for existing in formats):
+            formats.append(name)
+    if not formats:
+        raise ValueError(f"Unsupported file format: {file_format}")
+    return formats
+
+
+class PageWriter:
+    """逐页写出译文的输出后端：begin() 打开输出，write_page() 追加一页，end() 收尾并关闭。
+
+    翻译一页写一页，流式翻译和整本导出共用同一套接口；子类通过 register_writer 注册格式名。
+    """
+
+    extension = None
+
+    def __init__(self, output_file_path: str, flush: bool = False):
+        self.output_file_path = output_file_path
+        # 流式翻译时每写完一页就 flush，翻译过程中即可看到部分译文
+        self.flush = flush
+        self.pages_written = 0
+        self._output_file = None
+
+    @classmethod
+    def default_path(cls, pdf_file_path: str) -> str:
+        return os.path.splitext(pdf_file_path)[0] + '_translated' + cls.extension
+
+    def begin(self):
+        self._output_file = open(self.output_file_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+        self._write(self.render_header())
+
+    def write_page(self, page: Page):
+        self._write(self.render_page(self.pages_written, page))
+        if self.flush:
+            self._output_file.flush()
+        self.pages_written += 1
+
+    def end(self):
+        try:
+            self._write(self.render_footer())
+        finally:
+            self.close()
+
+    def close(self):
+        if self._output_file is not None:
+            self._output_file.close()
+            self._output_file = None
+
+    def write_book(self, book: Book):
+        self.begin()
+        try:
+            for page in book.pages:
+                self.write_page(page)
+        except Exception:
+            self.close()
+            raise
+        self.end()
+
+    def render_header(self) -> str:
+        return ''
+
+    def render_page(self, page_idx: int, page: Page) -> str:
+        raise NotImplementedError
+
+    def render_footer(self) -> str:
+        return ''
+
+    def _write(self, text: str):
+        if text:
+            self._output_file.write(text)
+
+
+class MultiPageWriter(PageWriter):
+    """把每一页同时交给多个输出后端，一次翻译写出多种格式。"""
+
+    def __init__(self, writers: List[PageWriter]):
+        super().__init__(', '.join(writer.output_file_path for writer in writers))
+        self.writers = writers
+
+    def begin(self):
+        try:
+            for writer in self.writers:
+                writer.begin()
+        except Exception:
+            self.close()
+            raise
+
+    def write_page(self, page: Page):
+        for writer in self.writers:
+            writer.write_page(page)
+        self.pages_written += 1
+
+    def end(self):
+        error = None
+        for writer in self.writers:
+            try:
+                writer.end()
+            except Exception as e:
+                LOG.error(f"写出失败: {writer.output_file_path}: {e}")
+                error = error or e
+        if error is not None:
+            raise error
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+
+def open_writer(pdf_file_path: str, output_file_path: Optional[str] = None, file_format="markdown",
+                flush: bool = False) -> PageWriter:
+    formats = parse_formats(file_format)
+    writers = []
+    for name in formats:
+        writer_class = WRITERS[name]
+        if output_file_path is None:
+            path = writer_class.default_path(pdf_file_path)
+        elif len(formats) == 1:
+            path = output_file_path
+        else:
+            # 多种格式时 output_file_path 只作为文件名前缀，各格式使用自己的扩展名
+            path = os.path.splitext(output_file_path)[0] + writer_class.extension
+        writers.append(writer_class(path, flush=flush))
+    return writers[0] if len(writers) == 1 else MultiPageWriter(writers)
@@ -0,0 +1,99 @@
+import html
+import os
+import time
+import uuid
+import zipfile
+
+from book import Page
+from translator.writers.base import PageWriter, register_writer
+from translator.writers.html_writer import HTML_STYLE, page_to_html
+
+CONTAINER_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+'''
+
+PAGE_XHTML = '''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">
+<head><meta charset="utf-8"/><title>{title}</title><link rel="stylesheet" type="text/css" href="style.css"/></head>
+<body>
+{body}</body>
+</html>
+'''
+
+
+@register_writer("epub")
+class EpubWriter(PageWriter):
+    """EPUB 3 电子书：每页一个 XHTML 文件，写完一页就压缩进 zip，最后写入 content.opf 和目录。"""
+
+    extension = '.epub'
+
+    def __init__(self, output_file_path: str, flush: bool = False, language: str = "zh"):
+        super().__init__(output_file_path, flush)
+        self.language = language
+        self.title = os.path.splitext(os.path.basename(output_file_path))[0]
+        self._zip = None
+
+    def begin(self):
+        self._zip = zipfile.ZipFile(self.output_file_path, 'w')
+        # mimetype 必须是第一个文件且不压缩
+        self._zip.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        self._zip.writestr('META-INF/container.xml', CONTAINER_XML, compress_type=zipfile.ZIP_DEFLATED)
+        self._zip.writestr('OEBPS/style.css', HTML_STYLE, compress_type=zipfile.ZIP_DEFLATED)
+
+    def write_page(self, page: Page):
+        page_idx = self.pages_written
+        xhtml = PAGE_XHTML.format(title=f"{html.escape(self.title)} - {page_idx + 1}",
+                                  body=page_to_html(page_idx, page))
+        self._zip.writestr(self._page_name(page_idx), xhtml, compress_type=zipfile.ZIP_DEFLATED)
+        if self.flush:
+            self._zip.fp.flush()
+        self.pages_written += 1
+
+    def end(self):
+        try:
+            self._zip.writestr('OEBPS/nav.xhtml', self._render_nav(), compress_type=zipfile.ZIP_DEFLATED)
+            self._zip.writestr('OEBPS/content.opf', self._render_opf(), compress_type=zipfile.ZIP_DEFLATED)
+        finally:
+            self.close()
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    @staticmethod
+    def _page_name(page_idx: int, prefix: str = 'OEBPS/') -> str:
+        return f'{prefix}page-{page_idx + 1:05d}.xhtml'
+
+    def _render_nav(self) -> str:
+        items = ''.join(f'<li><a href="{self._page_name(page_idx, "")}">{page_idx + 1}</a></li>\n'
+                        for page_idx in range(self.pages_written))
+        body = f'<nav epub:type="toc" id="toc">\n<h1>{html.escape(self.title)}</h1>\n<ol>\n{items}</ol>\n</nav>\n'
+        return PAGE_XHTML.format(title=html.escape(self.title), body=body)
+
+    def _render_opf(self) -> str:
+        manifest = ''.join(f'    <item id="page-{page_idx + 1}" href="{self._page_name(page_idx, "")}" '
+                           f'media-type="application/xhtml+xml"/>\n' for page_idx in range(self.pages_written))
+        spine = ''.join(f'    <itemref idref="page-{page_idx + 1}"/>\n' for page_idx in range(self.pages_written))
+        modified = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        return f'''<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+    <dc:identifier id="book-id">urn:uuid:{uuid.uuid4()}</dc:identifier>
+    <dc:title>{html.escape(self.title)}</dc:title>
+    <dc:language>{self.language}</dc:language>
+    <meta property="dcterms:modified">{modified}</meta>
+  </metadata>
+  <manifest>
+    <item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>
+    <item id="style" href="style.css" media-type="text/css"/>
+{manifest}  </manifest>
+  <spine>
+{spine}  </spine>
+</package>
+'''
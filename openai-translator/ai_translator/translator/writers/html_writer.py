@@ -0,0 +1,54 @@
+import html
+import os
+
+from book import Page, ContentType
+from translator.writers.base import PageWriter, register_writer
+
+HTML_STYLE = ("body{max-width:48em;margin:2em auto;line-height:1.6}"
+              "table{border-collapse:collapse;margin:1em 0}"
+              "th,td{border:1px solid #999;padding:.3em .6em}th{background:#eee}"
+              "section.page+section.page{border-top:1px solid #ccc;margin-top:2em}")
+
+
+def text_to_html(text: str) -> str:
+    # 保留原文中的换行
+    return '<p>' + '<br/>'.join(html.escape(line) for line in text.split('\n')) + '</p>\n'
+
+
+def table_to_html(table) -> str:
+    # 单元格逐个转义后一次拼接，输出同时是合法的 XHTML，可直接用于 EPUB
+    header = ''.join(f'<th>{html.escape(str(column))}</th>' for column in table.column_names)
+    rows = ''.join('<tr>' + ''.join(f'<td>{html.escape("" if cell is None else str(cell))}</td>' for cell in row)
+                   + '</tr>\n' for row in table.iter_rows())
+    return f'<table>\n<thead><tr>{header}</tr></thead>\n<tbody>\n{rows}</tbody>\n</table>\n'
+
+
+def page_to_html(page_idx: int, page: Page) -> str:
+    parts = [f'<section class="page" id="page-{page_idx + 1}">\n']
+    for content in page.contents:
+        if content.status:
+            if content.content_type == ContentType.TEXT:
+                parts.append(text_to_html(content.translation))
+            elif content.content_type == ContentType.TABLE:
+                parts.append(table_to_html(content.translation))
+            elif content.content_type == ContentType.MIXED:
+                for block_type, value in content.translation:
+                    parts.append(text_to_html(value) if block_type == ContentType.TEXT else table_to_html(value))
+    parts.append('</section>\n')
+    return ''.join(parts)
+
+
+@register_writer("html")
+class HtmlWriter(PageWriter):
+    extension = '.html'
+
+    def render_header(self) -> str:
+        title = html.escape(os.path.splitext(os.path.basename(self.output_file_path))[0])
+        return (f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8"/>\n<title>{title}</title>\n'
+                f'<style>{HTML_STYLE}</style>\n</head>\n<body>\n')
+
+    def render_page(self, page_idx: int, page: Page) -> str:
+        return page_to_html(page_idx, page)
+
+    def render_footer(self) -> str:
+        return '</body>\n</html>\n'
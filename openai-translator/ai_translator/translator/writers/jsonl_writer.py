@@ -0,0 +1,40 @@
+import json
+
+from book import Page, ContentType
+from translator.writers.base import PageWriter, register_writer
+
+
+def table_to_record(table):
+    return {"columns": table.column_names, "rows": table.tolist()}
+
+
+def content_to_record(page_idx: int, content_idx: int, content) -> dict:
+    if content.content_type == ContentType.TABLE:
+        original = content.original.tolist()
+        translation = table_to_record(content.translation) if content.translation is not None else None
+    elif content.content_type == ContentType.MIXED and content.status:
+        original = content.original
+        translation = [{"type": block_type.name.lower(), "content": value if block_type == ContentType.TEXT else table_to_record(value)}
+                       for block_type, value in content.translation]
+    else:
+        original = content.original
+        translation = content.translation
+    return {
+        "page": page_idx,
+        "content": content_idx,
+        "type": content.content_type.name.lower(),
+        "original": original,
+        "translation": translation,
+        "status": bool(content.status),
+    }
+
+
+@register_writer("jsonl")
+class JsonlWriter(PageWriter):
+    """每个 content 一行 JSON，包含原文与译文，供下游索引使用；未翻译成功的 content 同样输出，status 为 false。"""
+
+    extension = '.jsonl'
+
+    def render_page(self, page_idx: int, page: Page) -> str:
+        return ''.join(json.dumps(content_to_record(page_idx, content_idx, content), ensure_ascii=False) + '\n'
+                       for content_idx, content in enumerate(page.contents))
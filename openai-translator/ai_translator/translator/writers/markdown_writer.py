@@ -0,0 +1,32 @@
+from book import Page, ContentType
+from translator.writers.base import PageWriter, register_writer
+
+
+def table_to_markdown(table) -> str:
+    header = '| ' + ' | '.join(str(column) for column in table.column_names) + ' |' + '\n'
+    separator = '| ' + ' | '.join(['---'] * table.n_cols) + ' |' + '\n'
+    body = '\n'.join(['| ' + ' | '.join(str(cell) for cell in row) + ' |' for row in
+                      table.iter_rows()]) + '\n\n'
+    return header + separator + body
+
+
+@register_writer("markdown", "md")
+class MarkdownWriter(PageWriter):
+    extension = '.md'
+
+    def render_page(self, page_idx: int, page: Page) -> str:
+        # Add a page break (horizontal rule) between pages
+        parts = ['---\n\n'] if page_idx else []
+        for content in page.contents:
+            if content.status:
+                if content.content_type == ContentType.TEXT:
+                    # Add translated text to the Markdown file
+                    parts.append(content.translation + '\n\n')
+
+                elif content.content_type == ContentType.TABLE:
+                    # Add table to the Markdown file
+                    parts.append(table_to_markdown(content.translation))
+                elif content.content_type == ContentType.MIXED:
+                    for block_type, value in content.translation:
+                        parts.append(value + '\n\n' if block_type == ContentType.TEXT else table_to_markdown(value))
+        return ''.join(parts)
@@ -0,0 +1,187 @@
+import queue
+import threading
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from book import Page, ContentType
+from translator.writers.base import PageWriter, register_writer
+from utils import LOG
+
+# 默认的中文字体
+FONT_NAME = "SimSun"
+FONT_PATH = "../fonts/simsun.ttc"  # 请将此路径替换为您的字体文件路径
+
+# 排版线程最多积压的页数，超过后 write_page 等待排版跟上
+PENDING_PAGES = 8
+
+
+@lru_cache(maxsize=None)
+def register_font(font_path: str = FONT_PATH, font_name: str = FONT_NAME) -> str:
+    # 解析 ttc 字体文件很慢，每个进程只注册一次，之后导出 pdf 直接复用
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(TTFont(font_name, font_path))
+    LOG.debug(f"注册字体 {font_name}: {font_path}")
+    return font_name
+
+
+@lru_cache(maxsize=None)
+def pdf_paragraph_style(font_name: str = FONT_NAME):
+    from reportlab.lib.styles import ParagraphStyle
+
+    return ParagraphStyle(font_name, fontName=font_name, fontSize=12, leading=14)
+
+
+@lru_cache(maxsize=None)
+def pdf_table_style(font_name: str = FONT_NAME):
+    # reportlab 只在导出 pdf 时才需要，首次使用时再导入
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), font_name),  # 更改表头字体为 "SimSun"
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTNAME', (0, 1), (-1, -1), font_name),  # 更改表格中的字体为 "SimSun"
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+
+def page_to_pdf_flowables(page: Page, font_name: str = FONT_NAME) -> Iterator:
+    from reportlab.platypus import Paragraph, Table
+
+    # 样式对象在所有段落和表格之间共用
+    paragraph_style = pdf_paragraph_style(font_name)
+    table_style = pdf_table_style(font_name)
+    for content in page.contents:
+        if content.status:
+            if content.content_type == ContentType.TEXT:
+                # Add translated text to the PDF
+                yield Paragraph(content.translation, paragraph_style)
+
+            elif content.content_type == ContentType.TABLE:
+                # Add table to the PDF
+                pdf_table = Table(content.translation.tolist())
+                pdf_table.setStyle(table_style)
+                yield pdf_table
+            elif content.content_type == ContentType.MIXED:
+                for block_type, value in content.translation:
+                    if block_type == ContentType.TEXT:
+                        yield Paragraph(value, paragraph_style)
+                    else:
+                        pdf_table = Table(value.tolist())
+                        pdf_table.setStyle(table_style)
+                        yield pdf_table
+
+
+class LazyStory(list):
+    """按需生成的 story。
+
+    reportlab 的 doc.build 只从列表头部逐个取出 flowables 排版，这里在剩余不足 low_water 个时
+    才继续生成后续页面的 flowables，内存中只保留少量页面，而不是整本书的 Paragraph/Table 对象。
+    """
+
+    def __init__(self, flowables: Iterator, low_water: int = 64):
+        super().__init__()
+        self._flowables = flowables
+        self.low_water = low_water
+
+    def __len__(self) -> int:
+        if self._flowables is not None and super().__len__() < self.low_water:
+            for flowable in self._flowables:
+                self.append(flowable)
+                if super().__len__() >= self.low_water:
+                    break
+            else:
+                self._flowables = None
+        return super().__len__()
+
+
+@register_writer("pdf")
+class PdfWriter(PageWriter):
+    """reportlab 的 doc.build 需要一次拿到整个 story：逐页写出时排版在后台线程中进行，
+    write_page 把页面放入队列，LazyStory 从队列中按需取页生成 flowables。"""
+
+    extension = '.pdf'
+
+    def __init__(self, output_file_path: str, flush: bool = False, font_path: str = FONT_PATH):
+        super().__init__(output_file_path, flush)
+        self.font_path = font_path
+        self._pages = None
+        self._thread = None
+        self._error = None
+
+    def begin(self):
+        self._pages = queue.Queue(maxsize=PENDING_PAGES)
+        # None 表示没有更多页面
+        self._thread = threading.Thread(target=self._build, args=(iter(self._pages.get, None),), daemon=True)
+        self._thread.start()
+
+    def write_book(self, book):
+        # 整本导出时页面都已就绪，直接在当前线程排版，省去线程间传递页面的开销
+        self._build(book.pages)
+        self._raise_error()
+        self.pages_written = len(book.pages)
+
+    def write_page(self, page: Page):
+        self._put(page)
+        self.pages_written += 1
+
+    def end(self):
+        self._put(None)
+        self._thread.join()
+        self._raise_error()
+
+    def close(self):
+        # 异常退出时让排版线程尽快结束
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._put(None)
+            except Exception:
+                pass
+            self._thread.join()
+
+    def _put(self, page):
+        while True:
+            self._raise_error()
+            try:
+                self._pages.put(page, timeout=0.1)
+                return
+            except queue.Full:
+                if not self._thread.is_alive():
+                    self._raise_error()
+                    return
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    @staticmethod
+    def _iter_flowables(pages: Iterable[Page], font_name: str) -> Iterator:
+        from reportlab.platypus import PageBreak
+
+        for page_idx, page in enumerate(pages):
+            # Add a page break between pages
+            if page_idx:
+                yield PageBreak()
+            yield from page_to_pdf_flowables(page, font_name)
+
+    def _build(self, pages: Iterable[Page]):
+        from reportlab.lib import pagesizes
+        from reportlab.platypus import SimpleDocTemplate
+
+        try:
+            # Register Chinese font
+            font_name = register_font(self.font_path)
+            # Create a PDF document
+            doc = SimpleDocTemplate(self.output_file_path, pagesize=pagesizes.letter)
+            # 边排版边生成后续页面的 flowables
+            doc.build(LazyStory(self._iter_flowables(pages, font_name)))
+        except Exception as e:
+            LOG.error(f"导出 pdf 失败: {e}")
+            self._error = e
@@ -1,3 +1,23 @@
-from .argument_parser import ArgumentParser
-from .config_loader import ConfigLoader
-from .logger import LOG
+import importlib
+
+# 按需导入子模块：只用到 ArgumentParser 时（如 --help）不必加载日志、缓存等依赖
+_EXPORTS = {
+    "ArgumentParser": ".argument_parser",
+    "ConfigLoader": ".config_loader",
+    "LOG": ".logger",
+    "RateLimiter": ".rate_limiter",
+    "count_tokens": ".token_counter",
+    "count_message_tokens": ".token_counter",
+    "TranslationCache": ".translation_cache",
+    "parse_page_ranges": ".page_ranges",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,6 +1,8 @@
 import argparse
 import os
 
+from utils import parse_page_ranges
+
 class ArgumentParser:
     def __init__(self):
         self.parser = argparse.ArgumentParser(description='Translate English PDF book to Chinese.')
@@ -12,11 +14,32 @@ class ArgumentParser:
         self.parser.add_argument('--openai_api_key', type=str, help='The API key for OpenAIModel. Required if model_type is "OpenAIModel".',
                                  default=os.getenv("OPENAI_API_KEY"))
         self.parser.add_argument('--book', type=str, help='PDF file to translate.')
-        self.parser.add_argument('--file_format', type=str, help='The file format of translated book. Now supporting PDF and Markdown')
+        self.parser.add_argument('--batch', type=str, help='Translate many books in one process: a directory (searched recursively), a glob pattern such as "books/*.pdf", or a manifest file listing one PDF per line, optionally followed by its page ranges.')
+        self.parser.add_argument('--pages', type=str, help='Page ranges to translate, 1-based and inclusive, e.g. "10-40,55" or "100-" (defaults to all pages).')
+        self.parser.add_argument('--file_workers', type=int, help='The number of books parsed and translated at the same time in batch mode.')
+        self.parser.add_argument('--file_format', type=str, help='The file format of translated book: PDF, Markdown, HTML, EPUB or JSONL. Separate several formats with commas to write them all in one pass, e.g. "markdown,jsonl".')
         self.parser.add_argument('-pt', '--parser_type', type=str, default='AHEAD', choices=['AHEAD', 'BEHIND'])
+        self.parser.add_argument('--max_workers', type=int, help='The maximum number of concurrent translation requests.')
+        self.parser.add_argument('--requests_per_minute', type=int, help='Client-side limit of model requests per minute.')
+        self.parser.add_argument('--tokens_per_minute', type=int, help='Client-side limit of model tokens per minute.')
+        self.parser.add_argument('--batch_tokens', type=int, help='Token budget for packing short contents into one request (0 disables batching).')
+        self.parser.add_argument('--chunk_tokens', type=int, help='Token budget per request for BEHIND mode pages; larger pages are split (defaults to a budget derived from the model context window).')
+        self.parser.add_argument('--parse_workers', type=int, help='The number of processes used to parse the PDF.')
+        self.parser.add_argument('--stream', action='store_true', default=None, help='Parse, translate and write the book page by page.')
+        self.parser.add_argument('--resume', action='store_true', help='Resume an interrupted translation from its journal.')
+        self.parser.add_argument('--incremental', action='store_true', help='Re-translate only the contents that changed since the previous run of this book.')
+        self.parser.add_argument('--base_journal', type=str, help='Journal of the previous revision to reuse in incremental mode, if it was translated under another file name.')
+        self.parser.add_argument('--no_cache', '--no-cache', action='store_true', help='Bypass the persistent translation and parsed-book caches.')
 
     def parse_arguments(self):
         args = self.parser.parse_args()
         if args.model_type == 'OpenAIModel' and not args.openai_model and not args.openai_api_key:
             self.parser.error("--openai_model and --openai_api_key is required when using OpenAIModel")
+        if args.book and args.batch:
+            self.parser.error("--book and --batch cannot be used together")
+        if args.pages:
+            try:
+                parse_page_ranges(args.pages)
+            except ValueError as e:
+                self.parser.error(f"--pages: {e}")
         return args
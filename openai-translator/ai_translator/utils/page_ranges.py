@@ -0,0 +1,30 @@
+import re
+from typing import List, Optional, Tuple
+
+_RANGE = re.compile(r"^(\d+)?\s*(-)?\s*(\d+)?$")
+
+
+def parse_page_ranges(spec: str) -> List[Tuple[int, Optional[int]]]:
+    """解析页码范围，如 "10-40,55"、"100-"（到最后一页），页码从 1 开始，区间包含两端。
+
+    返回 [(起始页, 结束页)]，结束页为 None 表示到最后一页；格式错误时抛出 ValueError。
+    """
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = _RANGE.match(part)
+        if match is None or match.group(1) is None:
+            raise ValueError(f"Invalid page range: {part!r}")
+        start = int(match.group(1))
+        if match.group(2) is None:
+            end = start
+        else:
+            end = int(match.group(3)) if match.group(3) is not None else None
+        if start < 1 or (end is not None and end < start):
+            raise ValueError(f"Invalid page range: {part!r}")
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError(f"Invalid page range: {spec!r}")
+    return ranges
@@ -0,0 +1,129 @@
+# 与 langchain/openai-translator/ai_translator/utils/rate_limiter.py 是同一份代码：两个应用各自独立运行，修改时同步两边
+
+import threading
+import time
+from typing import Optional
+
+from utils import LOG
+
+# 触发 429 后速率下调的比例，以及每次成功请求后恢复的幅度
+DECREASE_FACTOR = 0.8
+RECOVERY_STEP = 0.02
+MIN_RATE_FACTOR = 0.2
+MAX_BACKOFF_SECONDS = 60.0
+# 桶容量只允许积攒约 10 秒的配额，避免空闲后一次性突发整分钟的请求
+BURST_SECONDS = 10
+
+
+class TokenBucket:
+    """令牌桶：按固定速率补充，允许透支，透支部分由后续调用方等待偿还。"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float, rate_factor: float = 1.0):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.refill_per_second * rate_factor)
+        self._updated = now
+
+    def wait_time(self, amount: float, rate_factor: float = 1.0) -> float:
+        # 单次请求超过桶容量时等到桶满即可放行，超出部分记为透支
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / (self.refill_per_second * rate_factor)
+
+
+class RateLimiter:
+    """按每分钟请求数（RPM）和每分钟 token 数（TPM）限流，可在多个模型、多个线程之间共享。
+
+    调用前用估算的 token 数预约额度，拿到响应后再按实际用量校正；遇到 429 时暂停并下调速率，
+    之后随成功请求逐步恢复，使吞吐稳定在配额之下。
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests = RateLimiter._make_bucket(requests_per_minute)
+        self.tokens = RateLimiter._make_bucket(tokens_per_minute)
+        self.rate_factor = 1.0
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.rate_limited = 0
+        self._paused_until = 0.0
+        self._consecutive_limited = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_bucket(per_minute: Optional[int]) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        return TokenBucket(max(1.0, per_minute * BURST_SECONDS / 60), per_minute / 60)
+
+    def acquire(self, estimated_tokens: int = 0):
+        """阻塞直到本次请求的额度可用，并立即扣除额度。"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            for bucket, amount in ((self.requests, 1), (self.tokens, estimated_tokens)):
+                if bucket is None:
+                    continue
+                bucket.refill(now, self.rate_factor)
+                wait = max(wait, bucket.wait_time(amount, self.rate_factor))
+                # 先扣除额度（可以透支），后来的调用方会排在本次请求之后
+                bucket.level -= amount
+            self.total_requests += 1
+        if wait > 0:
+            LOG.debug(f"限流等待 {wait:.2f} 秒")
+            time.sleep(wait)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """按响应中的实际用量校正预约时的估算值。"""
+        with self._lock:
+            self.total_tokens += actual_tokens
+            if self.tokens is not None:
+                self.tokens.level += estimated_tokens - actual_tokens
+            self._consecutive_limited = 0
+            self.rate_factor = min(1.0, self.rate_factor + RECOVERY_STEP)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> float:
+        """收到 429 时调用：所有共享该限流器的请求一起暂停，并下调速率。返回暂停秒数。"""
+        with self._lock:
+            self.rate_limited += 1
+            self._consecutive_limited += 1
+            self.rate_factor = max(MIN_RATE_FACTOR, self.rate_factor * DECREASE_FACTOR)
+            if retry_after is None:
+                # 没有 retry-after 时指数退避
+                retry_after = min(MAX_BACKOFF_SECONDS, 2.0 ** self._consecutive_limited)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            for bucket in (self.requests, self.tokens):
+                if bucket is not None:
+                    bucket.level = min(bucket.level, 0.0)
+        LOG.warning(f"触发速率限制，暂停 {retry_after:.1f} 秒，速率调整为配额的 {self.rate_factor:.0%}")
+        return retry_after
+
+    @staticmethod
+    def parse_retry_after(headers) -> Optional[float]:
+        if not headers:
+            return None
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+        value = headers.get("retry-after")
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.total_requests,
+            "tokens": self.total_tokens,
+            "rate_limited": self.rate_limited,
+            "rate_factor": round(self.rate_factor, 2),
+        }
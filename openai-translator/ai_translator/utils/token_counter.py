@@ -0,0 +1,43 @@
+# 与 langchain/openai-translator/ai_translator/utils/token_counter.py 是同一份代码：两个应用各自独立运行，修改时同步两边
+
+import math
+from functools import lru_cache
+
+from utils import LOG
+
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: str = None):
+    # 第一次计数时才导入 tiktoken
+    try:
+        import tiktoken
+    except ImportError:  # tiktoken 为可选依赖，缺失时按字节数粗略估算
+        return None
+    try:
+        if model_name is not None:
+            try:
+                return tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        # 首次使用时 tiktoken 需要联网下载词表，离线环境下退回估算
+        LOG.warning(f"加载 tiktoken 词表失败，改为按字节数估算 token: {e}")
+        return None
+
+
+def count_tokens(text: str, model_name: str = None) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        # 英文约 4 字节 1 个 token，中文约 3 字节 1 个 token，按 3 字节估算偏保守
+        return math.ceil(len(text.encode("utf-8")) / 3)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: list, model_name: str = None) -> int:
+    # 每条消息额外约有 4 个 token 的格式开销，回复再预留 3 个
+    return sum(count_tokens(message["content"], model_name) + 4 for message in messages) + 3
@@ -0,0 +1,141 @@
+# 与 langchain/openai-translator/ai_translator/utils/translation_cache.py 是同一份代码：两个应用各自独立运行，修改时同步两边
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils import LOG
+
+# 命中时只在内存中记录访问时间，攒够这么多条或距上次写入超过 TOUCH_FLUSH_SECONDS 秒时批量写回
+TOUCH_FLUSH_SIZE = 256
+TOUCH_FLUSH_SECONDS = 30.0
+
+
+class TranslationCache:
+    """基于 SQLite 的翻译缓存，按最近访问时间做 LRU 淘汰。"""
+
+    def __init__(self, cache_file: str, max_entries: int = 100000, max_bytes: int = 256 * 1024 * 1024):
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 尚未写回的 last_access：{key: 访问时间}
+        self._touched = {}
+        self._touched_at = time.monotonic()
+        # 并发翻译时多个线程共用同一个连接，由 _lock 串行化访问
+        self._conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 模式下 NORMAL 只在 checkpoint 时 fsync，断电最多丢失最近的几条缓存，不会损坏数据库
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, translation TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON translations (last_access)")
+        self._conn.commit()
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM translations").fetchone()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # 统一换行符并去掉行尾空白，排版上的细微差异不影响命中
+        text = text.replace("\r\n", "\n")
+        return re.sub(r"[ \t]+\n", "\n", text).strip()
+
+    @staticmethod
+    def make_key(model_name: str, source_language, target_language, prompt_version, content) -> str:
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, sort_keys=True)
+        payload = json.dumps(
+            [model_name, source_language, target_language, prompt_version, TranslationCache.normalize(content)],
+            ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # 命中不再逐条 UPDATE + commit，访问时间先记在内存中
+            self._touched[key] = time.time()
+            if (len(self._touched) >= TOUCH_FLUSH_SIZE
+                    or time.monotonic() - self._touched_at >= TOUCH_FLUSH_SECONDS):
+                self._flush_touched()
+                self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, translation: str):
+        size = len(translation.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM translations WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, translation, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, translation, size, time.time()))
+            if old is None:
+                self._entries += 1
+                self._bytes += size
+            else:
+                self._bytes += size - old[0]
+            # 淘汰前写回访问时间，刚命中过的记录不会被当作最久未访问
+            self._flush_touched()
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM translations WHERE key = ?", (key,)).fetchone()
+            if old is None:
+                return
+            self._conn.execute("DELETE FROM translations WHERE key = ?", (key,))
+            self._touched.pop(key, None)
+            self._entries -= 1
+            self._bytes -= old[0]
+            self._conn.commit()
+
+    def _flush_touched(self):
+        # 调用方持有 _lock 并负责 commit
+        if self._touched:
+            self._conn.executemany("UPDATE translations SET last_access = ? WHERE key = ?",
+                                   [(last_access, key) for key, last_access in self._touched.items()])
+            self._touched.clear()
+        self._touched_at = time.monotonic()
+
+    def _evict(self):
+        while self._entries > self.max_entries or self._bytes > self.max_bytes:
+            # 每次淘汰最久未访问的一批记录
+            overflow = max(self._entries - self.max_entries, 1)
+            rows = self._conn.execute(
+                "SELECT key, size FROM translations ORDER BY last_access LIMIT ?", (overflow,)).fetchall()
+            if not rows:
+                break
+            self._conn.executemany("DELETE FROM translations WHERE key = ?", [(key,) for key, _ in rows])
+            self._entries -= len(rows)
+            self._bytes -= sum(size for _, size in rows)
+            LOG.debug(f"翻译缓存淘汰 {len(rows)} 条记录")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": self._entries,
+            "bytes": self._bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
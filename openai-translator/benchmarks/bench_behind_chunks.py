@@ -0,0 +1,96 @@
+"""统计 BEHIND 模式分块前后每页请求的 token 数，以及超出模型上下文窗口的页数。
+
+分块前：整页 layout 文本作为一次请求；分块后：压缩对齐空白，超出预算的页面按段落/表格切分为多次请求。
+超出上下文窗口按 请求 token + 预计译文 token（原文的 OUTPUT_RATIO 倍）> 上下文窗口 计算。
+除了传入的 pdf，脚本还会用 reportlab 生成一份小字号、正文与表格混排的密集 pdf。
+用法（在 openai-translator 目录下执行）:
+    python benchmarks/bench_behind_chunks.py tests/The_Old_Man_of_the_Sea.pdf --model gpt-3.5-turbo
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from reportlab.lib import colors, pagesizes
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ai_translator'))
+
+from prompt.prompt_template import PromptTemplate
+from translator.mixed_chunker import MixedChunker, MODEL_CONTEXT_TOKENS, DEFAULT_CONTEXT_TOKENS, OUTPUT_RATIO
+from translator.pdf_parser import PDFParser, ParserType
+from utils import LOG, count_message_tokens, count_tokens
+
+SENTENCE = "Quarterly revenue grew in every region while operating costs remained broadly flat. "
+
+
+def build_dense_pdf(path: str, pages: int):
+    style = ParagraphStyle("dense", fontSize=6, leading=7)
+    grid = TableStyle([('GRID', (0, 0), (-1, -1), 0.3, colors.black), ('FONTSIZE', (0, 0), (-1, -1), 5)])
+    story = []
+    for page_idx in range(pages):
+        for para_idx in range(6):
+            story.append(Paragraph(SENTENCE * 12, style))
+        table = Table([[f"Segment {col}" for col in range(6)]] +
+                      [[f"{(row * 6 + col) * 13 % 997}.{col}" for col in range(6)] for row in range(30)])
+        table.setStyle(grid)
+        story.append(table)
+        story.append(PageBreak())
+    SimpleDocTemplate(path, pagesize=pagesizes.A4, leftMargin=20, rightMargin=20).build(story)
+
+
+def measure(pdf_file_path: str, model_name: str, target_language: str):
+    context = next((MODEL_CONTEXT_TOKENS[prefix] for prefix in sorted(MODEL_CONTEXT_TOKENS, key=len, reverse=True)
+                    if model_name.startswith(prefix)), DEFAULT_CONTEXT_TOKENS)
+    chunker = MixedChunker(MixedChunker.budget_for(model_name, target_language), model_name)
+    book = PDFParser.parse_pdf(pdf_file_path, parse_type=ParserType.BEHIND)
+
+    stats = {"pages": 0, "before_tokens": 0, "after_tokens": 0, "before_overflow": 0, "after_overflow": 0,
+             "requests": 0, "before_max": 0, "after_max": 0}
+    for page in book.pages:
+        for content in page.contents:
+            stats["pages"] += 1
+            # 分块前：整页一次请求
+            messages = PromptTemplate.make_text_messages(content.original, target_language)
+            tokens = count_message_tokens(messages, model_name)
+            stats["before_tokens"] += tokens
+            stats["before_max"] = max(stats["before_max"], tokens)
+            if tokens + OUTPUT_RATIO * count_tokens(content.original, model_name) > context:
+                stats["before_overflow"] += 1
+
+            overflow = False
+            for chunk in chunker.split(content.original):
+                messages = PromptTemplate.make_text_messages(chunk, target_language)
+                tokens = count_message_tokens(messages, model_name)
+                stats["after_tokens"] += tokens
+                stats["after_max"] = max(stats["after_max"], tokens)
+                stats["requests"] += 1
+                overflow = overflow or tokens + OUTPUT_RATIO * count_tokens(chunk, model_name) > context
+            stats["after_overflow"] += overflow
+    return context, chunker.max_tokens, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BEHIND mode chunking benchmark.")
+    parser.add_argument("pdf", nargs="*", help="要统计的 pdf 文件")
+    parser.add_argument("--model", type=str, default="gpt-3.5-turbo", help="模型名称，决定上下文窗口")
+    parser.add_argument("--target_language", type=str, default="中文")
+    parser.add_argument("--dense_pages", type=int, default=10, help="生成的密集 pdf 的页数，0 表示不生成")
+    args = parser.parse_args()
+
+    LOG.remove()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_files = list(args.pdf)
+        if args.dense_pages:
+            dense_path = os.path.join(tmp_dir, "dense.pdf")
+            build_dense_pdf(dense_path, args.dense_pages)
+            pdf_files.append(dense_path)
+
+        for pdf_file_path in pdf_files:
+            context, budget, stats = measure(pdf_file_path, args.model, args.target_language)
+            print(f"{os.path.basename(pdf_file_path)}: {stats['pages']} pages, context {context}, chunk budget {budget}")
+            print(f"  before  {stats['pages']:5d} requests  {stats['before_tokens']:8d} prompt tokens  "
+                  f"max {stats['before_max']:6d}  pages over context {stats['before_overflow']}")
+            print(f"  after   {stats['requests']:5d} requests  {stats['after_tokens']:8d} prompt tokens  "
+                  f"max {stats['after_max']:6d}  pages over context {stats['after_overflow']}")
@@ -0,0 +1,53 @@
+"""用 python -X importtime 统计 ai_translator 各入口的启动耗时，以及加载了哪些重量级依赖。
+
+用法（在 openai-translator 目录下执行）:
+    python benchmarks/bench_import_time.py --repeat 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+AI_TRANSLATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ai_translator')
+
+HEAVY_MODULES = ("pandas", "PIL", "reportlab", "pdfplumber", "openai", "tiktoken", "aiohttp", "requests", "langchain")
+
+SCENARIOS = {
+    # 只打印帮助信息
+    "main.py --help": ["main.py", "--help"],
+    # 翻译前需要加载的模块：markdown 输出 + OpenAIModel
+    "markdown + OpenAIModel": ["-c", "from translator import PDFTranslator; from model import OpenAIModel"],
+    # 只定义数据结构
+    "import book": ["-c", "import book"],
+}
+
+
+def measure(argv: list):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", *argv], cwd=AI_TRANSLATOR_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+
+    # stderr 每行形如 "import time:  self [us] | cumulative | imported package"
+    total_us = 0
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        loaded.add(name.strip().split(".")[0])
+    return elapsed, total_us / 1e6, sorted(module for module in HEAVY_MODULES if module in loaded)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time benchmark.")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快的一次")
+    args = parser.parse_args()
+
+    for name, argv in SCENARIOS.items():
+        runs = [measure(argv) for _ in range(args.repeat)]
+        elapsed, import_seconds, heavy = min(runs)
+        print(f"{name:<24} wall {elapsed * 1000:7.0f} ms  imports {import_seconds * 1000:7.0f} ms  "
+              f"heavy: {', '.join(heavy) or '-'}")
@@ -0,0 +1,50 @@
+"""对比单进程与多进程解析 pdf 的耗时。
+
+用法（在 openai-translator 目录下执行）:
+    python benchmarks/bench_parse.py --book tests/The_Old_Man_of_the_Sea.pdf --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ai_translator'))
+
+from translator.pdf_parser import PDFParser, ParserType
+from utils import LOG
+
+
+def run(book: str, parse_type: ParserType, workers: int, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed = PDFParser.parse_pdf(book, parse_type=parse_type, workers=workers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return parsed, best
+
+
+def page_texts(book):
+    return [[str(content) if not isinstance(content.original, str) else content.original
+             for content in page.contents] for page in book.pages]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark serial vs. multi-process PDF parsing.')
+    parser.add_argument('--book', type=str, default='tests/The_Old_Man_of_the_Sea.pdf')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('-pt', '--parser_type', type=str, default='AHEAD', choices=['AHEAD', 'BEHIND'])
+    args = parser.parse_args()
+
+    # 关闭逐页的调试日志，避免 I/O 干扰计时
+    LOG.remove()
+    parse_type = ParserType(args.parser_type)
+
+    serial_book, serial_time = run(args.book, parse_type, 1, args.repeat)
+    parallel_book, parallel_time = run(args.book, parse_type, args.workers, args.repeat)
+
+    assert page_texts(serial_book) == page_texts(parallel_book), "多进程解析结果与单进程不一致"
+    print(f"book: {args.book} ({len(serial_book.pages)} pages, {parse_type.value})")
+    print(f"serial      : {serial_time:.3f}s")
+    print(f"workers={args.workers:<4}: {parallel_time:.3f}s  speedup x{serial_time / parallel_time:.2f}")
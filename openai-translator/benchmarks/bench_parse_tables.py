@@ -0,0 +1,103 @@
+"""对比表格密集页面上两种 AHEAD 解析方式的耗时：逐单元格 replace 与按表格 bbox 一次遍历字符。
+
+耗时不含 pdfminer 解析页面对象的部分（两种实现相同），并校验单元格内容与 pdfplumber 的 Table.extract() 一致。
+
+脚本先用 reportlab 生成一份每页包含多个表格的 pdf（类似财报），不依赖外部文件。
+用法（在 openai-translator 目录下执行）:
+    python benchmarks/bench_parse_tables.py --pages 20 --tables 3 --rows 40 --cols 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pdfplumber
+from reportlab.lib import colors, pagesizes
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ai_translator'))
+
+from book import ContentType, Page
+from translator.pdf_parser import PDFParser
+from utils import LOG
+
+
+def build_pdf(path: str, pages: int, tables: int, rows: int, cols: int):
+    styles = getSampleStyleSheet()
+    grid = TableStyle([('GRID', (0, 0), (-1, -1), 0.5, colors.black), ('FONTSIZE', (0, 0), (-1, -1), 6)])
+    story = []
+    for page_idx in range(pages):
+        for table_idx in range(tables):
+            story.append(Paragraph(f"Section {page_idx}.{table_idx}: quarterly revenue by segment.", styles["Normal"]))
+            data = [[f"Q{col}" for col in range(cols)]]
+            # 重复出现的数字正是逐个 replace 容易删错位置的情况
+            data += [[f"{(row * cols + col) % 97}.{col}" for col in range(cols)] for row in range(rows)]
+            table = Table(data)
+            table.setStyle(grid)
+            story.append(table)
+        story.append(PageBreak())
+    SimpleDocTemplate(path, pagesize=pagesizes.A3).build(story)
+
+
+def parse_ahead_replace(page, pdf_page):
+    # 改动前的实现：对每个单元格执行一次 replace，每次都要扫描并复制整页文本
+    raw_text = pdf_page.extract_text()
+    for table_data in pdf_page.extract_tables():
+        for row in table_data:
+            for cell in row:
+                if cell:
+                    raw_text = raw_text.replace(cell, "", 1)
+    PDFParser._add_text(page, raw_text)
+
+
+def check(path: str):
+    # 单元格内容应与 pdfplumber 的 Table.extract() 一致
+    with pdfplumber.open(path) as pdf:
+        for pdf_page in pdf.pages:
+            page = Page()
+            PDFParser.parse_ahead(page, pdf_page)
+            parsed = [content.original.tolist() for content in page.contents
+                      if content.content_type == ContentType.TABLE]
+            tables = sorted(pdf_page.find_tables(), key=lambda table: (table.bbox[1], table.bbox[0]))
+            expected = [[["" if cell is None else cell for cell in row] for row in table.extract()] for table in tables]
+            assert parsed == expected, f"page {pdf_page.page_number}: table cells differ"
+
+
+def run(path: str, parse_ahead, repeat: int):
+    best = None
+    for _ in range(repeat):
+        elapsed = 0.0
+        with pdfplumber.open(path) as pdf:
+            for pdf_page in pdf.pages:
+                # pdfminer 解析页面对象的耗时两种实现相同，不计入
+                pdf_page.objects
+                start = time.perf_counter()
+                parse_ahead(Page(), pdf_page)
+                elapsed += time.perf_counter() - start
+                pdf_page.flush_cache()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Table-dense PDF parse benchmark.")
+    parser.add_argument("--pages", type=int, default=20, help="页数")
+    parser.add_argument("--tables", type=int, default=3, help="每页表格数")
+    parser.add_argument("--rows", type=int, default=40, help="每个表格的行数")
+    parser.add_argument("--cols", type=int, default=8, help="每个表格的列数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最快的一次")
+    args = parser.parse_args()
+
+    LOG.remove()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "tables.pdf")
+        build_pdf(path, args.pages, args.tables, args.rows, args.cols)
+        check(path)
+        cells = args.tables * (args.rows + 1) * args.cols
+        print(f"{args.pages} pages, {cells} table cells per page")
+        baseline = run(path, parse_ahead_replace, args.repeat)
+        print(f"replace per cell  {baseline:8.3f}s")
+        elapsed = run(path, PDFParser.parse_ahead, args.repeat)
+        print(f"bbox single pass  {elapsed:8.3f}s  ({baseline / elapsed:.2f}x)")
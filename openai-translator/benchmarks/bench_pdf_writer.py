@@ -0,0 +1,138 @@
+"""对比导出 pdf 的两种实现在大书上的耗时和峰值内存（RSS）。
+
+- legacy：改动前的实现，每次导出都重新注册字体、每个表格新建 TableStyle，整本书的 story 先全部建好再 doc.build
+- streaming：PdfWriter，字体与样式只创建一次，排版在后台线程中进行，story 边排版边按页生成
+
+每种实现在单独的子进程中运行，峰值 RSS 互不影响。沙箱中没有 simsun.ttc 时默认使用 reportlab 自带的 Vera.ttf，
+可以用 --font 指定真实的中文字体（ttc 越大，重复注册字体的开销越明显）。
+用法（在 openai-translator 目录下执行）:
+    python benchmarks/bench_pdf_writer.py --pages 1000 --saves 20
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ai_translator'))
+
+import reportlab
+
+from book import Book, Page, Content, ContentType, TableContent
+from utils import LOG
+
+DEFAULT_FONT = os.path.join(os.path.dirname(reportlab.__file__), "fonts", "Vera.ttf")
+
+
+def make_book(pages: int, paragraphs: int) -> Book:
+    book = Book("synthetic.pdf")
+    for page_idx in range(pages):
+        page = Page()
+        for para_idx in range(paragraphs):
+            content = Content(ContentType.TEXT, "")
+            content.set_translation(f"Page {page_idx} paragraph {para_idx}. " + "Translated sentence text. " * 20, True)
+            page.add_content(content)
+        table = TableContent([["a", "b", "c", "d"]])
+        table.set_translation("\n".join(" ".join(f"r{row}c{col}" for col in range(4)) for row in range(7)), True)
+        page.add_content(table)
+        book.add_page(page)
+    return book
+
+
+def save_legacy(book: Book, output_file_path: str, font_path: str):
+    # 改动前的实现
+    from reportlab.lib import colors, pagesizes
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, PageBreak
+
+    pdfmetrics.registerFont(TTFont("SimSun", font_path))
+    simsun_style = ParagraphStyle('SimSun', fontName='SimSun', fontSize=12, leading=14)
+    doc = SimpleDocTemplate(output_file_path, pagesize=pagesizes.letter)
+    story = []
+    for page in book.pages:
+        for content in page.contents:
+            if content.content_type == ContentType.TEXT:
+                story.append(Paragraph(content.translation, simsun_style))
+            elif content.content_type == ContentType.TABLE:
+                table_style = TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'SimSun'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 14),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                    ('FONTNAME', (0, 1), (-1, -1), 'SimSun'),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+                ])
+                pdf_table = Table(content.translation.tolist())
+                pdf_table.setStyle(table_style)
+                story.append(pdf_table)
+        if page != book.pages[-1]:
+            story.append(PageBreak())
+    doc.build(story)
+
+
+def save_streaming(book: Book, output_file_path: str, font_path: str):
+    from translator.writers import PdfWriter
+
+    PdfWriter(output_file_path, font_path=font_path).write_book(book)
+
+
+VARIANTS = {"legacy": save_legacy, "streaming": save_streaming}
+
+
+def run_variant(variant: str, pages: int, paragraphs: int, saves: int, font_path: str) -> dict:
+    save = VARIANTS[variant]
+    book = make_book(pages, paragraphs)
+    small_book = make_book(1, paragraphs)
+    # 先加载 reportlab，基线 RSS 只差在排版本身
+    import reportlab.platypus  # noqa: F401
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        save(book, os.path.join(tmp_dir, "book.pdf"), font_path)
+        book_seconds = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(tmp_dir, "book.pdf"))
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # 批量任务中一个进程会连续导出许多本小书
+        start = time.perf_counter()
+        for save_idx in range(saves):
+            save(small_book, os.path.join(tmp_dir, f"small_{save_idx}.pdf"), font_path)
+        saves_seconds = time.perf_counter() - start
+    # ru_maxrss 在 linux 上单位为 KiB
+    return {"book_seconds": book_seconds, "saves_seconds": saves_seconds, "size": size,
+            "baseline_rss": baseline_rss * 1024, "peak_rss": peak_rss * 1024}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF writer benchmark.")
+    parser.add_argument("--pages", type=int, default=1000, help="书的页数")
+    parser.add_argument("--paragraphs", type=int, default=4, help="每页的段落数（另有一个表格）")
+    parser.add_argument("--saves", type=int, default=20, help="连续导出单页小书的次数")
+    parser.add_argument("--font", type=str, default=DEFAULT_FONT, help="字体文件路径")
+    parser.add_argument("--variant", choices=sorted(VARIANTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    LOG.remove()
+    if args.variant:
+        # 子进程：只运行一种实现，结果以 json 输出
+        print(json.dumps(run_variant(args.variant, args.pages, args.paragraphs, args.saves, args.font)))
+        sys.exit(0)
+
+    print(f"{args.pages} pages x ({args.paragraphs} paragraphs + 1 table), font {os.path.basename(args.font)}")
+    for variant in ("legacy", "streaming"):
+        output = subprocess.run([sys.executable, __file__, "--variant", variant, "--pages", str(args.pages),
+                                 "--paragraphs", str(args.paragraphs), "--saves", str(args.saves),
+                                 "--font", args.font], check=True, capture_output=True, text=True).stdout
+        result = json.loads(output)
+        print(f"{variant:<10} book {result['book_seconds']:7.2f}s  "
+              f"peak RSS {result['peak_rss'] / 1024 / 1024:7.1f} MiB "
+              f"(+{(result['peak_rss'] - result['baseline_rss']) / 1024 / 1024:.1f} MiB while rendering)  "
+              f"{args.saves} small saves {result['saves_seconds']:6.2f}s  pdf {result['size'] / 1024:.0f} KiB")
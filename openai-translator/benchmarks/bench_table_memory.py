@@ -0,0 +1,82 @@
+"""对比表格内容用 pandas.DataFrame 与紧凑 Table 存放时的内存占用和耗时。
+
+模拟一本包含大量小表格的书：每个表格经历 构建 -> 生成提示词文本 -> 解析译文 -> 遍历单元格 的完整过程。
+用法（在 openai-translator 目录下执行）:
+    python benchmarks/bench_table_memory.py --tables 5000 --rows 6 --cols 4
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ai_translator'))
+
+import pandas as pd
+
+from book import TableContent
+from utils import LOG
+
+
+class PandasTableContent:
+    # 改动前的实现：原文和译文各是一个 DataFrame
+    def __init__(self, data):
+        self.original = pd.DataFrame(data)
+        self.translation = None
+
+    def __str__(self):
+        return self.original.to_string(header=False, index=False)
+
+    def set_translation(self, translation, status):
+        table_data = [row.strip().split() for row in translation.strip().split('\n')]
+        self.translation = pd.DataFrame(table_data[1:], columns=table_data[0])
+
+    def iter_items(self, translated=False):
+        target_df = self.translation if translated else self.original
+        for row_idx, row in target_df.iterrows():
+            for col_idx, item in enumerate(row):
+                yield (row_idx, col_idx, item)
+
+
+def make_tables(count: int, rows: int, cols: int):
+    return [[[f"t{table_idx}r{row_idx}c{col_idx}" for col_idx in range(cols)] for row_idx in range(rows)]
+            for table_idx in range(count)]
+
+
+def run(content_class, tables):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    contents = []
+    items = 0
+    for data in tables:
+        content = content_class(data)
+        # 模型原样返回表格文本，解析为译文表格
+        content.set_translation(str(content), True)
+        items += sum(1 for _ in content.iter_items(translated=True))
+        contents.append(content)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, current, peak, items
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Table content memory benchmark.")
+    parser.add_argument("--tables", type=int, default=5000, help="表格数量")
+    parser.add_argument("--rows", type=int, default=6, help="每个表格的行数")
+    parser.add_argument("--cols", type=int, default=4, help="每个表格的列数")
+    args = parser.parse_args()
+
+    LOG.remove()
+    tables = make_tables(args.tables, args.rows, args.cols)
+    print(f"{args.tables} tables of {args.rows}x{args.cols}")
+    results = {}
+    for name, content_class in (("pandas", PandasTableContent), ("Table", TableContent)):
+        elapsed, current, peak, items = run(content_class, tables)
+        results[name] = (elapsed, current)
+        print(f"{name:<8} {elapsed:8.3f}s  retained {current / 1024 / 1024:8.2f} MiB  "
+              f"peak {peak / 1024 / 1024:8.2f} MiB  ({items} cells)")
+    print(f"speedup {results['pandas'][0] / results['Table'][0]:.1f}x, "
+          f"memory {results['pandas'][1] / results['Table'][1]:.1f}x smaller")